@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Integrity audit of public/covers against books.json
+Fully decodes every cover across a process pool and reports corrupt or
+truncated files, CMYK or non-JPEG data behind a .jpg name, undersized and
+oversized images, files nothing references and references to files that
+don't exist, with the bytes that fixing or removing them would reclaim.
+
+--fix re-encodes convertible files as baseline RGB JPEG (downscaling oversized
+ones) and relinks books whose coverImage is missing but whose cover exists
+under its expected name or another reading's. Orphans are only deleted with
+--delete-orphans.
+"""
+
+import argparse
+import io
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from catalogue import COVERS_DIR, BOOKS_FILE, Catalogue, cover_name
+from download_covers_enhanced import meets_quality
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.avif'}
+
+MAX_WIDTH = 1600                   # Wider originals are downscaled by --fix
+MAX_BYTES = 1024 * 1024            # Larger files are worth re-encoding
+JPEG_QUALITY = 88
+
+def encode_jpeg(img):
+    """Baseline RGB JPEG bytes, downscaled to MAX_WIDTH"""
+    img = img.convert('RGB')
+    if img.width > MAX_WIDTH:
+        img = img.resize((MAX_WIDTH, round(img.height * MAX_WIDTH / img.width)), Image.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+def write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def check_cover(path, fix=False):
+    """
+    Worker: decode one cover and list its problems
+    With fix, convertible files are re-encoded in place
+    """
+    path = Path(path)
+    file_size = path.stat().st_size
+    result = {'name': path.name, 'bytes': file_size, 'issues': [], 'reclaimable': 0, 'fixed': False}
+    try:
+        # verify() checks structure but leaves the image unusable, so reopen to decode
+        with Image.open(path) as img:
+            img.verify()
+        with Image.open(path) as img:
+            img.load()
+            result.update({'format': img.format, 'mode': img.mode, 'width': img.width, 'height': img.height})
+            if path.suffix.lower() in ('.jpg', '.jpeg') and img.format != 'JPEG':
+                result['issues'].append('not_jpeg')
+            if img.mode not in ('RGB', 'L'):
+                result['issues'].append('cmyk' if img.mode == 'CMYK' else 'mode')
+            if not meets_quality(file_size, img.width, img.height):
+                result['issues'].append('undersized')
+            if img.width > MAX_WIDTH or file_size > MAX_BYTES:
+                result['issues'].append('oversized')
+
+            convertible = {'not_jpeg', 'cmyk', 'mode', 'oversized'} & set(result['issues'])
+            if convertible:
+                encoded = encode_jpeg(img)
+                result['reclaimable'] = max(0, file_size - len(encoded))
+                if fix and (len(encoded) < file_size or convertible - {'oversized'}):
+                    write_atomic(path, encoded)
+                    result['fixed'] = True
+    except Exception as e:
+        result['issues'].append('corrupt')
+        result['error'] = str(e)
+    return result
+
+def reference_problems(catalogue):
+    """
+    (missing, uncovered, relinkable, orphans)
+    missing: (year, book) whose coverImage file doesn't exist
+    uncovered: (year, book) with no coverImage and no cover file
+    relinkable: (year, book, filename) where a cover for the book does exist
+    orphans: filenames in the covers directory that no book references
+    """
+    covers = catalogue.covers
+    referenced = set()
+    missing, uncovered, relinkable = [], [], []
+    for year, position, book in catalogue:
+        current = cover_name(book.get('coverImage'))
+        if current:
+            referenced.add(current)
+        if current and current in covers:
+            continue
+        # Its own expected file, else a cover saved for another reading of the work
+        found = catalogue.shared_cover(book)
+        if found:
+            relinkable.append((year, book, found))
+            referenced.add(found)
+        elif current:
+            missing.append((year, book))
+        else:
+            uncovered.append((year, book))
+    orphans = sorted(name for name in covers.names()
+                     if name not in referenced and not name.startswith('.')
+                     and Path(name).suffix.lower() in IMAGE_EXTENSIONS)
+    return missing, uncovered, relinkable, orphans
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Audit cover files and their references in books.json")
+    parser.add_argument('--books', type=Path, default=BOOKS_FILE)
+    parser.add_argument('--covers-dir', type=Path, default=COVERS_DIR)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--fix', action='store_true',
+                        help="Re-encode convertible covers and relink books to existing files")
+    parser.add_argument('--delete-orphans', action='store_true',
+                        help="With --fix, delete cover files no book references")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    catalogue = Catalogue.load(args.books, args.covers_dir)
+    covers = catalogue.covers
+    paths = sorted(covers.path(name) for name in covers.names()
+                   if Path(name).suffix.lower() in IMAGE_EXTENSIONS and not name.startswith('.'))
+
+    print(f"🔍 Auditing {len(paths)} covers with {args.workers} worker(s)...\n")
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        chunksize = max(1, len(paths) // (max(1, args.workers) * 4))
+        results = list(executor.map(check_cover, paths, [args.fix] * len(paths), chunksize=chunksize))
+
+    by_issue = {}
+    for result in results:
+        for issue in result['issues']:
+            by_issue.setdefault(issue, []).append(result)
+
+    missing, uncovered, relinkable, orphans = reference_problems(catalogue)
+    orphan_bytes = sum(covers.size(name) or 0 for name in orphans)
+    reclaimable = sum(result['reclaimable'] for result in results) + orphan_bytes
+
+    labels = [
+        ('corrupt', "❌ Corrupt/truncated"),
+        ('not_jpeg', "⚠️  Not JPEG data"),
+        ('cmyk', "⚠️  CMYK"),
+        ('mode', "⚠️  Other colour mode"),
+        ('undersized', "⚠️  Undersized"),
+        ('oversized', "📦 Oversized"),
+    ]
+    for issue, label in labels:
+        for result in by_issue.get(issue, []):
+            detail = result.get('error') or (f"{result.get('format')} {result.get('mode')} "
+                                             f"{result.get('width')}x{result.get('height')}")
+            fixed = " (fixed)" if result['fixed'] else ""
+            print(f"   {label}: {result['name']}  {result['bytes'] / 1024:.0f} KB  {detail}{fixed}")
+    for year, book in missing:
+        print(f"   ❌ Missing file: {book['coverImage']}  ({book['title']}, {year})")
+    for year, book, filename in relinkable:
+        print(f"   🔗 Relinkable: {book['title']} ({year}) -> /covers/{filename}")
+    for name in orphans:
+        print(f"   🗑️  Unreferenced: {name}  {(covers.size(name) or 0) / 1024:.0f} KB")
+
+    relinked = deleted = 0
+    if args.fix:
+        for year, book, filename in relinkable:
+            book['coverImage'] = f"/covers/{filename}"
+            relinked += 1
+        if relinked:
+            catalogue.save()
+        if args.delete_orphans:
+            for name in orphans:
+                os.remove(covers.path(name))
+                covers.discard(name)
+                deleted += 1
+
+    total_bytes = sum(result['bytes'] for result in results)
+    print("\n" + "=" * 70)
+    print("📊 COVER AUDIT SUMMARY")
+    print("=" * 70)
+    print(f"Covers checked:          {len(results)} ({total_bytes / 1024 / 1024:.1f} MB)")
+    for issue, label in labels:
+        print(f"{label + ':':25}{len(by_issue.get(issue, []))}")
+    print(f"❌ Missing files:        {len(missing)}")
+    print(f"📭 Books without cover:  {len(uncovered)}")
+    print(f"🔗 Relinkable books:     {len(relinkable)}")
+    print(f"🗑️  Unreferenced files:   {len(orphans)} ({orphan_bytes / 1024:.0f} KB)")
+    print(f"\nReclaimable:             {reclaimable / 1024 / 1024:.2f} MB")
+    if args.fix:
+        print(f"\n🔧 Re-encoded: {sum(1 for r in results if r['fixed'])}, relinked: {relinked}, "
+              f"orphans deleted: {deleted}")
+        if relinked:
+            print(f"📄 Updated: {catalogue.path.absolute()}")
+    elif by_issue or relinkable:
+        print("\n💡 Run with --fix to re-encode and relink what can be repaired")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the cover pipeline
+Replays recorded (or synthesized) Open Library, Google Books and archive.org
+responses from a local stand-in server, with injected latency and errors,
+and runs download_covers_enhanced.download_covers against it. Reports wall
+time, books/sec, requests per book, bytes and the same provider success
+counts as the downloader's summary, so concurrency, caching and retry changes
+can be compared without touching the live APIs.
+
+    python3 bench_covers.py --limit 60 --workers 8 --latency-scale 0.2
+    python3 bench_covers.py --record fixtures/cover_replay.json --limit 20   # capture live responses
+    python3 bench_covers.py --fixture fixtures/cover_replay.json --runs 2 --cache
+"""
+
+import argparse
+import hashlib
+import http.server
+import io
+import json
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+from PIL import Image
+
+import download_covers_enhanced as covers
+import google_books
+import http_client
+import open_library
+import provider_stats
+import rate_limiter
+from image_probe import probe_image_size
+from response_cache import ResponseCache, normalize_url
+
+BOOKS_FILE = Path('../src/data/books.json')
+
+FIXTURE_VERSION = 1
+
+# Typical latency (ms) per host when synthesizing fixtures: (median, spread)
+SYNTHETIC_LATENCY = {
+    'openlibrary.org': (250, 0.5),
+    'covers.openlibrary.org': (350, 0.5),
+    'www.googleapis.com': (150, 0.4),
+    'books.google.com': (200, 0.4),
+    'archive.org': (700, 0.6),
+}
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def synthesize_fixture(books_data, seed=0):
+    """
+    Build a deterministic fixture that resembles real provider behaviour:
+    partial Open Library coverage (with 1x1 placeholders on misses), mostly
+    good Google results and sparse archive.org scans
+    """
+    rng = random.Random(seed)
+    responses = {}
+    bibkeys = {}
+
+    def latency(url):
+        host = urllib.parse.urlsplit(url).hostname
+        median, spread = SYNTHETIC_LATENCY.get(host, (300, 0.5))
+        return round(rng.lognormvariate(0, spread) * median)
+
+    def add_json(url, body, status=200):
+        responses[normalize_url(url)] = {'status': status, 'type': 'json', 'body': body,
+                                         'latency_ms': latency(url)}
+
+    def add_image(url, width, height):
+        responses[normalize_url(url)] = {'status': 200, 'type': 'image', 'width': width,
+                                         'height': height, 'latency_ms': latency(url)}
+
+    def add_missing(url):
+        responses[normalize_url(url)] = {'status': 404, 'latency_ms': latency(url)}
+
+    good_size = lambda: rng.choice([(400, 600), (500, 750), (600, 900), (800, 1200)])
+    small_size = lambda: rng.choice([(180, 270), (128, 192)])
+
+    for year_data in books_data.values():
+        for book in year_data.get('books', []):
+            isbn = google_books.clean_isbn(book.get('isbn', ''))
+            title, author = book.get('title', ''), book.get('author', '')
+            digest = hashlib.sha1(f"{isbn}{title}".encode('utf-8')).hexdigest()
+            cover_id = int(digest[:7], 16)
+
+            if isbn:
+                edition_url = f"https://openlibrary.org/isbn/{isbn}.json"
+                if rng.random() < 0.75:
+                    edition = {'works': [{'key': f"/works/OL{cover_id}W"}]}
+                    bibkeys[isbn] = {'number_of_pages': rng.randint(90, 600)}
+                    if rng.random() < 0.6:
+                        edition['covers'] = [cover_id]
+                        bibkeys[isbn]['cover'] = {'large': f"https://covers.openlibrary.org/b/id/{cover_id}-L.jpg"}
+                        add_image(f"https://covers.openlibrary.org/b/id/{cover_id}-L.jpg",
+                                  *(good_size() if rng.random() < 0.8 else small_size()))
+                    add_json(edition_url, edition)
+                    work_cover = cover_id + 1
+                    if rng.random() < 0.5:
+                        add_json(f"https://openlibrary.org/works/OL{cover_id}W.json", {'covers': [work_cover]})
+                        add_image(f"https://covers.openlibrary.org/b/id/{work_cover}-L.jpg", *good_size())
+                    else:
+                        add_json(f"https://openlibrary.org/works/OL{cover_id}W.json", {})
+                else:
+                    add_missing(edition_url)
+                isbn_cover = f"https://covers.openlibrary.org/b/isbn/{isbn}-L.jpg"
+                # Open Library answers unknown ISBNs with a 1x1 placeholder
+                add_image(isbn_cover, *(good_size() if rng.random() < 0.5 else (1, 1)))
+                add_image(f"https://archive.org/services/img/isbn_{isbn}",
+                          *(good_size() if rng.random() < 0.25 else (180, 180)))
+                add_json(f"{google_books.VOLUMES_URL}?q=isbn:{isbn}&maxResults=1",
+                         {'totalItems': 0} if rng.random() < 0.3 else
+                         {'totalItems': 1, 'items': [{'volumeInfo': {'pageCount': rng.randint(90, 600)}}]})
+
+            query = urllib.parse.quote(f"{title} {author}".strip())
+            search_url = f"{google_books.VOLUMES_URL}?q={query}&maxResults=1"
+            if rng.random() < 0.85:
+                thumbnail = (f"http://books.google.com/books/content?id={digest[:12]}"
+                             f"&printsec=frontcover&img=1&zoom=1&edge=curl&source=gbs_api")
+                volume = {'pageCount': rng.randint(90, 600), 'imageLinks': {'thumbnail': thumbnail}}
+                add_json(search_url, {'totalItems': 1, 'items': [{'volumeInfo': volume}]})
+                add_image(google_books.cover_url_from_volume(volume),
+                          *(good_size() if rng.random() < 0.7 else small_size()))
+            else:
+                add_json(search_url, {'totalItems': 0})
+
+            ia_search = (f"https://archive.org/advancedsearch.php?q={query}"
+                         f"&fl=identifier&output=json&rows=1")
+            if rng.random() < 0.4:
+                identifier = f"bench_{digest[:10]}"
+                add_json(ia_search, {'response': {'docs': [{'identifier': identifier}]}})
+                add_image(f"https://archive.org/services/img/{identifier}",
+                          *(good_size() if rng.random() < 0.5 else (180, 180)))
+            else:
+                add_json(ia_search, {'response': {'docs': []}})
+
+    return {'version': FIXTURE_VERSION, 'responses': responses, 'bibkeys': bibkeys}
+
+def load_fixture(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        fixture = json.load(f)
+    if fixture.get('version') != FIXTURE_VERSION:
+        raise SystemExit(f"Unsupported fixture version in {path}")
+    return fixture
+
+class RecordingClient(http_client.HttpClient):
+    """
+    HttpClient that captures every response it returns as a fixture entry
+    Images are stored as dimensions only and re-synthesized on replay
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.recorded = {}
+        self.bibkeys = {}
+        self._record_lock = threading.Lock()
+
+    def get(self, url, stream=False, timeout=None):
+        started = time.perf_counter()
+        response = super().get(url, timeout=timeout)  # read the body so it can be recorded
+        entry = {'status': response.status_code,
+                 'latency_ms': round((time.perf_counter() - started) * 1000)}
+        content_type = response.headers.get('Content-Type', '')
+        if response.status_code == 200 and content_type.startswith('image/'):
+            size = probe_image_size(response.content) or (1, 1)
+            entry.update({'type': 'image', 'width': size[0], 'height': size[1]})
+        elif response.status_code == 200:
+            try:
+                entry.update({'type': 'json', 'body': response.json()})
+            except ValueError:
+                entry.update({'type': 'text', 'body': response.text})
+        with self._record_lock:
+            self.recorded[normalize_url(url)] = entry
+            if url.startswith(open_library.BOOKS_API_URL) and entry.get('type') == 'json':
+                # Keep bulk records per ISBN so replays can answer any chunking
+                for bibkey, record in entry['body'].items():
+                    self.bibkeys[bibkey.split(':', 1)[-1]] = record
+        return response
+
+# ---------------------------------------------------------------------------
+# Stand-in server
+# ---------------------------------------------------------------------------
+
+class ReplayServer:
+    """
+    Local HTTP server answering /<scheme>/<host>/<path>?<query> from a fixture
+    Sleeps for each entry's recorded latency (scaled) and injects 503s
+    """
+
+    def __init__(self, fixture, latency_scale=1.0, error_rate=0.0, seed=0):
+        self.responses = fixture['responses']
+        self.bibkeys = fixture.get('bibkeys', {})
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.images = {}
+        self.images_lock = threading.Lock()
+        self.requests = 0
+        self.injected_errors = 0
+        self.unknown_urls = 0
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        class QuietServer(http.server.ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                # Clients drop connections mid-body when they only probe headers
+                if not isinstance(sys.exc_info()[1], (ConnectionError, BrokenPipeError)):
+                    super().handle_error(request, client_address)
+
+        self.httpd = QuietServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def rewrite(self, url):
+        """Map a provider URL onto this server"""
+        parts = urllib.parse.urlsplit(url)
+        rewritten = f"{self.base_url}/{parts.scheme}/{parts.netloc}{parts.path}"
+        return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+    def image_bytes(self, width, height):
+        key = (width, height)
+        with self.images_lock:
+            if key not in self.images:
+                img = Image.effect_noise((width, height), 40).convert('RGB')
+                buffer = io.BytesIO()
+                img.save(buffer, 'JPEG', quality=85)
+                self.images[key] = buffer.getvalue()
+            return self.images[key]
+
+    def bulk_entry(self, url):
+        """Answer an Open Library /api/books request from the per-ISBN records"""
+        if not url.startswith(open_library.BOOKS_API_URL):
+            return None
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+        body = {bibkey: self.bibkeys[bibkey.split(':', 1)[-1]]
+                for bibkey in query.get('bibkeys', '').split(',')
+                if bibkey.split(':', 1)[-1] in self.bibkeys}
+        return {'status': 200, 'type': 'json', 'body': body, 'latency_ms': 400}
+
+    def handle(self, request):
+        scheme, _, rest = request.path.lstrip('/').partition('/')
+        original = normalize_url(f"{scheme}://{rest}")
+        entry = self.responses.get(original) or self.bulk_entry(original)
+        with self.rng_lock:
+            self.requests += 1
+            inject_error = self.rng.random() < self.error_rate
+            if entry is None:
+                self.unknown_urls += 1
+        if entry is None:
+            entry = {'status': 404, 'latency_ms': 100}
+
+        time.sleep(entry.get('latency_ms', 0) / 1000 * self.latency_scale)
+
+        if inject_error:
+            with self.rng_lock:
+                self.injected_errors += 1
+            self.send(request, 503, b'', 'text/plain', {'Retry-After': '0'})
+        elif entry['status'] != 200:
+            self.send(request, entry['status'], b'', 'text/plain')
+        elif entry.get('type') == 'image':
+            self.send(request, 200, self.image_bytes(entry['width'], entry['height']), 'image/jpeg')
+        elif entry.get('type') == 'json':
+            self.send(request, 200, json.dumps(entry['body']).encode('utf-8'), 'application/json')
+        else:
+            self.send(request, 200, str(entry.get('body', '')).encode('utf-8'), 'text/plain')
+
+    def send(self, request, status, body, content_type, headers=None):
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def limit_books(books_data, limit):
+    """Copy of books_data holding at most `limit` books"""
+    limited, remaining = {}, limit
+    for year, year_data in books_data.items():
+        if remaining is not None and remaining <= 0:
+            break
+        books = year_data.get('books', [])
+        if remaining is not None:
+            books = books[:remaining]
+            remaining -= len(books)
+        limited[year] = {'books': [dict(book) for book in books]}
+    return limited
+
+def run_once(books_data, client, workers, hedged=False, deadline=covers.HEDGE_DEADLINE):
+    """One cold-covers run; returns the metrics dict"""
+    covers_dir = Path(tempfile.mkdtemp(prefix='bench_covers_'))
+    try:
+        data = json.loads(json.dumps(books_data))
+        open_library.clear()
+        started = time.perf_counter()
+        stats = covers.download_covers(data, covers_dir, workers=workers, quiet=True,
+                                       hedged=hedged, deadline=deadline)
+        wall = time.perf_counter() - started
+    finally:
+        shutil.rmtree(covers_dir, ignore_errors=True)
+
+    host_stats = client.stats()
+    requests_made = sum(h['requests'] for h in host_stats.values())
+    books = max(1, stats['total'])
+    return {
+        'wall_seconds': round(wall, 3),
+        'books': stats['total'],
+        'books_per_second': round(stats['total'] / wall, 2) if wall else None,
+        'requests': requests_made,
+        'requests_per_book': round(requests_made / books, 2),
+        'retries': sum(h['retries'] for h in host_stats.values()),
+        'bytes': sum(h['bytes'] for h in host_stats.values()),
+        'cache_hits': client.cache.hits if client.cache else 0,
+        'stats': stats,
+        'hosts': host_stats,
+    }
+
+def print_metrics(run_index, metrics):
+    stats = metrics['stats']
+    print(f"Run {run_index}")
+    print(f"   Wall time:          {metrics['wall_seconds']:.2f}s")
+    print(f"   Books/sec:          {metrics['books_per_second']}")
+    print(f"   Requests/book:      {metrics['requests_per_book']}  "
+          f"({metrics['requests']} requests, {metrics['retries']} retries, {metrics['cache_hits']} cache hits)")
+    print(f"   Bytes transferred:  {metrics['bytes'] / 1024 / 1024:.1f} MB")
+    print(f"   ✅ Open Library:     {stats['openlibrary_success']}")
+    print(f"   ✅ Google Books:     {stats['google_success']}")
+    print(f"   ✅ Internet Archive: {stats['internet_archive_success']}")
+    print(f"   ❌ No cover found:   {stats['failed']}")
+
+def record(args, books_data):
+    """Run the downloader against the live APIs and save what came back"""
+    client = RecordingClient(timeout=args.timeout)
+    http_client._client = client
+    covers_dir = Path(tempfile.mkdtemp(prefix='bench_record_'))
+    try:
+        print(f"🎙️  Recording live responses for {sum(len(y['books']) for y in books_data.values())} books...")
+        covers.download_covers(books_data, covers_dir, workers=args.workers, quiet=True)
+    finally:
+        shutil.rmtree(covers_dir, ignore_errors=True)
+    fixture = {'version': FIXTURE_VERSION, 'responses': client.recorded, 'bibkeys': client.bibkeys}
+    args.record.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.record, 'w', encoding='utf-8') as f:
+        json.dump(fixture, f, indent=1, ensure_ascii=False)
+    print(f"📄 Saved {len(client.recorded)} responses to {args.record}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the cover pipeline against replayed provider responses")
+    parser.add_argument('--books', type=Path, default=BOOKS_FILE)
+    parser.add_argument('--limit', type=int, help="Only use the first N books")
+    parser.add_argument('--fixture', type=Path, help="Recorded fixture (default: synthesize one)")
+    parser.add_argument('--record', type=Path, help="Record live responses to this fixture file instead of benchmarking")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for synthesized fixtures and error injection")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=1, help="Repeat the run (the response cache persists across runs)")
+    parser.add_argument('--latency-scale', type=float, default=1.0, help="Multiply recorded latencies")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--hedged', action='store_true', help="Benchmark the hedged multi-provider search")
+    parser.add_argument('--deadline', type=float, default=covers.HEDGE_DEADLINE,
+                        help="Per-book deadline for --hedged")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Order providers by hit rate and latency learned during the benchmark (default: fixed order)")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--cache', action='store_true', help="Use a (temporary) response cache")
+    parser.add_argument('--throttle', action='store_true', help="Keep the per-provider rate limits")
+    parser.add_argument('--json', action='store_true', help="Print metrics as JSON")
+    parser.add_argument('--min-books-per-sec', type=float, help="Exit non-zero below this throughput")
+    parser.add_argument('--max-requests-per-book', type=float, help="Exit non-zero above this request count")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    with open(args.books, 'r', encoding='utf-8') as f:
+        books_data = json.load(f)
+    if args.limit:
+        books_data = limit_books(books_data, args.limit)
+
+    if args.record:
+        record(args, books_data)
+        return
+
+    fixture = load_fixture(args.fixture) if args.fixture else synthesize_fixture(books_data, args.seed)
+    rate_limiter.configure(enabled=args.throttle)
+    # Learned provider stats start empty and stay out of .cache, so runs are reproducible
+    provider_stats.configure(adaptive=args.adaptive)
+    provider_stats.clear()
+
+    cache_dir = Path(tempfile.mkdtemp(prefix='bench_cache_')) if args.cache else None
+    results = []
+    try:
+        with ReplayServer(fixture, args.latency_scale, args.error_rate, args.seed) as server:
+            cache = ResponseCache(cache_dir / 'responses.sqlite3') if cache_dir else None
+            for run_index in range(1, args.runs + 1):
+                client = http_client.configure(timeout=args.timeout, max_retries=args.retries,
+                                               backoff=0.05, cache=cache, url_rewriter=server.rewrite,
+                                               pool_size=max(16, args.workers))
+                if cache is not None:
+                    cache.hits = cache.misses = 0
+                metrics = run_once(books_data, client, args.workers, args.hedged, args.deadline)
+                metrics['injected_errors'] = server.injected_errors
+                metrics['unknown_urls'] = server.unknown_urls
+                results.append(metrics)
+                if not args.json:
+                    print_metrics(run_index, metrics)
+    finally:
+        rate_limiter.configure(enabled=True)
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    elif args.adaptive:
+        provider_stats.print_summary()
+
+    last = results[-1]
+    failures = []
+    if args.min_books_per_sec is not None and last['books_per_second'] < args.min_books_per_sec:
+        failures.append(f"books/sec {last['books_per_second']} < {args.min_books_per_sec}")
+    if args.max_requests_per_book is not None and last['requests_per_book'] > args.max_requests_per_book:
+        failures.append(f"requests/book {last['requests_per_book']} > {args.max_requests_per_book}")
+    if failures:
+        print("❌ Regression: " + '; '.join(failures), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Compile per-year analytics and timeline lanes from books.json
+Parses every datesRead string once (including multi-range strings that span
+years), computes the per-year totals shown on the Analytics view and packs
+timeline bars into lanes. build_book_shards.py embeds each year's entry in
+that year's shard, and YearAnalytics reads it instead of re-deriving it on
+every render. Run directly, this prints the per-year results (and writes the
+whole index with --output).
+
+These are the canonical parsing and lane-packing rules; the fallback in
+YearAnalytics.jsx only runs for years whose shard has no analytics.
+"""
+
+import argparse
+import json
+import math
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from jsonio import write_json_atomic
+
+BOOKS_FILE = Path('../src/data/books.json')
+
+BAR_HEIGHT = 28    # Fixed timeline bar height (px)
+LANE_SPACING = 3   # Spacing between lanes (px)
+LONG_READ_WEEKS = 4
+# Book fields the analytics are computed from; any change to them changes the fingerprint
+FINGERPRINT_FIELDS = ('id', 'datesRead', 'startDate', 'finishDate', 'pageCount', 'fictionType')
+MONTH_POSITIONS = [round(i / 12 * 100, 4) for i in range(12)]
+
+def parse_date(text):
+    """'2025/07/29' or '2025-07-29' -> datetime, or None"""
+    try:
+        return datetime.strptime(text.strip().replace('/', '-')[:10], '%Y-%m-%d')
+    except (ValueError, AttributeError):
+        return None
+
+def parse_single_range(range_str):
+    """
+    '2025/07/29-2025/08/07' or a single '2025/03/16' -> (start, finish, start_str, finish_str)
+    Incomplete dates (year or year/month only) return None
+    """
+    if not range_str or not isinstance(range_str, str):
+        return None
+    if len(re.split(r'[-/]', range_str)) < 3:
+        return None
+    if '-' in range_str:
+        start_str, finish_str = [part.strip() for part in range_str.split('-')[:2]]
+        if not start_str or not finish_str:
+            return None
+    else:
+        start_str = finish_str = range_str.strip()
+    start, finish = parse_date(start_str), parse_date(finish_str)
+    if start is None or finish is None:
+        return None
+    return start, finish, start_str, finish_str
+
+def year_bounds(year):
+    start = datetime(int(year), 1, 1)
+    end = datetime(int(year), 12, 31, 23, 59, 59, 999000)
+    return start, end
+
+def overlaps_year(parsed, year):
+    year_start, year_end = year_bounds(year)
+    return parsed[0] <= year_end and parsed[1] >= year_start
+
+def parse_dates_read(dates_read, year):
+    """
+    Pick the range of a datesRead string that belongs to a year
+    Prefers a range starting in the year, then any range overlapping it
+    """
+    if not dates_read or not isinstance(dates_read, str):
+        return None
+    ranges = [part.strip() for part in dates_read.split(',')]
+    if len(ranges) > 1:
+        for range_str in ranges:
+            if range_str.startswith(f"{year}/"):
+                return parse_single_range(range_str)
+    for range_str in ranges:
+        parsed = parse_single_range(range_str)
+        if parsed and overlaps_year(parsed, year):
+            return parsed
+    return None
+
+def reading_range(book, year):
+    """The book's reading range within a year, from datesRead or startDate/finishDate"""
+    if book.get('datesRead'):
+        return parse_dates_read(book['datesRead'], year)
+    if book.get('startDate') and book.get('finishDate'):
+        start, finish = parse_date(book['startDate']), parse_date(book['finishDate'])
+        if start and finish and overlaps_year((start, finish), year):
+            return start, finish, book['startDate'], book['finishDate']
+    return None
+
+def timeline_bar(book, year):
+    """Position of one book on a year's timeline, or None if it has no usable dates"""
+    parsed = reading_range(book, year)
+    if parsed is None:
+        return None
+    start, finish, start_str, finish_str = parsed
+    year_start, year_end = year_bounds(year)
+    duration = (year_end - year_start).total_seconds()
+    start_offset = max(0.0, (start - year_start).total_seconds())
+    finish_offset = min(duration, (finish - year_start).total_seconds())
+    days = max(1, math.ceil((finish - start) / timedelta(days=1)))
+    return {
+        'id': book.get('id'),
+        'start': start,
+        'startStr': start_str,
+        'finishStr': finish_str,
+        'leftPercent': max(0.0, start_offset / duration * 100),
+        'widthPercent': max(1.0, (finish_offset - start_offset) / duration * 100),
+        'days': days,
+        'isLongRead': days / 7 >= LONG_READ_WEEKS,
+    }
+
+def assign_lanes(bars):
+    """
+    Greedy lane packing: longest bars first, each into the lowest lane where
+    it overlaps nothing. Sets bar['lane'] and returns the lane count.
+    """
+    lanes = []
+    for bar in sorted(bars, key=lambda b: -b['widthPercent']):
+        start, end = bar['leftPercent'], bar['leftPercent'] + bar['widthPercent']
+        for index, lane in enumerate(lanes):
+            if all(end <= other_start or start >= other_end for other_start, other_end in lane):
+                break
+        else:
+            index = len(lanes)
+            lanes.append([])
+        lanes[index].append((start, end))
+        bar['lane'] = index
+    return len(lanes)
+
+def classify(fiction_type):
+    normalized = (fiction_type or '').lower().strip()
+    if normalized == 'fiction':
+        return 'fiction'
+    if normalized in ('non-fiction', 'nonfiction'):
+        return 'nonFiction'
+    if normalized == 'poetry':
+        return 'poetry'
+    return None
+
+def fingerprint_value(value):
+    """A field as JavaScript's String() would print it, '' for missing or empty"""
+    if value is None or value == '':
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def fingerprint(books):
+    """
+    32-bit FNV-1a hash of the fields the analytics read, as 8 hex digits
+    Hashes UTF-16 code units so analyticsFingerprint() in YearAnalytics.jsx
+    gets the same value from the shard books and can spot stale analytics
+    """
+    text = '\x1e'.join('\x1f'.join(fingerprint_value(book.get(field)) for field in FINGERPRINT_FIELDS)
+                       for book in books)
+    value = 0x811c9dc5
+    for unit in memoryview(text.encode('utf-16-le')).cast('H'):
+        value = ((value ^ unit) * 0x01000193) & 0xffffffff
+    return f"{value:08x}"
+
+def year_analytics(year, books):
+    """Aggregates and timeline for one year's books"""
+    counts = {'fiction': 0, 'nonFiction': 0, 'poetry': 0}
+    total_pages = 0
+    for book in books:
+        page_count = book.get('pageCount')
+        if isinstance(page_count, (int, float)) and not isinstance(page_count, bool):
+            total_pages += page_count
+        category = classify(book.get('fictionType'))
+        if category:
+            counts[category] += 1
+
+    bars = [bar for bar in (timeline_bar(book, year) for book in books) if bar]
+    bars.sort(key=lambda bar: bar['start'])
+    total_lanes = assign_lanes(bars)
+    for bar in bars:
+        del bar['start']
+        bar['leftPercent'] = round(bar['leftPercent'], 4)
+        bar['widthPercent'] = round(bar['widthPercent'], 4)
+
+    return {
+        'fingerprint': fingerprint(books),
+        'totalBooks': len(books),
+        'totalPages': total_pages,
+        'fictionCount': counts['fiction'],
+        'nonFictionCount': counts['nonFiction'],
+        'poetryCount': counts['poetry'],
+        'timeline': {
+            'totalLanes': total_lanes,
+            'barHeight': BAR_HEIGHT,
+            'laneSpacing': LANE_SPACING,
+            'bars': bars,
+        },
+    }
+
+def build_index(books_data):
+    index = {'monthPositions': MONTH_POSITIONS, 'years': {}}
+    for year, year_data in books_data.items():
+        books = year_data.get('books', []) if isinstance(year_data, dict) else year_data
+        index['years'][year] = year_analytics(year, books)
+    return index
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compile per-year analytics from books.json")
+    parser.add_argument('--books', type=Path, default=BOOKS_FILE)
+    parser.add_argument('--output', type=Path, help="Also write the full index as JSON")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    with open(args.books, 'r', encoding='utf-8') as f:
+        books_data = json.load(f)
+
+    index = build_index(books_data)
+    if args.output:
+        write_json_atomic(args.output, index, indent=None)
+
+    print("📊 Year analytics")
+    for year, entry in index['years'].items():
+        timeline = entry['timeline']
+        print(f"   {year}: {entry['totalBooks']} books, {entry['totalPages']:,} pages, "
+              f"{len(timeline['bars'])} bars in {timeline['totalLanes']} lanes")
+    if args.output:
+        print(f"\n📄 Index: {args.output.absolute()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Split books.json into per-year shards for lazy loading
+Writes one compact, content-hashed JSON shard per year to public/data/books
+(null and empty fields dropped, no whitespace) with pre-built gzip and
+Brotli siblings, plus a small src/data/books_index.json holding the year
+list, book counts, shard URLs and the favourites shelf (card fields only).
+The front end bundles only the index and fetches a year's shard when it is
+shown.
+
+Build outputs are attached to the shards here, so the browser only loads
+them with the year they belong to: each book's coverVariants (from
+build_cover_derivatives.py) and coverColors (from build_cover_colors.py), and
+the year's precomputed analytics (build_analytics.py).
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from build_analytics import year_analytics
+from catalogue import BOOKS_FILE, Catalogue
+from jsonio import write_json_atomic
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip-only without it
+    brotli = None
+
+SHARDS_DIR = Path('../public/data/books')
+SHARDS_URL = '/data/books'
+INDEX_FILE = Path('../src/data/books_index.json')
+DERIVATIVES_FILE = Path('../src/data/cover_derivatives.json')
+COLORS_FILE = Path('../src/data/cover_colors.json')
+
+# Always kept, even when empty, so every shard book has the fields cards rely on
+REQUIRED_FIELDS = ('id', 'title', 'author', 'coverImage')
+
+# All a favourite's card shows; reviews and inline placeholders stay in the shards
+FAVORITE_FIELDS = ('id', 'title', 'author', 'coverImage')
+
+def is_favorite(book):
+    return book.get('favorite') is True or 'favorites' in (book.get('tags') or [])
+
+def load_sidecar(path):
+    """A per-cover build output ({'/covers/x.jpg': entry}), or {} if it hasn't been built"""
+    if not path or not Path(path).exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def cover_variants(entry):
+    """{format: [{src, width}]} from a derivatives manifest entry, best format first"""
+    return {fmt: entry[fmt] for fmt in ('avif', 'webp') if entry and entry.get(fmt)}
+
+def compact_book(book, derivatives=None, colors=None):
+    """Book without null/empty optional fields, plus its cover's build outputs"""
+    compact = {key: value for key, value in book.items()
+               if key in REQUIRED_FIELDS or value not in (None, '', [], {})}
+    cover = book.get('coverImage')
+    variants = cover_variants((derivatives or {}).get(cover))
+    if variants:
+        compact['coverVariants'] = variants
+    color = (colors or {}).get(cover)
+    if color and color.get('dominant'):
+        compact['coverColors'] = {'dominant': color['dominant'], 'complementary': color['complementary']}
+    return compact
+
+def favorite_card(book, year, derivatives=None):
+    """The favourites-shelf entry for a book: card fields, cover variants and year read"""
+    card = {key: book.get(key) or '' for key in FAVORITE_FIELDS}
+    variants = cover_variants((derivatives or {}).get(book.get('coverImage')))
+    if variants:
+        card['coverVariants'] = variants
+    card['favorite'] = True
+    card['yearRead'] = year
+    return card
+
+def compact_year(year, year_data, derivatives=None, colors=None):
+    books = year_data.get('books', [])
+    shard = {'books': [compact_book(book, derivatives, colors) for book in books]}
+    if year_data.get('filters'):
+        shard['filters'] = year_data['filters']
+    shard['analytics'] = year_analytics(year, books)
+    return shard
+
+def encode(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def write_bytes(path, data):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+def build_shards(catalogue, derivatives=None, colors=None):
+    """(books index, {shard filename: encoded shard}) for the whole catalogue"""
+    index = {'years': [], 'favorites': []}
+    shards = {}
+    for year, year_data in catalogue.data.items():
+        shard = compact_year(year, year_data, derivatives, colors)
+        body = encode(shard)
+        name = f"{year}.{hashlib.sha256(body).hexdigest()[:10]}.json"
+        shards[name] = body
+        index['years'].append({'year': year, 'count': len(shard['books']),
+                               'shard': f"{SHARDS_URL}/{name}"})
+        index['favorites'].extend(favorite_card(book, year, derivatives)
+                                  for book in year_data.get('books', []) if is_favorite(book))
+    return index, shards
+
+def stale_outputs(index, shards, index_path, out_dir):
+    """Committed outputs that don't match a fresh build; empty when everything is current"""
+    stale = []
+    current = load_sidecar(index_path) if Path(index_path).exists() else None
+    if current != index:
+        stale.append(str(index_path))
+    stale.extend(str(Path(out_dir) / name) for name in shards if not (Path(out_dir) / name).exists())
+    return stale
+
+def write_shard(out_dir, name, body):
+    """Write a shard plus its .gz/.br siblings; returns the sizes"""
+    path = out_dir / name
+    sizes = {'json': len(body)}
+    write_bytes(path, body)
+    gz = gzip.compress(body, compresslevel=9, mtime=0)
+    write_bytes(path.with_name(name + '.gz'), gz)
+    sizes['gz'] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(body, quality=11, mode=brotli.MODE_TEXT)
+        write_bytes(path.with_name(name + '.br'), br)
+        sizes['br'] = len(br)
+    return sizes
+
+def remove_stale(out_dir, keep):
+    """Delete shard files from previous builds"""
+    removed = 0
+    for item in os.scandir(out_dir):
+        base = item.name.removesuffix('.gz').removesuffix('.br')
+        if item.is_file() and base.endswith('.json') and base not in keep:
+            os.remove(item.path)
+            removed += 1
+    return removed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build per-year book shards and the books index")
+    parser.add_argument('--books', type=Path, default=BOOKS_FILE)
+    parser.add_argument('--out-dir', type=Path, default=SHARDS_DIR)
+    parser.add_argument('--index', type=Path, default=INDEX_FILE)
+    parser.add_argument('--derivatives', type=Path, default=DERIVATIVES_FILE,
+                        help="Cover derivatives manifest from build_cover_derivatives.py")
+    parser.add_argument('--colors', type=Path, default=COLORS_FILE,
+                        help="Cover colours from build_cover_colors.py")
+    parser.add_argument('--check', action='store_true',
+                        help="Write nothing; exit 1 if the index or shards are out of date with books.json")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    catalogue = Catalogue.load(args.books)
+    index, shards = build_shards(catalogue, load_sidecar(args.derivatives), load_sidecar(args.colors))
+
+    if args.check:
+        stale = stale_outputs(index, shards, args.index, args.out_dir)
+        if stale:
+            print(f"❌ Shards are out of date with {args.books}; run build_book_shards.py")
+            for path in stale:
+                print(f"   • {path}")
+            sys.exit(1)
+        print(f"✓  Shards and index match {args.books}")
+        return
+
+    if brotli is None:
+        print("⚠️  brotli is not installed; writing gzip siblings only")
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    totals = {'json': 0, 'gz': 0, 'br': 0}
+    print(f"📦 Sharding {args.books} ({len(catalogue)} books)...\n")
+    for entry in index['years']:
+        name = entry['shard'].rsplit('/', 1)[-1]
+        sizes = write_shard(args.out_dir, name, shards[name])
+        for key, size in sizes.items():
+            totals[key] += size
+        print(f"   {entry['year']}: {entry['count']} books -> {name}  "
+              + '  '.join(f"{key} {size / 1024:.1f} KB" for key, size in sizes.items()))
+
+    write_json_atomic(args.index, index, indent=None)
+    removed = remove_stale(args.out_dir, set(shards))
+
+    source_bytes = args.books.stat().st_size
+    index_bytes = args.index.stat().st_size
+    print("\n" + "=" * 70)
+    print("📊 SHARD SUMMARY")
+    print("=" * 70)
+    print(f"books.json:         {source_bytes / 1024:.1f} KB")
+    print(f"Index (bundled):    {index_bytes / 1024:.1f} KB ({len(index['favorites'])} favourites)")
+    print(f"Shards:             {totals['json'] / 1024:.1f} KB raw, {totals['gz'] / 1024:.1f} KB gzip"
+          + (f", {totals['br'] / 1024:.1f} KB brotli" if brotli is not None else ""))
+    print(f"🧹 Stale files removed: {removed}")
+    print(f"\n📄 Index: {args.index.absolute()}")
+    print(f"📁 Shards: {args.out_dir.absolute()}")
+
+if __name__ == '__main__':
+    main()
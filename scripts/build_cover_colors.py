@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Precompute dominant and complementary colours for every cover
+Mirrors the in-browser sampling in YearAnalytics.jsx (50x50 thumbnail, every
+10th pixel, 32-level quantization, most common bucket wins) with vectorized
+NumPy histogramming, so the timeline can read colours instead of decoding
+images. Results are cached by cover hash in src/data/cover_colors.json, and
+build_book_shards.py copies them onto the shard books as coverColors.
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from jsonio import write_json_atomic
+from manifest import file_sha256
+
+COVERS_DIR = Path('../public/covers')
+COLORS_FILE = Path('../src/data/cover_colors.json')
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+SAMPLE_SIZE = 50     # Thumbnail edge, as drawn onto the browser canvas
+SAMPLE_STEP = 10     # Sample every nth pixel
+QUANTUM = 32         # Quantization step per channel
+
+def complementary_color(rgb):
+    """255 - each component, as calculateComplementaryColor does"""
+    return tuple(max(0, min(255, 255 - c)) for c in rgb)
+
+def format_rgb(rgb):
+    return f"rgb({rgb[0]}, {rgb[1]}, {rgb[2]})"
+
+def dominant_color(img):
+    """
+    Most common quantized colour of an image, or None if every sample is transparent
+    Ties go to the colour seen first, matching the JS object iteration order
+    """
+    thumb = img.convert('RGBA').resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BILINEAR)
+    pixels = np.asarray(thumb).reshape(-1, 4)[::SAMPLE_STEP]
+    pixels = pixels[pixels[:, 3] >= 128]
+    if len(pixels) == 0:
+        return None
+    levels = pixels[:, :3] // QUANTUM
+    keys = (levels[:, 0].astype(np.int32) << 6) | (levels[:, 1].astype(np.int32) << 3) | levels[:, 2]
+    unique, first_index, counts = np.unique(keys, return_index=True, return_counts=True)
+    winners = np.flatnonzero(counts == counts.max())
+    key = int(unique[winners[np.argmin(first_index[winners])]])
+    return ((key >> 6) * QUANTUM, ((key >> 3) & 7) * QUANTUM, (key & 7) * QUANTUM)
+
+def colors_for_file(path, source_hash):
+    """Worker: the sidecar entry for one cover"""
+    with Image.open(path) as img:
+        dominant = dominant_color(img)
+    if dominant is None:
+        return {'hash': source_hash, 'dominant': None, 'complementary': None}
+    return {
+        'hash': source_hash,
+        'dominant': format_rgb(dominant),
+        'complementary': format_rgb(complementary_color(dominant)),
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute cover dominant/complementary colours")
+    parser.add_argument('--covers-dir', type=Path, default=COVERS_DIR)
+    parser.add_argument('--output', type=Path, default=COLORS_FILE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true',
+                        help="Recompute every cover even if its hash is unchanged")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    cached = {}
+    if args.output.exists():
+        with open(args.output, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+
+    sources = sorted(Path(item.path) for item in os.scandir(args.covers_dir)
+                     if item.is_file() and Path(item.name).suffix.lower() in SOURCE_EXTENSIONS)
+
+    print(f"🎨 Computing cover colours for {len(sources)} covers...\n")
+
+    stats = {'computed': 0, 'unchanged': 0, 'failed': 0}
+    colors = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        jobs = {}
+        for source in sources:
+            key = f"/covers/{source.name}"
+            source_hash = file_sha256(source)
+            if not args.force and cached.get(key, {}).get('hash') == source_hash:
+                colors[key] = cached[key]
+                stats['unchanged'] += 1
+                continue
+            jobs[key] = executor.submit(colors_for_file, source, source_hash)
+
+        for key, job in jobs.items():
+            try:
+                colors[key] = job.result()
+                stats['computed'] += 1
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"   ❌ {key}: {e}")
+
+    write_json_atomic(args.output, dict(sorted(colors.items())))
+
+    print("=" * 70)
+    print("📊 COLOUR SUMMARY")
+    print("=" * 70)
+    print(f"✅ Computed:    {stats['computed']}")
+    print(f"✓  Unchanged:   {stats['unchanged']}")
+    print(f"❌ Failed:      {stats['failed']}")
+    print(f"\n📄 Colours: {args.output.absolute()}")
+
+if __name__ == '__main__':
+    main()
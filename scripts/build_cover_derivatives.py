@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Build responsive cover derivatives for the books grid
+Resizes every cover in public/covers to a few fixed widths as WebP (and
+optionally AVIF), in parallel across CPU cores, and writes a manifest of the
+variants. build_book_shards.py copies each cover's variants onto its books
+(coverVariants), which the cards use for srcset, so the manifest itself is
+never bundled. Covers whose source hash is unchanged are skipped.
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, features
+
+from jsonio import write_json_atomic
+from manifest import file_sha256
+
+COVERS_DIR = Path('../public/covers')
+DERIVED_DIR = COVERS_DIR / 'derived'
+MANIFEST_FILE = Path('../src/data/cover_derivatives.json')
+
+WIDTHS = (160, 320, 480)
+QUALITY = {'webp': 78, 'avif': 55}
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+def derivative_name(source_name, width, fmt):
+    return f"{Path(source_name).stem}-{width}.{fmt}"
+
+def build_one(source_path, derived_dir, widths, formats, source_hash):
+    """
+    Worker: write every width/format derivative for one cover
+    Returns the manifest entry for it
+    """
+    entry = {'hash': source_hash}
+    with Image.open(source_path) as img:
+        img = img.convert('RGB')
+        entry['width'], entry['height'] = img.size
+        for fmt in formats:
+            variants = []
+            for width in widths:
+                # Never upscale; the largest useful variant is the original width
+                target_width = min(width, img.width)
+                if variants and variants[-1]['width'] == target_width:
+                    continue
+                target_height = round(img.height * target_width / img.width)
+                resized = img.resize((target_width, target_height), Image.LANCZOS)
+                name = derivative_name(source_path.name, target_width, fmt)
+                tmp_path = derived_dir / f".{name}.tmp"
+                resized.save(tmp_path, format=fmt.upper(), quality=QUALITY[fmt])
+                os.replace(tmp_path, derived_dir / name)
+                variants.append({'src': f"/covers/derived/{name}", 'width': target_width})
+            entry[fmt] = variants
+    return entry
+
+def is_current(entry, source_hash, formats, derived_dir):
+    if not entry or entry.get('hash') != source_hash:
+        return False
+    for fmt in formats:
+        variants = entry.get(fmt)
+        if not variants:
+            return False
+        for variant in variants:
+            if not (derived_dir / Path(variant['src']).name).exists():
+                return False
+    return True
+
+def remove_stale(derived_dir, manifest):
+    """Delete derivative files no manifest entry points at"""
+    referenced = {Path(variant['src']).name
+                  for entry in manifest.values()
+                  for key, variants in entry.items() if isinstance(variants, list)
+                  for variant in variants}
+    removed = 0
+    for item in os.scandir(derived_dir):
+        if item.is_file() and item.name not in referenced:
+            os.remove(item.path)
+            removed += 1
+    return removed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build resized WebP/AVIF cover derivatives")
+    parser.add_argument('--covers-dir', type=Path, default=COVERS_DIR)
+    parser.add_argument('--out-dir', type=Path, default=DERIVED_DIR)
+    parser.add_argument('--manifest', type=Path, default=MANIFEST_FILE)
+    parser.add_argument('--widths', default=','.join(str(w) for w in WIDTHS),
+                        help=f"Comma-separated target widths (default: {','.join(str(w) for w in WIDTHS)})")
+    parser.add_argument('--avif', action='store_true',
+                        help="Also emit AVIF (needs Pillow built with AVIF support)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true',
+                        help="Rebuild every derivative even if the source is unchanged")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    widths = sorted({int(w) for w in args.widths.split(',') if w.strip()})
+    formats = ['webp']
+    if args.avif:
+        if features.check('avif'):
+            formats.insert(0, 'avif')
+        else:
+            print("⚠️  Pillow has no AVIF support here; building WebP only")
+
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    if args.manifest.exists():
+        with open(args.manifest, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    sources = sorted(Path(item.path) for item in os.scandir(args.covers_dir)
+                     if item.is_file() and Path(item.name).suffix.lower() in SOURCE_EXTENSIONS)
+
+    print(f"🖼️  Building {', '.join(formats)} derivatives at {widths} for {len(sources)} covers...\n")
+
+    stats = {'built': 0, 'unchanged': 0, 'failed': 0}
+    new_manifest = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        jobs = {}
+        for source in sources:
+            key = f"/covers/{source.name}"
+            source_hash = file_sha256(source)
+            if not args.force and is_current(manifest.get(key), source_hash, formats, args.out_dir):
+                new_manifest[key] = manifest[key]
+                stats['unchanged'] += 1
+                continue
+            jobs[key] = executor.submit(build_one, source, args.out_dir, widths, formats, source_hash)
+
+        for key, job in jobs.items():
+            try:
+                new_manifest[key] = job.result()
+                stats['built'] += 1
+                print(f"   ✅ {key}")
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"   ❌ {key}: {e}")
+
+    new_manifest = dict(sorted(new_manifest.items()))
+    write_json_atomic(args.manifest, new_manifest)
+    removed = remove_stale(args.out_dir, new_manifest)
+
+    source_bytes = sum(source.stat().st_size for source in sources)
+    derived_bytes = sum(item.stat().st_size for item in os.scandir(args.out_dir) if item.is_file())
+
+    print("\n" + "=" * 70)
+    print("📊 DERIVATIVES SUMMARY")
+    print("=" * 70)
+    print(f"✅ Built:                {stats['built']}")
+    print(f"✓  Unchanged:            {stats['unchanged']}")
+    print(f"❌ Failed:               {stats['failed']}")
+    print(f"🧹 Stale files removed:  {removed}")
+    print(f"\nSource covers:  {source_bytes / 1024 / 1024:.1f} MB")
+    print(f"Derivatives:    {derived_bytes / 1024 / 1024:.1f} MB")
+    print(f"\n📄 Manifest: {args.manifest.absolute()}")
+
+if __name__ == '__main__':
+    main()
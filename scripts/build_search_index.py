@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Build the inverted search index for the reading history
+Tokenizes title, author, genres, tags and fictionType with the same
+accent- and case-folding as catalogue.normalize_text, and writes
+src/data/search_index.json: a sorted term list (so prefixes are a binary
+search away), delta-encoded posting lists and a compact document table with
+enough to show a result without loading its year. The front end imports it
+lazily on first search. The index is only rebuilt when the indexed fields
+change.
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from catalogue import BOOKS_FILE, Catalogue, normalize_text
+from jsonio import write_json_atomic
+
+INDEX_FILE = Path('../src/data/search_index.json')
+INDEX_VERSION = 2
+
+INDEXED_FIELDS = ('title', 'author', 'genres', 'tags', 'fictionType')
+
+def field_text(book, field):
+    value = book.get(field)
+    if isinstance(value, list):
+        return ' '.join(str(item) for item in value)
+    return str(value or '')
+
+def tokenize(text):
+    return normalize_text(text).split()
+
+def fingerprint(catalogue):
+    """Hash of everything the index depends on"""
+    digest = hashlib.sha256(f"v{INDEX_VERSION}".encode('utf-8'))
+    for year, position, book in catalogue:
+        record = [year, book.get('id')] + [book.get(field) for field in INDEXED_FIELDS]
+        digest.update(json.dumps(record, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def delta_encode(doc_ids):
+    previous = 0
+    encoded = []
+    for doc_id in doc_ids:
+        encoded.append(doc_id - previous)
+        previous = doc_id
+    return encoded
+
+def build_index(catalogue):
+    docs = []
+    postings = defaultdict(set)
+    for year, position, book in catalogue:
+        doc_id = len(docs)
+        docs.append([book.get('id'), year, book.get('title', ''), book.get('author', '')])
+        for field in INDEXED_FIELDS:
+            for token in tokenize(field_text(book, field)):
+                postings[token].add(doc_id)
+    terms = sorted(postings)
+    return {
+        'version': INDEX_VERSION,
+        'fingerprint': fingerprint(catalogue),
+        'docs': docs,
+        'terms': terms,
+        'postings': [delta_encode(sorted(postings[term])) for term in terms],
+    }
+
+def search(index, query):
+    """Reference query: every token matches as a prefix; returns doc rows"""
+    terms = index['terms']
+    result = None
+    for token in tokenize(query):
+        matches = set()
+        start = bisect.bisect_left(terms, token)
+        for i in range(start, len(terms)):
+            if not terms[i].startswith(token):
+                break
+            doc_id = 0
+            for delta in index['postings'][i]:
+                doc_id += delta
+                matches.add(doc_id)
+        result = matches if result is None else result & matches
+        if not result:
+            return []
+    return [index['docs'][doc_id] for doc_id in sorted(result or ())]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the search index for books.json")
+    parser.add_argument('--books', type=Path, default=BOOKS_FILE)
+    parser.add_argument('--output', type=Path, default=INDEX_FILE)
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the catalogue is unchanged")
+    parser.add_argument('--query', help="Run a query against the index and print the matches")
+    parser.add_argument('--check', action='store_true',
+                        help="Write nothing; exit 1 if the index is out of date with books.json")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    catalogue = Catalogue.load(args.books)
+
+    current = None
+    if args.output.exists():
+        with open(args.output, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+
+    if args.check:
+        if not current or current.get('fingerprint') != fingerprint(catalogue):
+            print(f"❌ {args.output} is out of date with {args.books}; run build_search_index.py")
+            sys.exit(1)
+        print(f"✓  Search index matches {args.books}")
+        return
+
+    if not args.force and current and current.get('fingerprint') == fingerprint(catalogue):
+        index = current
+        print(f"✓  Search index unchanged ({len(index['terms'])} terms, {len(index['docs'])} books)")
+    else:
+        index = build_index(catalogue)
+        write_json_atomic(args.output, index, indent=None)
+        postings = sum(len(p) for p in index['postings'])
+        print(f"🔎 Search index: {len(index['terms'])} terms, {postings} postings, {len(index['docs'])} books "
+              f"({args.output.stat().st_size / 1024:.1f} KB)")
+        print(f"📄 Index: {args.output.absolute()}")
+
+    if args.query:
+        matches = search(index, args.query)
+        print(f"\n{len(matches)} match(es) for '{args.query}':")
+        for book_id, year, title, author in matches[:20]:
+            print(f"   • {title} by {author} ({year})")
+
+if __name__ == '__main__':
+    main()
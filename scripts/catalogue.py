@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Indexed view of books.json shared by the data scripts
+Loads the year-keyed catalogue once and indexes it by id, canonical ISBN,
+normalized title/author and cover filename, and takes a single os.scandir
+snapshot of public/covers so existence checks are dictionary lookups rather
+than one stat() per book. Readings that share a canonical ISBN or a
+normalized title/author are grouped into one work, so rereads (and other
+editions of a reread) can share lookups and a cover file. Books are the dicts
+from books.json itself, so edits made through the indexes are saved by save().
+"""
+
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+from jsonio import write_json_atomic
+
+BOOKS_FILE = Path('../src/data/books.json')
+COVERS_DIR = Path('../public/covers')
+
+def sanitize_filename(text):
+    """Create a safe filename from text"""
+    # Remove or replace problematic characters
+    safe = "".join(c for c in text if c.isalnum() or c in (' ', '-', '_'))
+    return safe.strip()[:50]  # Limit length
+
+def cover_filename(book):
+    """Return the cover filename for a book (ISBN, else title_author)"""
+    isbn = book.get('isbn', '')
+    if isbn:
+        return f"{isbn}.jpg"
+    # Use title-author as filename if no ISBN
+    safe_title = sanitize_filename(book['title'])
+    safe_author = sanitize_filename(book['author'].split(',')[0])  # First author only
+    return f"{safe_title}_{safe_author}.jpg"
+
+def cover_name(cover_image):
+    """'/covers/x.jpg' -> 'x.jpg'"""
+    return (cover_image or '').replace('/covers/', '', 1)
+
+def canonical_isbn(isbn):
+    """
+    Digits-only ISBN-13 for an ISBN-10 or ISBN-13 in any formatting
+    Other values are returned stripped of separators, or '' if empty
+    """
+    digits = re.sub(r'[^0-9Xx]', '', isbn or '').upper()
+    if len(digits) == 10:
+        core = '978' + digits[:9]
+        check = (10 - sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(core)) % 10) % 10
+        return core + str(check)
+    return digits
+
+def normalize_text(text):
+    """Case-, accent- and punctuation-insensitive form of a title or author"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.category(c).startswith('M')).casefold()
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text).split())
+
+def title_author_key(title, author):
+    """Lookup key from a title and the first listed author"""
+    return normalize_text(title), normalize_text((author or '').split(',')[0])
+
+def work_keys(book):
+    """Identity keys linking readings of one work: canonical ISBN and title/author"""
+    keys = []
+    isbn = canonical_isbn(book.get('isbn'))
+    if isbn:
+        keys.append(f"isbn:{isbn}")
+    title, author = title_author_key(book.get('title'), book.get('author'))
+    if title and author:
+        keys.append(f"title:{title}|{author}")
+    return keys
+
+class CoversSnapshot:
+    """
+    Filenames in a covers directory, read with one os.scandir
+    Scripts that write covers call add() so the snapshot stays current
+    """
+
+    def __init__(self, covers_dir=COVERS_DIR):
+        self.covers_dir = Path(covers_dir)
+        self._lock = threading.Lock()
+        self._files = {}
+        if self.covers_dir.is_dir():
+            for item in os.scandir(self.covers_dir):
+                if item.is_file():
+                    self._files[item.name] = item.stat().st_size
+
+    def __contains__(self, filename):
+        with self._lock:
+            return filename in self._files
+
+    def __len__(self):
+        return len(self._files)
+
+    def exists(self, filename):
+        return filename in self
+
+    def size(self, filename):
+        with self._lock:
+            return self._files.get(filename)
+
+    def names(self):
+        with self._lock:
+            return set(self._files)
+
+    def path(self, filename):
+        return self.covers_dir / filename
+
+    def add(self, filename):
+        """Record a file written after the snapshot was taken"""
+        path = self.path(filename)
+        size = path.stat().st_size if path.exists() else 0
+        with self._lock:
+            self._files[filename] = size
+
+    def discard(self, filename):
+        with self._lock:
+            self._files.pop(filename, None)
+
+class Catalogue:
+    """
+    books.json plus lookup indexes and a covers snapshot
+    Call reindex_book() after changing a book's id, ISBN, title or author
+    (or reindex() after wholesale edits)
+    """
+
+    def __init__(self, books_data, path=BOOKS_FILE, covers_dir=COVERS_DIR):
+        self.data = books_data
+        self.path = Path(path) if path else None
+        self.covers_dir = Path(covers_dir)
+        self._covers = None
+        self.reindex()
+
+    @classmethod
+    def load(cls, path=BOOKS_FILE, covers_dir=COVERS_DIR):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), path, covers_dir)
+
+    def reindex(self):
+        self._entries = []
+        self._position = {}
+        self._by_id = {}
+        self._by_isbn = defaultdict(list)
+        self._by_title_author = defaultdict(list)
+        self._by_filename = defaultdict(list)
+        for year, year_data in self.data.items():
+            for i, book in enumerate(year_data.get('books', [])):
+                self._index(year, i + 1, book)
+        self._group_works()
+
+    def _index(self, year, position, book, at=None):
+        """List a book; at is its index in catalogue order (default: last)"""
+        at = len(self._entries) if at is None else at
+        self._entries.insert(at, (year, position, book))
+        for i in range(at, len(self._entries)):
+            self._position[id(self._entries[i][2])] = i
+        if book.get('id'):
+            self._by_id[book['id']] = book
+        for index, key in self._lookup_keys(book):
+            if key is not None:
+                index[key].append(book)
+                if at < len(self._entries) - 1:
+                    # Listed mid-catalogue: keep lookups in catalogue order
+                    index[key].sort(key=lambda other: self._position[id(other)])
+
+    def _lookup_keys(self, book):
+        """(index, key) pairs a book is listed under; key is None when it has none"""
+        has_file = book.get('title') and book.get('author') is not None
+        return [(self._by_isbn, canonical_isbn(book.get('isbn')) or None),
+                (self._by_title_author, title_author_key(book.get('title'), book.get('author'))),
+                (self._by_filename, cover_filename(book) if has_file else None)]
+
+    def reindex_book(self, book, old):
+        """
+        Re-list one book after an identity edit, without rebuilding every index
+        old holds the 'id', 'isbn', 'title' and 'author' it was indexed under
+        Work groups are regrouped once, the next time they are needed
+        """
+        if old.get('id') != book.get('id'):
+            if self._by_id.get(old.get('id')) is book:
+                del self._by_id[old['id']]
+            if book.get('id'):
+                self._by_id[book['id']] = book
+        for (index, old_key), (_, key) in zip(self._lookup_keys(old), self._lookup_keys(book)):
+            if old_key == key:
+                continue
+            if old_key is not None and old_key in index:
+                index[old_key] = [other for other in index[old_key] if other is not book]
+                if not index[old_key]:
+                    del index[old_key]
+            if key is not None:
+                # Keep catalogue order so lookups still prefer the earliest reading
+                index[key].append(book)
+                index[key].sort(key=lambda other: self._position[id(other)])
+        self._work_of = None
+
+    def _grouped(self):
+        if self._work_of is None:
+            self._group_works()
+
+    def _group_works(self):
+        """
+        Union readings that share any work key
+        A work is named after the first key seen for it in catalogue order
+        """
+        self._work_of = {}
+        self._works = defaultdict(list)
+        parent = {}
+
+        def find(key):
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        book_keys = []
+        for year, position, book in self._entries:
+            keys = work_keys(book) or [f"entry:{year}:{position}"]
+            for key in keys:
+                parent.setdefault(key, key)
+            for key in keys[1:]:
+                first, other = find(keys[0]), find(key)
+                if first != other:
+                    parent[other] = first
+            book_keys.append((book, keys[0]))
+
+        names = {}
+        for book, key in book_keys:
+            root = find(key)
+            work = names.setdefault(root, key)
+            self._work_of[id(book)] = work
+            self._works[work].append(book)
+
+    def add(self, year, book):
+        """
+        Append a new reading to a year and index it
+        A year not yet in the catalogue is created in most-recent-first order
+        """
+        if year not in self.data:
+            self.data[year] = {'books': []}
+            for key in sorted(self.data, reverse=True):
+                self.data[key] = self.data.pop(key)
+        books = self.data[year].setdefault('books', [])
+        books.append(book)
+        # The reading goes at the end of its year, which need not be the end of the catalogue
+        at = sum(len(year_data.get('books', [])) for year_data in self._years_through(year)) - 1
+        if at == len(self._entries):
+            work = self.work_id(book)
+            self._index(year, len(books), book)
+            self._work_of[id(book)] = work
+            self._works[work].append(book)
+        else:
+            self._index(year, len(books), book, at)
+            self._work_of = None
+
+    def _years_through(self, year):
+        """year_data of every year up to and including `year`, in catalogue order"""
+        for key, year_data in self.data.items():
+            yield year_data
+            if key == year:
+                return
+
+    def __iter__(self):
+        """(year, position, book) in catalogue order"""
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def years(self):
+        """(year, books) pairs in catalogue order"""
+        return [(year, year_data.get('books', [])) for year, year_data in self.data.items()]
+
+    def get(self, book_id):
+        return self._by_id.get(book_id)
+
+    def find_isbn(self, isbn):
+        """Every reading of the book with this ISBN (any ISBN-10/13 formatting)"""
+        return list(self._by_isbn.get(canonical_isbn(isbn), ()))
+
+    def find_title_author(self, title, author):
+        return list(self._by_title_author.get(title_author_key(title, author), ()))
+
+    def work_id(self, book):
+        """Identity shared by every reading of this book's work"""
+        self._grouped()
+        work = self._work_of.get(id(book))
+        if work is None:
+            keys = work_keys(book)
+            work = next((self._work_of[id(other)] for key in keys for other in self._books_for_key(key)),
+                        keys[0] if keys else f"book:{id(book)}")
+        return work
+
+    def _books_for_key(self, key):
+        kind, _, value = key.partition(':')
+        if kind == 'isbn':
+            return self._by_isbn.get(value, ())
+        if kind == 'title':
+            return self._by_title_author.get(tuple(value.split('|', 1)), ())
+        return ()
+
+    def readings(self, book):
+        """Every catalogue reading of the book's work, in catalogue order"""
+        self._grouped()
+        return list(self._works.get(self.work_id(book), ())) or [book]
+
+    def works(self):
+        """{work id: [books]} in catalogue order"""
+        self._grouped()
+        return {work: list(books) for work, books in self._works.items()}
+
+    def books_for_cover(self, filename):
+        """Books whose cover filename is `filename`"""
+        return list(self._by_filename.get(filename, ()))
+
+    def cover_filenames(self):
+        return set(self._by_filename)
+
+    @property
+    def covers(self):
+        """Snapshot of the covers directory (taken on first use)"""
+        if self._covers is None:
+            self._covers = CoversSnapshot(self.covers_dir)
+        return self._covers
+
+    def work_lead(self, book):
+        """
+        Reading a work's cover is fetched for and named after: the first
+        reading with an ISBN, else the book itself
+        """
+        return next((reading for reading in self.readings(book) if reading.get('isbn')), book)
+
+    def has_cover_file(self, book):
+        """Whether the book's expected cover file exists"""
+        return cover_filename(book) in self.covers
+
+    def shared_cover(self, book):
+        """
+        Existing cover file for the book: its own expected file, else one
+        already downloaded for another reading of the same work; None if neither
+        """
+        candidates = []
+        for reading in [book] + self.readings(book):
+            if reading.get('title') and reading.get('author') is not None:
+                candidates.append(cover_filename(reading))
+            candidates.append(cover_name(reading.get('coverImage')))
+        return next((name for name in candidates if name and name in self.covers), None)
+
+    def save(self, path=None):
+        write_json_atomic(path or self.path, self.data)
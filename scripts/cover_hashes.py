@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Perceptual-hash index of the covers in public/covers
+Every cover gets a 64-bit dHash (plus an aHash to confirm matches), stored in
+scripts/.cache/cover_hashes.json and refreshed only for files whose size or
+mtime changed. Downloads are checked against it before they are moved into
+place: known "image not available" placeholders are rejected, and an image
+that is already saved under another filename is hard-linked instead of
+stored twice.
+
+Placeholder hashes live in placeholder_hashes.json next to this script
+(committed; --mark-placeholder adds to it) and in .cache/placeholder_hashes.json,
+where the downloaders record the providers' "no cover" images fetched from
+KNOWN_PLACEHOLDER_URLS on their first online run. Run this file directly to
+list duplicate and placeholder covers, or to mark a bad cover as a
+placeholder so it is never accepted again:
+
+    python3 cover_hashes.py
+    python3 cover_hashes.py --mark-placeholder ../public/covers/9780000000000.jpg
+"""
+
+import argparse
+import io
+import json
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import http_client
+from jsonio import write_json_atomic
+
+COVERS_DIR = Path('../public/covers')
+INDEX_FILE = Path(__file__).resolve().parent / '.cache' / 'cover_hashes.json'
+PLACEHOLDERS_FILE = Path(__file__).resolve().parent / 'placeholder_hashes.json'
+SEEDED_PLACEHOLDERS_FILE = Path(__file__).resolve().parent / '.cache' / 'placeholder_hashes.json'
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+HASH_SIZE = 8
+PLACEHOLDER_DISTANCE = 6   # Max dHash bits that may differ from a known placeholder
+DUPLICATE_DISTANCE = 0     # Duplicates must match exactly on both hashes
+
+# Images providers serve in place of a missing cover; the IDs are deliberately unknown
+KNOWN_PLACEHOLDER_URLS = {
+    'Google Books no-cover thumbnail': 'https://books.google.com/googlebooks/images/no_cover_thumb.gif',
+    'Internet Archive default image': 'https://archive.org/services/img/isbn_0000000000',
+}
+
+def image_hashes(img):
+    """(dhash, ahash) of a PIL image as 16-digit hex strings"""
+    # JPEG draft mode decodes at reduced scale, which is all a 9x8 thumbnail needs
+    img.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+    gray = img.convert('L')
+    wide = np.asarray(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS), dtype=np.int16)
+    square = np.asarray(gray.resize((HASH_SIZE, HASH_SIZE), Image.LANCZOS), dtype=np.int16)
+    dhash_bits = (wide[:, 1:] > wide[:, :-1]).flatten()
+    ahash_bits = (square > square.mean()).flatten()
+    return _to_hex(dhash_bits), _to_hex(ahash_bits)
+
+def file_hashes(path):
+    with Image.open(path) as img:
+        return image_hashes(img)
+
+def bytes_hashes(data):
+    """(dhash, ahash) of an image held in memory"""
+    with Image.open(io.BytesIO(data)) as img:
+        return image_hashes(img)
+
+def _to_hex(bits):
+    return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
+
+def distance(a, b):
+    """Hamming distance between two hex hashes"""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+def load_placeholders(path=PLACEHOLDERS_FILE):
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('placeholders', [])
+
+def known_placeholders(path=PLACEHOLDERS_FILE, seeded_path=SEEDED_PLACEHOLDERS_FILE):
+    """The committed placeholders plus those recorded at runtime"""
+    return load_placeholders(Path(path)) + load_placeholders(Path(seeded_path))
+
+class CoverHashIndex:
+    """
+    Hashes of every cover in one directory plus the known placeholders
+    Thread-safe; call save() to persist newly computed hashes
+    """
+
+    def __init__(self, covers_dir, index_path=INDEX_FILE, placeholders=None):
+        self.covers_dir = Path(covers_dir)
+        self.index_path = Path(index_path)
+        self.placeholders = known_placeholders() if placeholders is None else placeholders
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self._refresh()
+
+    def _refresh(self):
+        """Load the saved index and rehash files that are new or changed"""
+        saved = {}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f).get(str(self.covers_dir.resolve()), {})
+            except (OSError, ValueError):
+                saved = {}
+        if not self.covers_dir.is_dir():
+            return
+        for item in os.scandir(self.covers_dir):
+            if not item.is_file() or Path(item.name).suffix.lower() not in SOURCE_EXTENSIONS:
+                continue
+            stat = item.stat()
+            entry = saved.get(item.name)
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                self._entries[item.name] = entry
+                continue
+            try:
+                dhash, ahash = file_hashes(item.path)
+            except Exception:
+                continue
+            self._entries[item.name] = {'dhash': dhash, 'ahash': ahash,
+                                        'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            self._dirty = True
+        if set(saved) - set(self._entries):
+            self._dirty = True
+
+    def placeholder_match(self, dhash, ahash=None):
+        """The matching placeholder entry, or None; both hashes must be close when ahash is given"""
+        for placeholder in self.placeholders:
+            if distance(dhash, placeholder['dhash']) > PLACEHOLDER_DISTANCE:
+                continue
+            if ahash and placeholder.get('ahash') and distance(ahash, placeholder['ahash']) > PLACEHOLDER_DISTANCE:
+                continue
+            return placeholder
+        return None
+
+    def duplicate_of(self, dhash, ahash, exclude=None):
+        """Filename of an existing cover with the same image, or None"""
+        with self._lock:
+            for name, entry in self._entries.items():
+                if name == exclude:
+                    continue
+                if (distance(dhash, entry['dhash']) <= DUPLICATE_DISTANCE
+                        and distance(ahash, entry['ahash']) <= DUPLICATE_DISTANCE):
+                    return name
+        return None
+
+    def add(self, path, dhash=None, ahash=None):
+        """Record a cover that was just written"""
+        path = Path(path)
+        if dhash is None or ahash is None:
+            dhash, ahash = file_hashes(path)
+        stat = path.stat()
+        with self._lock:
+            self._entries[path.name] = {'dhash': dhash, 'ahash': ahash,
+                                        'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            self._dirty = True
+
+    def entries(self):
+        with self._lock:
+            return dict(self._entries)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {}
+            if self.index_path.exists():
+                try:
+                    with open(self.index_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    data = {}
+            data[str(self.covers_dir.resolve())] = dict(sorted(self._entries.items()))
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.index_path, data, indent=None)
+            self._dirty = False
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_index(covers_dir):
+    """Shared index for a covers directory (built on first use)"""
+    key = Path(covers_dir).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = CoverHashIndex(key)
+            _indexes[key] = index
+        return index
+
+def save_all():
+    """Persist every index built in this process"""
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        index.save()
+
+def duplicate_groups(entries):
+    """Lists of filenames sharing the same image"""
+    groups = defaultdict(list)
+    for name, entry in sorted(entries.items()):
+        groups[(entry['dhash'], entry['ahash'])].append(name)
+    return [names for names in groups.values() if len(names) > 1]
+
+def seed_known_placeholders(path=PLACEHOLDERS_FILE, seeded_path=SEEDED_PLACEHOLDERS_FILE):
+    """
+    Fetch and record any KNOWN_PLACEHOLDER_URLS image not yet known
+    Additions go to the untracked cache file, never the committed one.
+    Unreachable sources (offline, network errors) are retried on the next run.
+    Returns the number of placeholders added.
+    """
+    seeded_path = Path(seeded_path)
+    data = {'placeholders': load_placeholders(seeded_path)}
+    recorded = {placeholder.get('source') for placeholder in known_placeholders(path, seeded_path)}
+    added = 0
+    for note, url in KNOWN_PLACEHOLDER_URLS.items():
+        if url in recorded:
+            continue
+        try:
+            response = http_client.get_client().get(url)
+            if response.status_code != 200:
+                continue
+            dhash, ahash = bytes_hashes(response.content)
+        except Exception:
+            continue
+        data['placeholders'].append({'dhash': dhash, 'ahash': ahash, 'note': note, 'source': url})
+        added += 1
+    if added:
+        seeded_path.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(seeded_path, data)
+        placeholders = known_placeholders(path, seeded_path)
+        with _indexes_lock:
+            for index in _indexes.values():
+                index.placeholders = placeholders
+    return added
+
+def mark_placeholders(paths, note=None):
+    data = {'placeholders': load_placeholders()}
+    for path in paths:
+        dhash, ahash = file_hashes(path)
+        if any(p['dhash'] == dhash for p in data['placeholders']):
+            print(f"   ✓  {path} is already a known placeholder")
+            continue
+        data['placeholders'].append({'dhash': dhash, 'ahash': ahash,
+                                     'note': note or f"marked from {Path(path).name}"})
+        print(f"   ✅ Marked {path} ({dhash})")
+    write_json_atomic(PLACEHOLDERS_FILE, data)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find duplicate and placeholder covers by perceptual hash")
+    parser.add_argument('--covers-dir', type=Path, default=COVERS_DIR)
+    parser.add_argument('--mark-placeholder', nargs='+', type=Path, metavar='FILE',
+                        help="Add these images to the known placeholders")
+    parser.add_argument('--note', help="Description stored with --mark-placeholder")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.mark_placeholder:
+        mark_placeholders(args.mark_placeholder, args.note)
+        return
+
+    seed_known_placeholders()
+    index = CoverHashIndex(args.covers_dir)
+    entries = index.entries()
+    index.save()
+
+    placeholders = [name for name, entry in sorted(entries.items())
+                    if index.placeholder_match(entry['dhash'], entry['ahash'])]
+    duplicates = duplicate_groups(entries)
+
+    print("=" * 70)
+    print("📊 COVER HASH SUMMARY")
+    print("=" * 70)
+    print(f"Covers hashed:           {len(entries)}")
+    print(f"Known placeholders:      {len(index.placeholders)}")
+    print(f"❌ Placeholder covers:   {len(placeholders)}")
+    for name in placeholders:
+        print(f"   • {name}")
+    print(f"🔁 Duplicate groups:     {len(duplicates)}")
+    for names in duplicates:
+        print(f"   • {', '.join(names)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tiny inline placeholders for cover images
+Each cover is shrunk to a 16px-wide WebP and stored on the book as a base64
+data URI (coverPlaceholder, about 250 bytes), so cards can paint a blurred
+preview before the full cover loads. Previews are cached by the cover's
+SHA-256 in .cache/cover_placeholders.json; enrich.py fills them in for books
+it processes, and running this script backfills the whole catalogue in
+parallel.
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from catalogue import BOOKS_FILE, COVERS_DIR, Catalogue, cover_name
+from jsonio import write_json_atomic
+from manifest import file_sha256
+
+CACHE_FILE = Path(__file__).resolve().parent / '.cache' / 'cover_placeholders.json'
+
+PREVIEW_WIDTH = 16
+PREVIEW_QUALITY = 40
+VERSION = 1
+
+def preview_data_uri(path):
+    """16px-wide WebP preview of an image as a data URI"""
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        height = max(1, round(img.height * PREVIEW_WIDTH / img.width))
+        # BOX averages every source pixel, which is what a preview this small wants
+        preview = img.resize((PREVIEW_WIDTH, height), Image.BOX)
+    buffer = io.BytesIO()
+    preview.save(buffer, 'WEBP', quality=PREVIEW_QUALITY, method=6)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def build_one(path, source_hash):
+    """Worker: (hash, data URI or None)"""
+    try:
+        return source_hash, preview_data_uri(path)
+    except Exception:
+        return source_hash, None
+
+class PlaceholderCache:
+    """
+    Data URIs keyed by cover SHA-256, persisted as JSON
+    Safe to share between threads
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == VERSION:
+                self.entries = data.get('previews', {})
+
+    def get(self, source_hash):
+        with self._lock:
+            return self.entries.get(source_hash)
+
+    def put(self, source_hash, data_uri):
+        with self._lock:
+            self.entries[source_hash] = data_uri
+            self._dirty = True
+
+    def for_file(self, path):
+        """Cached preview for a cover file, generated on a miss; None if unreadable"""
+        try:
+            source_hash = file_sha256(path)
+        except OSError:
+            return None
+        data_uri = self.get(source_hash)
+        if data_uri is None:
+            _, data_uri = build_one(path, source_hash)
+            if data_uri is not None:
+                self.put(source_hash, data_uri)
+        return data_uri
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.path, {'version': VERSION, 'previews': self.entries}, indent=None)
+            self._dirty = False
+
+_cache = None
+_cache_guard = threading.Lock()
+
+def get_cache():
+    """Process-wide cache shared by the enrichment stages"""
+    global _cache
+    with _cache_guard:
+        if _cache is None:
+            _cache = PlaceholderCache()
+        return _cache
+
+def save_all():
+    if _cache is not None:
+        _cache.save()
+
+def apply_placeholder(book, data_uri):
+    """Set or clear book['coverPlaceholder']; returns True if it changed"""
+    if data_uri:
+        if book.get('coverPlaceholder') == data_uri:
+            return False
+        book['coverPlaceholder'] = data_uri
+        return True
+    if 'coverPlaceholder' in book:
+        del book['coverPlaceholder']
+        return True
+    return False
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate inline cover placeholders for books.json")
+    parser.add_argument('--books', type=Path, default=BOOKS_FILE)
+    parser.add_argument('--covers-dir', type=Path, default=COVERS_DIR)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true',
+                        help="Regenerate every preview, ignoring the cache")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    catalogue = Catalogue.load(args.books, args.covers_dir)
+    covers = catalogue.covers
+    cache = PlaceholderCache()
+
+    hashes = {}
+    for year, position, book in catalogue:
+        name = cover_name(book.get('coverImage'))
+        if name and name in covers and name not in hashes:
+            hashes[name] = file_sha256(covers.path(name))
+
+    pending = {source_hash: covers.path(name) for name, source_hash in hashes.items()
+               if args.force or cache.get(source_hash) is None}
+    print(f"🌫️  {len(hashes)} covers, {len(pending)} preview(s) to build with {args.workers} worker(s)...\n")
+
+    failed = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            chunksize = max(1, len(pending) // (max(1, args.workers) * 4))
+            for source_hash, data_uri in executor.map(build_one, pending.values(), pending.keys(),
+                                                      chunksize=chunksize):
+                if data_uri is None:
+                    failed += 1
+                    print(f"   ❌ {pending[source_hash].name}")
+                else:
+                    cache.put(source_hash, data_uri)
+
+    updated = cleared = 0
+    for year, position, book in catalogue:
+        name = cover_name(book.get('coverImage'))
+        data_uri = cache.get(hashes[name]) if name in hashes else None
+        if apply_placeholder(book, data_uri):
+            if data_uri:
+                updated += 1
+            else:
+                cleared += 1
+    cache.save()
+    if updated or cleared:
+        catalogue.save()
+
+    sizes = [len(book['coverPlaceholder']) for _, _, book in catalogue if book.get('coverPlaceholder')]
+    print("\n" + "=" * 70)
+    print("📊 PLACEHOLDER SUMMARY")
+    print("=" * 70)
+    print(f"✅ Built:              {len(pending) - failed}")
+    print(f"❌ Failed:             {failed}")
+    print(f"📝 Books updated:      {updated}")
+    print(f"🧹 Books cleared:      {cleared}")
+    if sizes:
+        print(f"\nInline size:          {sum(sizes) / 1024:.1f} KB total, {sum(sizes) / len(sizes):.0f} bytes avg")
+    if updated or cleared:
+        print(f"\n📄 Updated: {catalogue.path.absolute()}")
+
+if __name__ == '__main__':
+    main()
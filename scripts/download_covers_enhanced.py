@@ -5,60 +5,166 @@ Downloads high-quality covers from Open Library, Google Books, and Internet Arch
 Prioritizes most popular editions and validates image quality
 """
 
+import argparse
 import json
 import os
+import tempfile
+import threading
 import time
-import requests
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 import urllib.parse
-import re
 from PIL import Image
 
+import cover_hashes
+import google_books
+import http_client
+import instrumentation
+import journal as checkpoints
+import open_library
+import provider_stats
+import rate_limiter
+from catalogue import BOOKS_FILE, Catalogue, cover_filename
+from jsonio import write_json_atomic
+from image_probe import ImageProbe, probe_image_size
+
+_log_buffer = threading.local()
+
+def log(message):
+    """Print a progress line, or buffer it while a worker processes a book"""
+    lines = getattr(_log_buffer, 'lines', None)
+    if lines is None:
+        print(message)
+    else:
+        lines.append(message)
+
+@contextmanager
+def capture_log():
+    """Buffer log() lines from this thread; yields the list they collect in"""
+    _log_buffer.lines = []
+    try:
+        yield _log_buffer.lines
+    finally:
+        _log_buffer.lines = None
+
+# Streaming download limits
+MIN_DOWNLOAD_BYTES = 1000  # Too small, likely not a valid image
+MAX_DOWNLOAD_BYTES = 15 * 1024 * 1024
+
+# Hedged search: seconds each book's concurrent provider lookups may take
+HEDGE_DEADLINE = 20.0
+HEDGE_PROVIDERS = ('openlibrary', 'google', 'internet_archive')  # Tie-break order
+HEDGE_WORKERS = 16  # Threads shared by every book's provider searches
+
+def meets_quality(file_size, width, height, min_width=300, min_size_kb=20):
+    """Quality thresholds shared by file and in-memory validation"""
+    if file_size < min_size_kb * 1024:
+        return False
+    return width >= min_width and height >= min_width
+
 def validate_image_quality(image_path, min_width=300, min_size_kb=20):
     """
     Validate that an image meets quality thresholds
     Returns True if image is valid, False otherwise
     """
     try:
-        # Check file size
-        file_size = os.path.getsize(image_path)
-        if file_size < min_size_kb * 1024:
-            return False
-        
         # Check image dimensions
         with Image.open(image_path) as img:
             width, height = img.size
-            if width < min_width or height < min_width:
-                return False
-        
-        return True
+        return meets_quality(os.path.getsize(image_path), width, height, min_width, min_size_kb)
     except Exception as e:
-        print(f"      Quality validation error: {e}")
+        log(f"      Quality validation error: {e}")
         return False
 
-def download_from_url(url, output_path, validate_quality=True):
-    """Download an image from a URL and optionally validate quality"""
+def download_from_url(url, output_path, validate_quality=True, max_bytes=MAX_DOWNLOAD_BYTES):
+    """
+    Download an image from a URL and optionally validate quality
+    The body is streamed in chunks into memory (capped at max_bytes) and
+    checked there, so a rejected download never touches the disk. Downloads
+    abort early on a non-image Content-Type, an oversized Content-Length, or
+    header dimensions that are too small; placeholders and duplicates are
+    caught by perceptual hash before anything is written.
+    """
+    output_path = Path(output_path)
+    client = http_client.get_client()
+    tmp_path = None
     try:
-        response = requests.get(url, timeout=10, stream=True)
-        if response.status_code == 200:
-            # Download to memory first
-            content = response.content
-            if len(content) < 1000:  # Too small, likely not a valid image
+        with instrumentation.span('image.download', provider=rate_limiter.provider_for_url(url)) as fields, \
+                client.get(url, stream=True) as response:
+            fields.update(url=url, status=response.status_code)
+            if response.status_code != 200:
                 return False
             
-            # Write to file
-            with open(output_path, 'wb') as f:
-                f.write(content)
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and not content_type.startswith('image/'):
+                return False
+            content_length = int(response.headers.get('Content-Length') or 0)
+            if content_length > max_bytes:
+                log(f"      Skipping: {content_length / 1024 / 1024:.1f} MB exceeds limit")
+                return False
+            if content_length and content_length < MIN_DOWNLOAD_BYTES:
+                return False
             
-            # Validate quality if requested
-            if validate_quality:
-                if not validate_image_quality(output_path):
-                    os.remove(output_path)
+            probe = ImageProbe()
+            body = bytearray()
+            for chunk in client.iter_content(response):
+                if len(body) + len(chunk) > max_bytes:
                     return False
-            
-            return True
+                body.extend(chunk)
+                if not probe.done and probe.feed(chunk) and probe.size and validate_quality:
+                    # Dimensions are known from the header: stop now if too small
+                    if not meets_quality(float('inf'), *probe.size):
+                        return False
+            body = bytes(body)
+            size = probe.finish()
+            if size is None and len(body) >= MIN_DOWNLOAD_BYTES:
+                # Header too large to probe (big ICC/EXIF blocks): read it from the whole body
+                size = probe_image_size(body)
+            fields.update(bytes=len(body), size=size)
+        
+        if len(body) < MIN_DOWNLOAD_BYTES or size is None:
+            return False
+        if validate_quality and not meets_quality(len(body), *size):
+            return False
+        
+        # Check the perceptual hash before anything lands in the covers directory
+        with instrumentation.span('image.validate'):
+            index = cover_hashes.get_index(output_path.parent)
+            dhash, ahash = cover_hashes.bytes_hashes(body)
+            placeholder = index.placeholder_match(dhash, ahash)
+            existing = None if placeholder else index.duplicate_of(dhash, ahash, exclude=output_path.name)
+        if placeholder:
+            log(f"      Rejected: provider placeholder ({placeholder.get('note', dhash)})")
+            return False
+        if existing and (output_path.parent / existing).read_bytes() != body:
+            # Perceptual hashes can collide for different covers; only link byte-identical files
+            log(f"      Same hash as {existing} but different bytes; keeping the download")
+            existing = None
+        
+        with instrumentation.span('image.write'):
+            if existing:
+                # Same image already saved for another book: hard-link instead of storing it twice
+                tmp_path = f"{output_path.parent / f'.{output_path.name}'}.{threading.get_ident()}.link"
+                try:
+                    os.link(output_path.parent / existing, tmp_path)
+                    log(f"      Linked to identical cover {existing}")
+                except OSError:
+                    tmp_path = None  # No hard links here; write the downloaded copy
+            if tmp_path is None:
+                fd, tmp_path = tempfile.mkstemp(prefix=f".{output_path.name}.", suffix='.part',
+                                                dir=output_path.parent)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(body)
+            os.replace(tmp_path, output_path)
+            tmp_path = None
+            index.add(output_path, dhash, ahash)
+        return True
     except Exception as e:
-        print(f"      Error: {e}")
+        log(f"      Error: {e}")
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
     return False
 
 def get_cover_from_openlibrary_isbn(isbn, output_path):
@@ -71,17 +177,23 @@ def get_cover_from_openlibrary_isbn(isbn, output_path):
     
     isbn_clean = isbn.replace('-', '').replace(' ', '')
     
+    # A cover ID resolved by the bulk lookup saves the edition and work requests
+    bulk_cover_id = open_library.cover_id_for_isbn(isbn_clean)
+    if bulk_cover_id and download_from_url(open_library.cover_url(bulk_cover_id), output_path,
+                                           validate_quality=True):
+        return True
+    
     # First, try to get edition data from Open Library API to find higher quality covers
     try:
         api_url = f"https://openlibrary.org/isbn/{isbn_clean}.json"
-        response = requests.get(api_url, timeout=10)
+        response = http_client.get_client().get_json(api_url)
         
         if response.status_code == 200:
             edition_data = response.json()
             
             # Try to get cover from edition data (often higher quality)
             covers = edition_data.get('covers', [])
-            if covers:
+            if covers and covers[0] != bulk_cover_id:
                 # Try the first cover ID with large size
                 cover_id = covers[0]
                 # Open Library API provides access to original images
@@ -96,11 +208,11 @@ def get_cover_from_openlibrary_isbn(isbn, output_path):
                 work_key = works[0].get('key', '').replace('/works/', '')
                 if work_key:
                     work_url = f"https://openlibrary.org/works/{work_key}.json"
-                    work_response = requests.get(work_url, timeout=10)
+                    work_response = http_client.get_client().get_json(work_url)
                     if work_response.status_code == 200:
                         work_data = work_response.json()
                         work_covers = work_data.get('covers', [])
-                        if work_covers:
+                        if work_covers and work_covers[0] != bulk_cover_id:
                             cover_id = work_covers[0]
                             cover_url = f"https://covers.openlibrary.org/b/id/{cover_id}-L.jpg"
                             if download_from_url(cover_url, output_path, validate_quality=True):
@@ -116,51 +228,23 @@ def get_cover_from_openlibrary_isbn(isbn, output_path):
     
     return False
 
-def get_cover_from_google_books(title, author, output_path):
+def get_cover_from_google_books(title, author, output_path, volume_info=None):
     """
     Try to get cover from Google Books API using title and author
     Uses first result (most popular edition) and ensures maximum quality
+    Pass an already-fetched volume_info to skip the lookup
     """
     try:
-        # Construct search query
-        query = f"{title} {author}".strip()
-        encoded_query = urllib.parse.quote(query)
-        
-        # Request first result (most popular edition)
-        api_url = f"https://www.googleapis.com/books/v1/volumes?q={encoded_query}&maxResults=1"
+        if volume_info is None:
+            # Request first result (most popular edition)
+            volume_info = google_books.volume_by_title_author(title, author)
         
-        response = requests.get(api_url, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if 'items' in data and len(data['items']) > 0:
-                volume_info = data['items'][0].get('volumeInfo', {})
-                image_links = volume_info.get('imageLinks', {})
-                
-                # Try to get the highest quality image available (prioritize extraLarge)
-                cover_url = (
-                    image_links.get('extraLarge') or
-                    image_links.get('large') or
-                    image_links.get('medium') or
-                    image_links.get('small') or
-                    image_links.get('thumbnail')
-                )
-                
-                if cover_url:
-                    # Google Books uses HTTP, convert to HTTPS
-                    cover_url = cover_url.replace('http://', 'https://')
-                    # Remove edge=curl parameter for better quality
-                    cover_url = cover_url.replace('&edge=curl', '').replace('?edge=curl', '')
-                    # Remove other quality-reducing parameters while preserving important ones
-                    # Remove zoom parameters that reduce quality
-                    cover_url = re.sub(r'[?&]zoom=\d+', '', cover_url)
-                    
-                    if download_from_url(cover_url, output_path, validate_quality=True):
-                        return True
+        cover_url = google_books.cover_url_from_volume(volume_info)
+        if cover_url and download_from_url(cover_url, output_path, validate_quality=True):
+            return True
         
     except Exception as e:
-        print(f"      Google Books error: {e}")
+        log(f"      Google Books error: {e}")
     
     return False
 
@@ -187,7 +271,7 @@ def get_cover_from_internet_archive(title, author, isbn, output_path):
         
         # Search Internet Archive
         search_url = f"https://archive.org/advancedsearch.php?q={encoded_query}&fl=identifier&output=json&rows=1"
-        response = requests.get(search_url, timeout=10)
+        response = http_client.get_client().get_json(search_url)
         
         if response.status_code == 200:
             try:
@@ -209,24 +293,320 @@ def get_cover_from_internet_archive(title, author, isbn, output_path):
     
     return False
 
-def sanitize_filename(text):
-    """Create a safe filename from text"""
-    # Remove or replace problematic characters
-    safe = "".join(c for c in text if c.isalnum() or c in (' ', '-', '_'))
-    return safe.strip()[:50]  # Limit length
+def fetch_cover(book, output_path, volume_info=None, attempts=None):
+    """
+    Run the provider waterfall for one book
+    Returns the stats key for the provider that succeeded, or 'failed'
+    volume_info, when given, is a Google Books volume already looked up for this book
+    attempts, when given, is a list that receives one dict per provider tried
+    Providers are tried in the order provider_stats expects to find a cover
+    fastest (unless --fixed-order); the Open Library fallback always comes last
+    """
+    title = book['title']
+    author = book['author']
+    isbn = book.get('isbn', '')
+    
+    def tried(provider, fetch):
+        started = time.perf_counter()
+        failures = http_client.transport_failures()
+        with instrumentation.span('provider', provider=provider) as fields:
+            ok = fetch()
+            fields['success'] = ok
+        # A provider that was never reached (offline, network errors) didn't miss: keep it out of the stats
+        unreached = not ok and (http_client.get_client().offline or http_client.transport_failures() > failures)
+        if provider in provider_stats.FIXED_ORDER and not unreached:
+            provider_stats.get_stats().record(isbn, provider, ok, time.perf_counter() - started)
+        if attempts is not None:
+            result = 'success' if ok else 'error' if unreached else 'miss'
+            attempts.append({'provider': provider, 'result': result, 'at': time.time()})
+        return ok
+    
+    # provider -> (log label, fetch, stats key)
+    providers = {
+        # Open Library: high-res via API if available, else covers endpoint
+        'openlibrary': (f"Open Library (ISBN: {isbn})",
+                        lambda: get_cover_from_openlibrary_isbn(isbn, output_path), 'openlibrary_success'),
+        # Google Books: extraLarge, first result = most popular
+        'google': ("Google Books (most popular edition)",
+                   lambda: get_cover_from_google_books(title, author, output_path, volume_info), 'google_success'),
+        # Internet Archive: high-quality scans
+        'internet_archive': ("Internet Archive",
+                             lambda: get_cover_from_internet_archive(title, author, isbn, output_path),
+                             'internet_archive_success'),
+    }
+    available = [provider for provider in provider_stats.FIXED_ORDER if isbn or provider != 'openlibrary']
+    order = provider_stats.plan(isbn, available)
+    if order != available:
+        log(f"      Provider order for {provider_stats.isbn_bucket(isbn)}: {', '.join(order)}")
+    
+    for provider in order:
+        label, fetch, success_key = providers[provider]
+        log(f"      Trying {label}...")
+        if tried(provider, fetch):
+            log(f"      ✅ Success via {label.split(' (')[0]}!")
+            return success_key
+    
+    # Last resort: Open Library standard covers endpoint without quality checks (if ISBN exists)
+    if isbn:
+        log(f"      Trying Open Library fallback...")
+        isbn_clean = isbn.replace('-', '').replace(' ', '')
+        url = f"https://covers.openlibrary.org/b/isbn/{isbn_clean}-L.jpg"
+        if tried('openlibrary_fallback', lambda: download_from_url(url, output_path, validate_quality=False)):  # Skip validation for fallback
+            log(f"      ✅ Success via Open Library fallback!")
+            return 'openlibrary_success'
+    
+    log(f"      ❌ No cover found (or quality too low)")
+    return 'failed'
 
-def main():
-    # Load the books data
-    with open('../src/data/books.json', 'r', encoding='utf-8') as f:
-        books_data = json.load(f)
+def openlibrary_cover_urls(isbn, cancelled=None):
+    """Candidate cover URLs from Open Library: edition, work, then ISBN endpoint"""
+    if not isbn:
+        return []
+    isbn_clean = google_books.clean_isbn(isbn)
+    client = http_client.get_client()
+    urls = []
+    bulk_cover_id = open_library.cover_id_for_isbn(isbn_clean)
+    if bulk_cover_id:
+        # The bulk lookup already answered what the edition record would
+        return [open_library.cover_url(bulk_cover_id),
+                f"https://covers.openlibrary.org/b/isbn/{isbn_clean}-L.jpg"]
+    try:
+        response = client.get_json(f"https://openlibrary.org/isbn/{isbn_clean}.json", cancelled=cancelled)
+        if response.status_code == 200:
+            edition_data = response.json()
+            covers = edition_data.get('covers', [])
+            if covers and covers[0] != bulk_cover_id:
+                urls.append(f"https://covers.openlibrary.org/b/id/{covers[0]}-L.jpg")
+            works = edition_data.get('works', [])
+            work_key = works[0].get('key', '').replace('/works/', '') if works else ''
+            if work_key:
+                work_response = client.get_json(f"https://openlibrary.org/works/{work_key}.json",
+                                                cancelled=cancelled)
+                if work_response.status_code == 200:
+                    work_covers = work_response.json().get('covers', [])
+                    if work_covers:
+                        urls.append(f"https://covers.openlibrary.org/b/id/{work_covers[0]}-L.jpg")
+    except Exception:
+        pass
+    urls.append(f"https://covers.openlibrary.org/b/isbn/{isbn_clean}-L.jpg")
+    return list(dict.fromkeys(urls))
+
+def google_cover_urls(title, author, volume_info=None, cancelled=None):
+    """Candidate cover URL from the most popular Google Books edition"""
+    try:
+        if volume_info is None:
+            volume_info = google_books.volume_by_title_author(title, author, cancelled)
+        cover_url = google_books.cover_url_from_volume(volume_info)
+        return [cover_url] if cover_url else []
+    except Exception as e:
+        log(f"      Google Books error: {e}")
+        return []
+
+def internet_archive_cover_urls(title, author, isbn, cancelled=None):
+    """Candidate cover URLs from Internet Archive: ISBN identifier, then title search"""
+    urls = []
+    if isbn:
+        urls.append(f"https://archive.org/services/img/isbn_{google_books.clean_isbn(isbn)}")
+    try:
+        encoded_query = urllib.parse.quote(f"{title} {author}".strip())
+        search_url = f"https://archive.org/advancedsearch.php?q={encoded_query}&fl=identifier&output=json&rows=1"
+        response = http_client.get_client().get_json(search_url, cancelled=cancelled)
+        if response.status_code == 200:
+            docs = response.json().get('response', {}).get('docs', [])
+            identifier = docs[0].get('identifier', '') if docs else ''
+            if identifier:
+                urls.append(f"https://archive.org/services/img/{identifier}")
+    except Exception:
+        pass
+    return urls
+
+def probe_cover(url, cancelled=None, max_bytes=MAX_DOWNLOAD_BYTES):
+    """
+    Read only as much of an image as it takes to learn its dimensions
+    Returns {'url', 'width', 'height', 'bytes'} or None; bytes is the
+    Content-Length when the server sent one. The connection is dropped as
+    soon as the header has been parsed.
+    """
+    client = http_client.get_client()
+    try:
+        with instrumentation.span('image.probe', provider=rate_limiter.provider_for_url(url)) as fields, \
+                client.get(url, stream=True, cancelled=cancelled) as response:
+            fields.update(url=url, status=response.status_code)
+            if response.status_code != 200:
+                return None
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and not content_type.startswith('image/'):
+                return None
+            content_length = int(response.headers.get('Content-Length') or 0) or None
+            if content_length and not MIN_DOWNLOAD_BYTES <= content_length <= max_bytes:
+                return None
+            probe = ImageProbe()
+            for chunk in client.iter_content(response, chunk_size=16 * 1024):
+                if cancelled is not None and cancelled.is_set():
+                    return None
+                if probe.feed(chunk):
+                    break
+            if probe.finish() is None:
+                return None
+            return {'url': url, 'width': probe.size[0], 'height': probe.size[1], 'bytes': content_length}
+    except Exception as e:
+        log(f"      Probe error: {e}")
+        return None
+
+def rank_candidates(candidates):
+    """
+    Best first: candidates meeting the quality thresholds, then by pixel area,
+    then by the waterfall's provider order
+    """
+    def key(candidate):
+        size = candidate['bytes'] if candidate['bytes'] is not None else float('inf')
+        return (not meets_quality(size, candidate['width'], candidate['height']),
+                -candidate['width'] * candidate['height'],
+                HEDGE_PROVIDERS.index(candidate['provider']))
+    return sorted(candidates, key=key)
+
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+def hedge_executor():
+    """Bounded pool shared by every hedged search in the process (created on first use)"""
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge')
+        return _hedge_executor
+
+def fetch_cover_hedged(book, output_path, volume_info=None, attempts=None, deadline=HEDGE_DEADLINE):
+    """
+    Query every provider at once and keep the best image instead of the first acceptable one
+    Each provider resolves its candidate URLs and probes their headers for
+    dimensions; whatever has been probed when the deadline passes is ranked
+    and only the winner is downloaded in full (falling back to the next
+    candidate if it fails validation). At the deadline the searches still
+    running are cancelled: no further request, retry or rate-limit wait
+    starts for them. Returns the same stats keys as fetch_cover.
+    """
+    title = book['title']
+    author = book['author']
+    isbn = book.get('isbn', '')
+    cancelled = threading.Event()
     
-    # Create covers directory
-    covers_dir = Path('../public/covers')
-    covers_dir.mkdir(exist_ok=True, parents=True)
+    resolvers = {
+        'openlibrary': lambda: openlibrary_cover_urls(isbn, cancelled),
+        'google': lambda: google_cover_urls(title, author, volume_info, cancelled),
+        'internet_archive': lambda: internet_archive_cover_urls(title, author, isbn, cancelled),
+    }
+    lock = threading.Lock()
+    candidates = []
+    timings = {}  # provider -> [started, finished or None, unreached]
     
-    print("🎨 Starting enhanced book cover download...\n")
+    book_id = book.get('id')
+    
+    def search(provider):
+        failures = http_client.transport_failures()
+        with lock:
+            timings[provider] = [time.perf_counter(), None, False]
+        try:
+            with instrumentation.book_context(book_id), instrumentation.span('provider', provider=provider):
+                search_provider(provider)
+        finally:
+            with lock:
+                timings[provider][1] = time.perf_counter()
+                # Failed requests before the deadline mean the provider was never reached;
+                # requests cut off by the deadline still count it as slow
+                timings[provider][2] = (not cancelled.is_set()
+                                        and http_client.transport_failures() > failures)
     
-    stats = {
+    def search_provider(provider):
+        for url in resolvers[provider]():
+            if cancelled.is_set():
+                return
+            candidate = probe_cover(url, cancelled)
+            if candidate:
+                candidate['provider'] = provider
+                with lock:
+                    candidates.append(candidate)
+    
+    log(f"      Querying {', '.join(HEDGE_PROVIDERS)} concurrently...")
+    futures = {}
+    try:
+        for provider in HEDGE_PROVIDERS:
+            futures[provider] = hedge_executor().submit(search, provider)
+        wait(futures.values(), timeout=deadline)
+    finally:
+        cancelled.set()
+        for future in futures.values():
+            future.cancel()
+        searched_at = time.perf_counter()
+    
+    with lock:
+        ranked = rank_candidates(list(candidates))
+    winner = None
+    for candidate in ranked:
+        size = candidate['bytes'] if candidate['bytes'] is not None else float('inf')
+        if not meets_quality(size, candidate['width'], candidate['height']):
+            break
+        if download_from_url(candidate['url'], output_path, validate_quality=True):
+            winner = candidate
+            break
+    
+    if winner is None and isbn:
+        # Same last resort as the waterfall: the ISBN endpoint without validation
+        url = f"https://covers.openlibrary.org/b/isbn/{google_books.clean_isbn(isbn)}-L.jpg"
+        if download_from_url(url, output_path, validate_quality=False):
+            winner = {'provider': 'openlibrary_fallback', 'url': url}
+    
+    # Teach the adaptive order too: a provider's time is how long its search ran
+    available = [provider for provider in provider_stats.FIXED_ORDER if isbn or provider != 'openlibrary']
+    with lock:
+        ran = {provider: list(timing) for provider, timing in timings.items() if provider in available}
+        unreached = {provider for provider, timing in timings.items() if timing[2]}
+    for provider, (started, finished, _) in ran.items():
+        won = winner is not None and winner['provider'] == provider
+        if http_client.get_client().offline or (provider in unreached and not won):
+            continue
+        provider_stats.get_stats().record(isbn, provider, won, (finished or searched_at) - started)
+    
+    if attempts is not None:
+        now = time.time()
+        for provider, future in futures.items():
+            if winner and winner['provider'] == provider:
+                result = 'success'
+            elif not future.done():
+                result = 'timeout'
+            else:
+                result = 'error' if provider in unreached else 'miss'
+            attempts.append({'provider': provider, 'result': result, 'at': now})
+        if winner and winner['provider'] == 'openlibrary_fallback':
+            attempts.append({'provider': 'openlibrary_fallback', 'result': 'success', 'at': now})
+    
+    if winner is None:
+        log(f"      ❌ No cover found (or quality too low)")
+        return 'failed'
+    if 'width' in winner:
+        log(f"      ✅ Best of {len(ranked)} candidates: {winner['provider']} "
+            f"{winner['width']}x{winner['height']}")
+    else:
+        log(f"      ✅ Success via Open Library fallback!")
+    return 'openlibrary_success' if winner['provider'] == 'openlibrary_fallback' else f"{winner['provider']}_success"
+
+def process_book(book, output_path, position, hedged=False, deadline=HEDGE_DEADLINE):
+    """
+    Worker entry point: fetch one cover while buffering its log lines
+    Returns (outcome, lines) so the main thread can print books in order
+    """
+    with capture_log() as lines, instrumentation.book_context(book.get('id')), \
+            instrumentation.span('book') as fields:
+        log(f"   {position}. '{book['title']}' by {book['author']}")
+        if hedged:
+            outcome = fetch_cover_hedged(book, output_path, deadline=deadline)
+        else:
+            outcome = fetch_cover(book, output_path)
+        fields['outcome'] = outcome
+    return outcome, lines
+
+def empty_stats():
+    return {
         'total': 0,
         'openlibrary_success': 0,
         'google_success': 0,
@@ -236,101 +616,160 @@ def main():
         'already_exists': 0,
         'quality_rejected': 0
     }
+
+def journal_cover(journal, book, filename, future):
+    """Done-callback: journal a finished cover lookup"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    outcome, lines = future.result()
+    cover_image = '' if outcome == 'failed' else f"/covers/{filename}"
+    journal.record(book.get('id'), {'coverImage': cover_image}, outcome)
+
+def download_covers(books_data, covers_dir, workers=4, quiet=False, hedged=False, deadline=HEDGE_DEADLINE,
+                    journal=None):
+    """
+    Fetch every missing cover in books_data into covers_dir
+    books_data is a books.json dict or a Catalogue over one
+    Updates each book's coverImage in place and returns the stats dict
+    hedged switches from the provider waterfall to fetch_cover_hedged
+    With a journal, each finished lookup is recorded as it completes and
+    works with a journaled result (replayed by the caller) are not looked up again
+    """
+    echo = (lambda *args: None) if quiet else print
+    catalogue = books_data if isinstance(books_data, Catalogue) else Catalogue(books_data, None, covers_dir)
+    covers = catalogue.covers
     
-    # Process each year
-    for year, year_data in books_data.items():
-        books = year_data.get('books', [])
-        print(f"📅 Processing {year} ({len(books)} books)...")
-        
-        for i, book in enumerate(books):
-            stats['total'] += 1
-            title = book['title']
-            author = book['author']
-            isbn = book.get('isbn', '')
-            
-            # Create a unique filename
-            if isbn:
-                filename = f"{isbn}.jpg"
-            else:
-                # Use title-author as filename if no ISBN
-                safe_title = sanitize_filename(title)
-                safe_author = sanitize_filename(author.split(',')[0])  # First author only
-                filename = f"{safe_title}_{safe_author}.jpg"
-            
-            output_path = covers_dir / filename
-            
-            # Skip if already exists
-            if output_path.exists():
-                print(f"   {i+1}. ✓ '{title}' - already downloaded")
-                book['coverImage'] = f"/covers/{filename}"
-                stats['already_exists'] += 1
-                continue
-            
-            print(f"   {i+1}. '{title}' by {author}")
-            
-            success = False
-            
-            # Priority 1: Try Open Library (high-res via API if available, else covers endpoint)
-            if isbn:
-                print(f"      Trying Open Library (ISBN: {isbn})...")
-                if get_cover_from_openlibrary_isbn(isbn, output_path):
-                    print(f"      ✅ Success via Open Library!")
-                    book['coverImage'] = f"/covers/{filename}"
-                    stats['openlibrary_success'] += 1
-                    success = True
-                    time.sleep(0.5)
-            
-            # Priority 2: Try Google Books (extraLarge, first result = most popular)
-            if not success:
-                print(f"      Trying Google Books (most popular edition)...")
-                if get_cover_from_google_books(title, author, output_path):
-                    print(f"      ✅ Success via Google Books!")
-                    book['coverImage'] = f"/covers/{filename}"
-                    stats['google_success'] += 1
-                    success = True
-                    time.sleep(0.5)
-            
-            # Priority 3: Try Internet Archive (high-quality scans)
-            if not success:
-                print(f"      Trying Internet Archive...")
-                if get_cover_from_internet_archive(title, author, isbn, output_path):
-                    print(f"      ✅ Success via Internet Archive!")
-                    book['coverImage'] = f"/covers/{filename}"
-                    stats['internet_archive_success'] += 1
-                    success = True
-                    time.sleep(0.5)
-            
-            # Priority 4: Fallback to Open Library standard covers endpoint (if ISBN exists and we haven't tried it)
-            if not success and isbn:
-                print(f"      Trying Open Library fallback...")
-                isbn_clean = isbn.replace('-', '').replace(' ', '')
-                url = f"https://covers.openlibrary.org/b/isbn/{isbn_clean}-L.jpg"
-                if download_from_url(url, output_path, validate_quality=False):  # Skip validation for fallback
-                    print(f"      ✅ Success via Open Library fallback!")
-                    book['coverImage'] = f"/covers/{filename}"
-                    stats['openlibrary_success'] += 1
-                    success = True
-                    time.sleep(0.5)
-            
-            if not success:
-                print(f"      ❌ No cover found (or quality too low)")
-                book['coverImage'] = ''
-                stats['failed'] += 1
+    stats = empty_stats()
+    
+    # Queue every missing cover up front so books from all years move through
+    # the provider waterfall in parallel; per-provider token buckets replace the
+    # old fixed sleeps. Readings of the same work (rereads, other editions) share
+    # one lookup and one cover file, preferring a reading that has an ISBN.
+    def journaled(book):
+        return journal is not None and any(reading.get('id') in journal for reading in catalogue.readings(book))
+    
+    isbns = [book['isbn'] for year, position, book in catalogue
+             if book.get('isbn') and not catalogue.shared_cover(book) and not journaled(book)]
+    if isbns:
+        echo(f"🔎 Resolving {len(isbns)} ISBNs with Open Library's bulk API...")
+        found = open_library.resolve_isbns(isbns)
+        echo(f"   {found} known to Open Library; the rest use per-book lookups\n")
+    
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        try:
+            for year, position, book in catalogue:
+                work = catalogue.work_id(book)
+                if work in futures or catalogue.shared_cover(book):
+                    continue
+                if journaled(book):
+                    continue
+                lead = catalogue.work_lead(book)
+                filename = cover_filename(lead)
+                future = executor.submit(process_book, lead, covers.path(filename), position, hedged, deadline)
+                if journal is not None:
+                    future.add_done_callback(lambda done, lead=lead, filename=filename:
+                                             journal_cover(journal, lead, filename, done))
+                futures[work] = (filename, future)
             
-            # Rate limiting
-            time.sleep(1)
-        
-        print()
+            # Report results in catalogue order as they complete
+            reported = set()
+            for year, books in catalogue.years():
+                echo(f"📅 Processing {year} ({len(books)} books)...")
+                
+                for i, book in enumerate(books):
+                    stats['total'] += 1
+                    work = catalogue.work_id(book)
+                    
+                    if work not in futures or work in reported:
+                        if work in futures:
+                            futures[work][1].result()
+                        filename = catalogue.shared_cover(book)
+                        if filename:
+                            echo(f"   {i+1}. ✓ '{book['title']}' - already downloaded")
+                            book['coverImage'] = f"/covers/{filename}"
+                            stats['already_exists'] += 1
+                        else:
+                            echo(f"   {i+1}. '{book['title']}' by {book['author']}")
+                            echo(f"      ❌ No cover found (or quality too low)")
+                            book['coverImage'] = ''
+                            stats['failed'] += 1
+                        continue
+                    
+                    reported.add(work)
+                    filename, future = futures[work]
+                    outcome, lines = future.result()
+                    for line in lines:
+                        echo(line)
+                    if outcome != 'failed':
+                        covers.add(filename)
+                    book['coverImage'] = '' if outcome == 'failed' else f"/covers/{filename}"
+                    stats[outcome] += 1
+                
+                echo()
+        except (KeyboardInterrupt, Exception):
+            # Drop the queued lookups so Ctrl-C only waits for the ones in flight
+            # (which still reach the journal) instead of the whole backlog
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    
+    return stats
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download book covers from multiple APIs")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Number of books fetched concurrently (default: 4)")
+    parser.add_argument('--hedged', action='store_true',
+                        help="Query all providers at once and keep the highest-resolution cover")
+    parser.add_argument('--deadline', type=float, default=HEDGE_DEADLINE,
+                        help=f"Per-book time limit for --hedged lookups in seconds (default: {HEDGE_DEADLINE:g})")
+    parser.add_argument('--fixed-order', action='store_true',
+                        help="Always try Open Library, Google Books, then Internet Archive")
+    http_client.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    checkpoints.add_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    provider_stats.configure(adaptive=not args.fixed_order)
+    client = http_client.configure_from_args(args, pool_size=max(16, args.workers))
+    instrumentation.configure_from_args(args)
+    
+    # Create covers directory
+    covers_dir = Path('../public/covers')
+    covers_dir.mkdir(exist_ok=True, parents=True)
+    placeholders_added = cover_hashes.seed_known_placeholders()
+    if placeholders_added:
+        print(f"🚫 Recorded {placeholders_added} provider placeholder image(s) to reject\n")
+    
+    # Load the books data
+    catalogue = Catalogue.load(covers_dir=covers_dir)
+    
+    # Finished lookups are journaled as they complete so an interrupted run can --resume
+    journal = checkpoints.open_from_args(args, 'download_covers', BOOKS_FILE)
+    resumed = journal.replay(catalogue)
+    
+    print("🎨 Starting enhanced book cover download...\n")
+    try:
+        stats = download_covers(catalogue, covers_dir, workers=args.workers,
+                                hedged=args.hedged, deadline=args.deadline, journal=journal)
+    finally:
+        journal.close()
+        cover_hashes.save_all()
+        provider_stats.save_all()
     
-    # Save updated JSON
-    with open('books_with_covers.json', 'w', encoding='utf-8') as f:
-        json.dump(books_data, f, indent=2, ensure_ascii=False)
+    # Save updated JSON, then drop the journal it supersedes
+    write_json_atomic('books_with_covers.json', catalogue.data)
+    journal.finish()
     
     # Print summary
     print("=" * 70)
     print("📊 DOWNLOAD SUMMARY")
     print("=" * 70)
     print(f"Total books:                    {stats['total']}")
+    if resumed:
+        print(f"↩️  Resumed from journal:         {resumed}")
     print(f"✅ Already downloaded:           {stats['already_exists']}")
     print(f"✅ Open Library (high-res):      {stats['openlibrary_success']}")
     print(f"✅ Google Books (popular):       {stats['google_success']}")
@@ -340,6 +779,10 @@ def main():
     print(f"\nSuccess rate: {(total_success / stats['total'] * 100):.1f}%")
     print(f"\n📁 Covers saved to: {covers_dir.absolute()}")
     print(f"📄 Updated JSON: scripts/books_with_covers.json")
+    provider_stats.print_summary()
+    client.print_summary()
+    instrumentation.print_summary()
+    instrumentation.finish()
     
     print("\n" + "=" * 70)
     print("💡 NEXT STEPS")
@@ -354,11 +797,9 @@ def main():
     # List books that failed
     if stats['failed'] > 0:
         print("\n📋 Books without covers:")
-        for year, year_data in books_data.items():
-            books = year_data.get('books', [])
-            for book in books:
-                if not book.get('coverImage'):
-                    print(f"   • {book['title']} by {book['author']} ({year})")
+        for year, position, book in catalogue:
+            if not book.get('coverImage'):
+                print(f"   • {book['title']} by {book['author']} ({year})")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Single-pass enrichment for books.json
+Runs pluggable stages (page counts, covers, manual-cover relinking, inline
+cover placeholders, validation) over every book in one pass. Each book's
+Google Books metadata is fetched once and shared by the stages, and
+books.json is written once, atomically, at the end.
+"""
+
+import argparse
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import cover_hashes
+import cover_placeholders
+import download_covers_enhanced as covers
+import google_books
+import http_client
+import instrumentation
+import journal as checkpoints
+import open_library
+import provider_stats
+from catalogue import Catalogue, canonical_isbn, cover_filename, cover_name
+from manifest import Manifest
+from single_flight import SingleFlight
+from update_manual_covers import link_manual_cover
+
+BOOKS_FILE = Path('../src/data/books.json')
+COVERS_DIR = Path('../public/covers')
+
+DATES_READ_PATTERN = re.compile(r'^\d{4}/\d{2}/\d{2}-\d{4}/\d{2}/\d{2}(, ?\d{4}/\d{2}/\d{2}-\d{4}/\d{2}/\d{2})*$')
+
+class BookContext:
+    """
+    Per-book state shared by the stages
+    Google Books lookups are made lazily and coalesced through flights: at
+    most once per ISBN and once per work for title/author searches, however
+    many readings ask
+    """
+
+    def __init__(self, year, position, book, catalogue, flights=None):
+        self.year = year
+        self.position = position
+        self.book = book
+        self.catalogue = catalogue
+        self.covers = catalogue.covers
+        self.covers_dir = self.covers.covers_dir
+        self.work = catalogue.work_id(book)
+        self.flights = flights if flights is not None else SingleFlight()
+        self.issues = []
+        self.attempts = []
+        self.metadata_source = None
+
+    @property
+    def cover_path(self):
+        """Where the work's cover lives: named after the catalogue's work lead, as download_covers does"""
+        return self.covers.path(cover_filename(self.catalogue.work_lead(self.book)))
+
+    def readings(self):
+        """Every reading of this book's work, this one included"""
+        return self.catalogue.readings(self.book)
+
+    def _lookup(self, key, fetch):
+        def guarded():
+            try:
+                return fetch()
+            except Exception as e:
+                covers.log(f"      Google Books error: {e}")
+                return None
+        volume, shared = self.flights.do(key, guarded)
+        return volume
+
+    def isbn_volume(self):
+        isbn = canonical_isbn(self.book.get('isbn'))
+        if not isbn:
+            return None
+        return self._lookup(('volume', isbn), lambda: google_books.volume_by_isbn(self.book.get('isbn', '')))
+
+    def search_volume(self):
+        return self._lookup(('search', self.work), lambda: google_books.volume_by_title_author(
+            self.book.get('title', ''), self.book.get('author', '')))
+
+    def cover_volume(self):
+        """
+        volumeInfo to take a cover from: the ISBN match when it has imageLinks,
+        else the title/author search (ISBN volumes often carry no images)
+        """
+        volume = self.isbn_volume()
+        if volume and volume.get('imageLinks'):
+            return volume
+        return self.search_volume() or volume
+
+class PageCountStage:
+    """
+    Fill in missing pageCount, from another reading of the same work if one
+    has it, else from Open Library's bulk result or the Google volumeInfo
+    """
+    name = 'pages'
+
+    def needs_metadata(self, ctx):
+        """Whether the work still needs a page count from the providers"""
+        return not any(isinstance(reading.get('pageCount'), int) and reading['pageCount'] > 0
+                       for reading in ctx.readings())
+
+    def run(self, ctx):
+        book = ctx.book
+        current = book.get('pageCount')
+        if current and isinstance(current, int) and current > 0:
+            return 'already_has'
+        page_count, source = next(((reading['pageCount'], 'reading') for reading in ctx.readings()
+                                   if isinstance(reading.get('pageCount'), int) and reading['pageCount'] > 0),
+                                  (None, None))
+        if not page_count:
+            (page_count, source), shared = ctx.flights.do(('pages', ctx.work), lambda: self.lookup(ctx))
+        if page_count:
+            ctx.metadata_source = source
+            book['pageCount'] = page_count
+            covers.log(f"      ✅ pageCount: {page_count}")
+            return 'found'
+        if http_client.get_client().offline:
+            covers.log(f"      ⏸️  pageCount not cached (offline)")
+            return 'offline'
+        covers.log(f"      ❌ pageCount not found")
+        return 'not_found'
+
+    def lookup(self, ctx):
+        """(pageCount, source) for the work, trying every reading's ISBN"""
+        isbns = [reading['isbn'] for reading in ctx.readings() if reading.get('isbn')]
+        if not isbns:
+            covers.log(f"      ⚠️  No ISBN, skipping pageCount")
+            return None, None
+        for isbn in isbns:
+            page_count = open_library.page_count_for_isbn(isbn)
+            if page_count:
+                return page_count, 'openlibrary:bulk'
+        page_count = google_books.page_count_from_volume(ctx.isbn_volume())
+        if page_count:
+            return page_count, 'google:isbn'
+        if ctx.book.get('title') and ctx.book.get('author'):
+            page_count = google_books.page_count_from_volume(ctx.search_volume())
+            if page_count:
+                return page_count, 'google:search'
+        return None, None
+
+class CoverStage:
+    """
+    Download a missing cover through the provider waterfall
+    Readings of the same work share one download and one cover file
+    """
+    name = 'covers'
+
+    def needs_metadata(self, ctx):
+        """Whether the work still needs a cover from the providers"""
+        return not ctx.catalogue.shared_cover(ctx.book)
+
+    def run(self, ctx):
+        book = ctx.book
+        filename = ctx.catalogue.shared_cover(book)
+        if filename:
+            book['coverImage'] = f"/covers/{filename}"
+            return 'already_exists'
+        if http_client.get_client().offline:
+            # Images are never cached, so there is nothing to download
+            covers.log(f"      ⏸️  cover not downloaded (offline)")
+            return 'offline'
+        (outcome, filename), shared = ctx.flights.do(('cover', ctx.work), lambda: self.fetch(ctx))
+        book['coverImage'] = '' if outcome == 'failed' else f"/covers/{filename}"
+        return 'already_exists' if shared and outcome != 'failed' else outcome
+
+    def fetch(self, ctx):
+        """(outcome, filename) of one download for the work"""
+        filename = ctx.catalogue.shared_cover(ctx.book)
+        if filename:
+            return 'already_exists', filename
+        output_path = ctx.cover_path
+        outcome = covers.fetch_cover(ctx.catalogue.work_lead(ctx.book), output_path,
+                                     volume_info=ctx.cover_volume(), attempts=ctx.attempts)
+        if outcome != 'failed':
+            ctx.covers.add(output_path.name)
+        return outcome, output_path.name
+
+class ManualCoverStage:
+    """Link covers that were added to public/covers by hand"""
+    name = 'manual'
+
+    def run(self, ctx):
+        result = link_manual_cover(ctx.book, ctx.covers)
+        if result == 'missing':
+            ctx.issues.append(f"cover file missing: {ctx.book['coverImage']}")
+        return result or 'unchanged'
+
+class PlaceholderStage:
+    """Store a tiny inline preview of the book's cover"""
+    name = 'placeholders'
+
+    def run(self, ctx):
+        name = cover_name(ctx.book.get('coverImage'))
+        data_uri = None
+        if name and name in ctx.covers:
+            with instrumentation.span('image.placeholder'):
+                data_uri = cover_placeholders.get_cache().for_file(ctx.covers.path(name))
+        changed = cover_placeholders.apply_placeholder(ctx.book, data_uri)
+        if not data_uri:
+            return 'cleared' if changed else 'no_cover'
+        return 'updated' if changed else 'unchanged'
+
+class ValidationStage:
+    """Check required fields and formats; problems are reported, not fixed"""
+    name = 'validate'
+
+    def run(self, ctx):
+        book = ctx.book
+        for field in ('id', 'title', 'author'):
+            if not book.get(field):
+                ctx.issues.append(f"missing {field}")
+        page_count = book.get('pageCount')
+        if page_count is not None and not (isinstance(page_count, int) and page_count > 0):
+            ctx.issues.append(f"invalid pageCount: {page_count!r}")
+        dates_read = book.get('datesRead')
+        if dates_read and not DATES_READ_PATTERN.match(dates_read):
+            ctx.issues.append(f"invalid datesRead: {dates_read!r}")
+        cover = book.get('coverImage')
+        if cover and cover_name(cover) not in ctx.covers:
+            issue = f"cover file missing: {cover}"
+            if issue not in ctx.issues:
+                ctx.issues.append(issue)
+        return 'invalid' if ctx.issues else 'ok'
+
+STAGES = {
+    'pages': PageCountStage,
+    'covers': CoverStage,
+    'manual': ManualCoverStage,
+    'placeholders': PlaceholderStage,
+    'validate': ValidationStage,
+}
+
+def enrich_book(ctx, stages):
+    """Run every stage for one book; returns ({stage: outcome}, log lines)"""
+    outcomes = {}
+    with covers.capture_log() as lines, instrumentation.book_context(ctx.book.get('id')), \
+            instrumentation.span('book'):
+        covers.log(f"   {ctx.position}. '{ctx.book.get('title')}' by {ctx.book.get('author')}")
+        for stage in stages:
+            with instrumentation.span('stage', stage=stage.name) as fields:
+                outcomes[stage.name] = fields['outcome'] = stage.run(ctx)
+        for issue in ctx.issues:
+            covers.log(f"      ⚠️  {issue}")
+    return outcomes, lines
+
+def journal_book(journal, ctx, before, future):
+    """Done-callback: journal the fields a finished book changed and its stage outcomes"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    outcomes, lines = future.result()
+    fields = {key: value for key, value in ctx.book.items() if before.get(key) != value}
+    journal.record(ctx.book.get('id'), fields, {'stages': outcomes, 'attempts': ctx.attempts,
+                                               'metadata_source': ctx.metadata_source})
+
+def run_pipeline(catalogue, stages, workers=4, verbose=False, manifest=None, force=False, only=None,
+                 journal=None):
+    """
+    Enrich every book in the catalogue in place, or only the books whose ids are in only
+    With a manifest, books whose inputs are unchanged and whose retry window
+    has not passed are skipped, and every processed book is recorded
+    With a journal, each book is recorded as soon as it finishes and books
+    already journaled (replayed by the caller) are not enriched again
+    Returns (Counter of 'stage.outcome', list of (year, book, issues))
+    """
+    stats = Counter()
+    contexts = []
+    flights = SingleFlight()
+    for year, position, book in catalogue:
+        if only is not None and book.get('id') not in only:
+            continue
+        ctx = BookContext(year, position, book, catalogue, flights)
+        entry = journal.get(book.get('id')) if journal is not None else None
+        if entry is not None:
+            if manifest is not None:
+                outcome = entry.get('outcome') or {}
+                manifest.record(book, ctx.cover_path, outcome.get('stages', {}),
+                                attempts=outcome.get('attempts', ()),
+                                metadata_source=outcome.get('metadata_source'))
+                stats['manifest.processed'] += 1
+            stats['journal.resumed'] += 1
+            continue
+        if manifest is not None and not force and manifest.needs_work(book, ctx.cover_path) is None:
+            stats['manifest.unchanged'] += 1
+            continue
+        contexts.append(ctx)
+
+    # Resolve Open Library metadata in a few bulk requests, only for the books
+    # whose page count or cover will actually be looked up
+    metadata_stages = [stage for stage in stages if hasattr(stage, 'needs_metadata')]
+    isbns = [reading['isbn'] for ctx in contexts
+             if any(stage.needs_metadata(ctx) for stage in metadata_stages)
+             for reading in ctx.readings() if reading.get('isbn')]
+    if isbns:
+        stats['openlibrary.bulk_resolved'] += open_library.resolve_isbns(isbns)
+
+    problems = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        try:
+            futures = []
+            for ctx in contexts:
+                before = dict(ctx.book)
+                future = executor.submit(enrich_book, ctx, stages)
+                if journal is not None:
+                    future.add_done_callback(lambda done, ctx=ctx, before=before:
+                                             journal_book(journal, ctx, before, done))
+                futures.append(future)
+            current_year = None
+            for ctx, future in zip(contexts, futures):
+                outcomes, lines = future.result()
+                if ctx.year != current_year:
+                    current_year = ctx.year
+                    print(f"📅 {current_year} ({len(catalogue.data[current_year].get('books', []))} books)")
+                # Only show books where something happened unless --verbose
+                if verbose or len(lines) > 1:
+                    for line in lines:
+                        print(line)
+                for stage_name, outcome in outcomes.items():
+                    stats[f"{stage_name}.{outcome}"] += 1
+                if manifest is not None:
+                    manifest.record(ctx.book, ctx.cover_path, outcomes,
+                                    attempts=ctx.attempts, metadata_source=ctx.metadata_source)
+                    stats['manifest.processed'] += 1
+                if ctx.issues:
+                    problems.append((ctx.year, ctx.book, ctx.issues))
+        except (KeyboardInterrupt, Exception):
+            # Drop the queued books so Ctrl-C only waits for the ones in flight
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    if flights.stats['shared']:
+        stats['works.coalesced'] += flights.stats['shared']
+    return stats, problems
+
+def print_summary(stats, problems, stage_names):
+    print("\n" + "=" * 70)
+    print("📊 ENRICHMENT SUMMARY")
+    print("=" * 70)
+    for stage_name in ['manifest', 'journal', 'openlibrary', 'works'] + list(stage_names):
+        outcomes = {key.split('.', 1)[1]: count for key, count in stats.items()
+                    if key.startswith(stage_name + '.')}
+        summary = ', '.join(f"{outcome}: {count}" for outcome, count in sorted(outcomes.items()))
+        if summary:
+            print(f"{stage_name:12} {summary}")
+    if problems:
+        print(f"\n⚠️  {len(problems)} book(s) with validation issues:")
+        for year, book, issues in problems[:20]:
+            print(f"   • {book.get('title')} ({year}): {'; '.join(issues)}")
+
+def add_run_arguments(parser):
+    """Register the options enrichment_run() reads (HTTP client, instrumentation, provider order)"""
+    parser.add_argument('--fixed-order', action='store_true',
+                        help="Try cover providers in the fixed order instead of the learned one")
+    http_client.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+
+@contextmanager
+def enrichment_run(args, stage_names, save=True):
+    """
+    Configure the process-wide helpers for a pipeline run and tear them down
+    Yields the HTTP client. On exit the cover hash, placeholder and provider
+    caches are saved (unless save is False, as for a dry run) and, after a
+    clean run, the helpers' summaries are printed.
+    """
+    client = http_client.configure_from_args(args, pool_size=max(16, args.workers))
+    instrumentation.configure_from_args(args)
+    provider_stats.configure(adaptive=not args.fixed_order)
+    if 'covers' in stage_names:
+        placeholders_added = cover_hashes.seed_known_placeholders()
+        if placeholders_added:
+            print(f"🚫 Recorded {placeholders_added} provider placeholder image(s) to reject\n")
+    try:
+        yield client
+    except BaseException:
+        if save:
+            save_caches()
+        instrumentation.finish()
+        raise
+    if save:
+        save_caches()
+    provider_stats.print_summary()
+    client.print_summary()
+    instrumentation.print_summary()
+    instrumentation.finish()
+
+def save_caches():
+    cover_hashes.save_all()
+    cover_placeholders.save_all()
+    provider_stats.save_all()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Enrich books.json in a single pass")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"Comma-separated stages to run (default: {','.join(STAGES)})")
+    parser.add_argument('--books', type=Path, default=BOOKS_FILE,
+                        help="Path to books.json")
+    parser.add_argument('--covers-dir', type=Path, default=COVERS_DIR,
+                        help="Directory holding cover images")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Number of books enriched concurrently (default: 4)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Run the stages but do not write books.json")
+    parser.add_argument('--force', action='store_true',
+                        help="Process every book, ignoring the manifest's skip decisions")
+    parser.add_argument('--no-manifest', action='store_true',
+                        help="Neither read nor update the enrichment manifest")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Log every book, not only those that changed")
+    add_run_arguments(parser)
+    checkpoints.add_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    stage_names = [name.strip() for name in args.stages.split(',') if name.strip()]
+    unknown = [name for name in stage_names if name not in STAGES]
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    stages = [STAGES[name]() for name in stage_names]
+    args.covers_dir.mkdir(exist_ok=True, parents=True)
+
+    with enrichment_run(args, stage_names, save=not args.dry_run):
+        catalogue = Catalogue.load(args.books, args.covers_dir)
+        manifest = None if args.no_manifest else Manifest()
+
+        # Finished books are journaled as they complete so an interrupted run can --resume
+        journal = None
+        if not args.dry_run:
+            journal = checkpoints.open_from_args(args, 'enrich', args.books)
+            journal.replay(catalogue)
+
+        print(f"✨ Enriching {args.books} ({', '.join(stage_names)})...\n")
+        try:
+            stats, problems = run_pipeline(catalogue, stages, workers=args.workers, verbose=args.verbose,
+                                           manifest=manifest, force=args.force, journal=journal)
+        finally:
+            if journal is not None:
+                journal.close()
+
+        written = False
+        if not args.dry_run:
+            if stats['manifest.processed'] or manifest is None:
+                catalogue.save()
+                written = True
+            if manifest is not None:
+                manifest.save()
+            # Save updated JSON, then drop the journal it supersedes
+            journal.finish()
+
+        print_summary(stats, problems, stage_names)
+        if written:
+            print(f"\n📄 Updated: {args.books.absolute()}")
+        elif args.dry_run:
+            print(f"\n📄 Dry run: {args.books} not written")
+        else:
+            print(f"\nℹ️  Nothing to do: every book is up to date")
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,21 @@
 #!/usr/bin/env python3
 """
-Fetch missing pageCount values from Google Books API using ISBNs
+Fetch missing pageCount values using ISBNs
+Page counts come from Open Library's bulk API where it knows the ISBN, and
+from Google Books otherwise. Readings of the same work (rereads, other
+editions) share one lookup, and a reading without an ISBN can borrow one
+from another reading of its work.
 """
 
-import json
-import time
-import requests
-from pathlib import Path
+import argparse
+
+import google_books
+import http_client
+import instrumentation
+import journal as checkpoints
+import open_library
+from catalogue import BOOKS_FILE, Catalogue
+from single_flight import SingleFlight
 
 def get_page_count_from_google_books(isbn, title, author):
     """
@@ -18,112 +27,147 @@ def get_page_count_from_google_books(isbn, title, author):
     
     try:
         # Try ISBN search first (most reliable)
-        isbn_clean = isbn.replace('-', '').replace(' ', '')
-        api_url = f"https://www.googleapis.com/books/v1/volumes?q=isbn:{isbn_clean}&maxResults=1"
-        
-        response = requests.get(api_url, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if 'items' in data and len(data['items']) > 0:
-                volume_info = data['items'][0].get('volumeInfo', {})
-                page_count = volume_info.get('pageCount')
-                
-                if page_count and isinstance(page_count, int) and page_count > 0:
-                    return page_count
+        page_count = google_books.page_count_from_volume(google_books.volume_by_isbn(isbn))
+        if page_count:
+            return page_count
         
         # Fallback to title/author search
         if title and author:
-            query = f"{title} {author}".strip()
-            encoded_query = requests.utils.quote(query)
-            api_url = f"https://www.googleapis.com/books/v1/volumes?q={encoded_query}&maxResults=1"
-            
-            response = requests.get(api_url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if 'items' in data and len(data['items']) > 0:
-                    volume_info = data['items'][0].get('volumeInfo', {})
-                    page_count = volume_info.get('pageCount')
-                    
-                    if page_count and isinstance(page_count, int) and page_count > 0:
-                        return page_count
+            return google_books.page_count_from_volume(
+                google_books.volume_by_title_author(title, author))
         
     except Exception as e:
         print(f"      Error fetching pageCount: {e}")
     
     return None
 
+def lookup_work_page_count(catalogue, book):
+    """(pageCount, source) for a book's work, trying every reading's ISBN"""
+    readings = catalogue.readings(book)
+    for reading in readings:
+        page_count = reading.get('pageCount')
+        if isinstance(page_count, int) and page_count > 0:
+            return page_count, 'another reading'
+    isbns = [reading['isbn'] for reading in readings if reading.get('isbn')]
+    for isbn in isbns:
+        page_count = open_library.page_count_for_isbn(isbn)
+        if page_count:
+            return page_count, 'Open Library bulk lookup'
+    for isbn in isbns:
+        print(f"      Searching for pageCount (ISBN: {isbn})...")
+        page_count = get_page_count_from_google_books(isbn, book.get('title', ''), book.get('author', ''))
+        if page_count:
+            return page_count, 'Google Books'
+    return None, None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch missing pageCount values from Open Library and Google Books")
+    http_client.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    checkpoints.add_arguments(parser)
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    client = http_client.configure_from_args(args)
+    instrumentation.configure_from_args(args)
+    
     # Load the books data
-    books_file = Path('../src/data/books.json')
-    with open(books_file, 'r', encoding='utf-8') as f:
-        books_data = json.load(f)
+    catalogue = Catalogue.load()
+    
+    # Each lookup is journaled so an interrupted run can --resume without repeating it
+    journal = checkpoints.open_from_args(args, 'fetch_page_counts', BOOKS_FILE)
+    resumed = journal.replay(catalogue)
     
     print("📚 Starting pageCount fetch for missing values...\n")
     
+    missing = [book['isbn'] for year, position, book in catalogue
+               if book.get('isbn') and book.get('id') not in journal
+               and not (isinstance(book.get('pageCount'), int) and book['pageCount'] > 0)]
+    if missing:
+        with instrumentation.span('metadata.bulk', provider='openlibrary'):
+            found = open_library.resolve_isbns(missing)
+        print(f"🔎 Open Library bulk lookup: {found} of {len(missing)} ISBNs known\n")
+    
     stats = {
         'total_checked': 0,
         'found': 0,
         'not_found': 0,
-        'already_has': 0
+        'already_has': 0,
+        'shared': 0
     }
+    flights = SingleFlight()
     
     # Process each year
-    for year, year_data in books_data.items():
-        books = year_data.get('books', [])
-        print(f"📅 Processing {year} ({len(books)} books)...")
-        
-        for i, book in enumerate(books):
-            title = book.get('title', '')
-            author = book.get('author', '')
-            isbn = book.get('isbn', '')
-            current_page_count = book.get('pageCount')
-            
-            # Skip if already has pageCount
-            if current_page_count and isinstance(current_page_count, int) and current_page_count > 0:
-                stats['already_has'] += 1
-                continue
-            
-            stats['total_checked'] += 1
-            print(f"   {i+1}. '{title}' by {author}")
-            
-            if not isbn:
-                print(f"      ⚠️  No ISBN, skipping")
-                stats['not_found'] += 1
-                continue
-            
-            print(f"      Searching for pageCount (ISBN: {isbn})...")
-            page_count = get_page_count_from_google_books(isbn, title, author)
+    try:
+        for year, books in catalogue.years():
+            print(f"📅 Processing {year} ({len(books)} books)...")
             
-            if page_count:
-                book['pageCount'] = page_count
-                print(f"      ✅ Found: {page_count} pages")
-                stats['found'] += 1
-            else:
-                print(f"      ❌ Not found")
-                stats['not_found'] += 1
+            for i, book in enumerate(books):
+                title = book.get('title', '')
+                author = book.get('author', '')
+                current_page_count = book.get('pageCount')
+                
+                # Skip if already has pageCount
+                if current_page_count and isinstance(current_page_count, int) and current_page_count > 0:
+                    stats['already_has'] += 1
+                    continue
+                
+                stats['total_checked'] += 1
+                print(f"   {i+1}. '{title}' by {author}")
+                
+                if book.get('id') in journal:
+                    print(f"      ↩️  Not found in the interrupted run, skipping")
+                    stats['not_found'] += 1
+                    continue
+                
+                if not any(reading.get('isbn') for reading in catalogue.readings(book)):
+                    print(f"      ⚠️  No ISBN, skipping")
+                    stats['not_found'] += 1
+                    continue
+                
+                with instrumentation.book_context(book.get('id')), instrumentation.span('book') as fields:
+                    (page_count, source), shared = flights.do(
+                        catalogue.work_id(book), lambda: lookup_work_page_count(catalogue, book))
+                    fields['found'] = bool(page_count)
+                    fields['shared'] = shared
+                
+                if shared:
+                    stats['shared'] += 1
+                if page_count:
+                    book['pageCount'] = page_count
+                    print(f"      ✅ Found: {page_count} pages (via {source}{', shared with another reading' if shared else ''})")
+                    stats['found'] += 1
+                    journal.record(book.get('id'), {'pageCount': page_count}, 'found')
+                else:
+                    print(f"      ❌ Not found")
+                    stats['not_found'] += 1
+                    journal.record(book.get('id'), {}, 'not_found')
+                
             
-            # Rate limiting
-            time.sleep(0.5)
-        
-        print()
+            print()
+    finally:
+        journal.close()
     
-    # Save updated JSON
-    with open(books_file, 'w', encoding='utf-8') as f:
-        json.dump(books_data, f, indent=2, ensure_ascii=False)
+    # Save updated JSON, then drop the journal it supersedes
+    catalogue.save()
+    journal.finish()
     
     # Print summary
     print("=" * 70)
     print("📊 SUMMARY")
     print("=" * 70)
     print(f"Total books checked:           {stats['total_checked']}")
+    if resumed:
+        print(f"↩️  Resumed from journal:       {resumed}")
     print(f"✅ Already had pageCount:      {stats['already_has']}")
     print(f"✅ Found and added:            {stats['found']}")
     print(f"❌ Not found:                  {stats['not_found']}")
-    print(f"\n📄 Updated: {books_file.absolute()}")
+    print(f"🔗 Shared with another reading: {stats['shared']}")
+    print(f"\n📄 Updated: {catalogue.path.absolute()}")
+    client.print_summary()
+    instrumentation.print_summary()
+    instrumentation.finish()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Google Books volume lookups shared by the page-count and cover scripts
+One volumeInfo answers both pageCount and imageLinks, so callers should fetch
+it once per book and read both fields from it
+"""
+
+import re
+import urllib.parse
+
+import http_client
+
+VOLUMES_URL = "https://www.googleapis.com/books/v1/volumes"
+
+def clean_isbn(isbn):
+    return (isbn or '').replace('-', '').replace(' ', '')
+
+def search_volume(query, cancelled=None):
+    """Return the volumeInfo of the first result for a query, or None"""
+    api_url = f"{VOLUMES_URL}?q={query}&maxResults=1"
+    response = http_client.get_client().get_json(api_url, cancelled=cancelled)
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    if 'items' in data and len(data['items']) > 0:
+        return data['items'][0].get('volumeInfo', {})
+    return None
+
+def volume_by_isbn(isbn):
+    """volumeInfo for an exact ISBN match, or None"""
+    isbn_clean = clean_isbn(isbn)
+    if not isbn_clean:
+        return None
+    return search_volume(f"isbn:{isbn_clean}")
+
+def volume_by_title_author(title, author, cancelled=None):
+    """volumeInfo for the first (most popular) title/author match, or None"""
+    query = f"{title} {author}".strip()
+    if not query:
+        return None
+    return search_volume(urllib.parse.quote(query), cancelled)
+
+def page_count_from_volume(volume_info):
+    """Positive integer pageCount from a volumeInfo, or None"""
+    if not volume_info:
+        return None
+    page_count = volume_info.get('pageCount')
+    if page_count and isinstance(page_count, int) and page_count > 0:
+        return page_count
+    return None
+
+def cover_url_from_volume(volume_info):
+    """Highest-quality cover URL from a volumeInfo's imageLinks, or None"""
+    if not volume_info:
+        return None
+    image_links = volume_info.get('imageLinks', {})
+
+    # Try to get the highest quality image available (prioritize extraLarge)
+    cover_url = (
+        image_links.get('extraLarge') or
+        image_links.get('large') or
+        image_links.get('medium') or
+        image_links.get('small') or
+        image_links.get('thumbnail')
+    )
+    if not cover_url:
+        return None
+
+    # Google Books uses HTTP, convert to HTTPS
+    cover_url = cover_url.replace('http://', 'https://')
+    # Remove edge=curl parameter for better quality
+    cover_url = cover_url.replace('&edge=curl', '').replace('?edge=curl', '')
+    # Remove zoom parameters that reduce quality
+    return re.sub(r'[?&]zoom=\d+', '', cover_url)
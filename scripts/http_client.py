@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the cover and metadata scripts
+Keeps one pooled keep-alive session per host, retries throttled or failing
+requests with exponential backoff (honouring Retry-After) and counts
+requests, retries and bytes per host. JSON metadata lookups go through the
+on-disk response cache when one is configured.
+"""
+
+import email.utils
+import random
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+from rate_limiter import provider_for_url, throttle
+from response_cache import CachedResponse, ResponseCache
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Statuses worth remembering: hits and definitive misses
+CACHEABLE_STATUSES = {200, 404, 410}
+
+class OfflineError(requests.RequestException):
+    """Raised when a request would hit the network in --offline mode"""
+
+class CancelledError(requests.RequestException):
+    """Raised when a request's cancelled event is set before it is sent"""
+
+_local = threading.local()
+
+def transport_failures():
+    """
+    Requests on this thread that ended in an exception instead of a response
+    (offline, cancelled, out of retries, or a body cut off mid-stream).
+    Callers compare it before and after a lookup that swallows errors, to
+    tell "the provider had nothing" from "the provider was never reached"
+    """
+    return getattr(_local, 'failures', 0)
+
+def _count_failure():
+    _local.failures = transport_failures() + 1
+
+class HttpClient:
+    """
+    Pooled HTTP client with per-host sessions, retries and counters
+    """
+
+    def __init__(self, timeout=10, max_retries=3, backoff=0.5, max_backoff=30.0, pool_size=16,
+                 cache=None, offline=False, url_rewriter=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.cache = cache
+        self.offline = offline
+        # Maps a provider URL to the URL actually fetched (used by the replay benchmark)
+        self.url_rewriter = url_rewriter
+        self.headers = {'User-Agent': 'lea.earth-books-scripts/1.0'}
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def _count(self, host, key, amount=1):
+        with self._lock:
+            counters = self._stats.setdefault(host, {'requests': 0, 'retries': 0, 'errors': 0, 'bytes': 0})
+            counters[key] += amount
+        if key == 'bytes':
+            instrumentation.increment('http_bytes_total', amount, provider=provider_for_url(f"//{host}") or host)
+
+    def _retry_delay(self, attempt, response=None):
+        """Seconds to wait before the next attempt, preferring Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(self.max_backoff, max(0.0, float(retry_after)))
+                except ValueError:
+                    try:
+                        parsed = email.utils.parsedate_to_datetime(retry_after)
+                    except (TypeError, ValueError):
+                        # Malformed header: fall back to the normal backoff
+                        parsed = None
+                    if parsed is not None:
+                        return min(self.max_backoff, max(0.0, parsed.timestamp() - time.time()))
+        delay = self.backoff * (2 ** attempt)
+        return min(self.max_backoff, delay + random.uniform(0, self.backoff))
+
+    def _pause(self, delay, cancelled):
+        """Sleep before a retry; raises CancelledError if cancelled meanwhile"""
+        if cancelled is None:
+            time.sleep(delay)
+        elif cancelled.wait(delay):
+            raise CancelledError("cancelled while waiting to retry")
+
+    def get(self, url, stream=False, timeout=None, cancelled=None):
+        """
+        GET a URL, retrying 429/5xx responses and connection errors
+        Returns the final response; raises the last exception if every attempt failed
+        cancelled is an optional threading.Event: once it is set no further
+        attempt (or rate-limit wait) starts and CancelledError is raised
+        """
+        try:
+            return self._get(url, stream, timeout, cancelled)
+        except requests.RequestException:
+            _count_failure()
+            raise
+
+    def _get(self, url, stream, timeout, cancelled):
+        if self.offline:
+            raise OfflineError(f"offline mode: {url} is not cached")
+        host = urllib.parse.urlsplit(url).hostname or ''
+        session = self._session(host)
+        timeout = timeout if timeout is not None else self.timeout
+        target = self.url_rewriter(url) if self.url_rewriter else url
+        provider = provider_for_url(url) or host
+
+        for attempt in range(self.max_retries + 1):
+            if not throttle(url, cancelled) or (cancelled is not None and cancelled.is_set()):
+                raise CancelledError(f"cancelled: {url}")
+            self._count(host, 'requests')
+            started = time.perf_counter()
+            try:
+                response = session.get(target, timeout=timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._count(host, 'errors')
+                instrumentation.increment('http_requests_total', provider=provider, status=type(e).__name__)
+                if attempt == self.max_retries:
+                    raise
+                self._count(host, 'retries')
+                instrumentation.increment('http_retries_total', provider=provider)
+                self._pause(self._retry_delay(attempt), cancelled)
+                continue
+            # Time to headers (plus the body when not streaming)
+            instrumentation.observe('http_request_seconds', time.perf_counter() - started, provider=provider)
+            instrumentation.increment('http_requests_total', provider=provider, status=response.status_code)
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._retry_delay(attempt, response)
+                response.close()
+                self._count(host, 'retries')
+                instrumentation.increment('http_retries_total', provider=provider)
+                self._pause(delay, cancelled)
+                continue
+
+            response.request_host = host
+            if not stream:
+                self._count(host, 'bytes', len(response.content))
+            return response
+
+    def get_json(self, url, timeout=None, cancelled=None):
+        """
+        GET a JSON metadata URL through the response cache
+        Returns a response-like object with status_code and json()
+        """
+        with instrumentation.span('metadata.lookup', provider=provider_for_url(url)) as fields:
+            if self.cache is not None:
+                cached = self.cache.get(url, allow_stale=self.offline)
+                if cached is not None:
+                    fields.update(url=url, cached=True, status=cached.status_code)
+                    return cached
+            response = self.get(url, timeout=timeout, cancelled=cancelled)
+            fields.update(url=url, cached=False, status=response.status_code)
+            if self.cache is not None and response.status_code in CACHEABLE_STATUSES:
+                self.cache.put(url, response.status_code, response.content)
+            return CachedResponse(url, response.status_code, response.content)
+
+    def iter_content(self, response, chunk_size=64 * 1024):
+        """Iterate a streamed response body, counting the bytes received"""
+        host = getattr(response, 'request_host', None) or urllib.parse.urlsplit(response.url).hostname or ''
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                self._count(host, 'bytes', len(chunk))
+                yield chunk
+        except requests.RequestException:
+            _count_failure()
+            raise
+
+    def stats(self):
+        """Snapshot of the per-host counters"""
+        with self._lock:
+            return {host: dict(counters) for host, counters in self._stats.items()}
+
+    def print_summary(self):
+        """Print per-host request counters"""
+        if self.cache is not None:
+            print(f"\n🗄️  Response cache: {self.cache.hits} hits, {self.cache.misses} misses")
+        stats = self.stats()
+        if not stats:
+            return
+        print("\n🌐 HTTP by host:")
+        for host, counters in sorted(stats.items()):
+            print(f"   {host:32} {counters['requests']:5} req  {counters['retries']:4} retries  "
+                  f"{counters['errors']:4} errors  {counters['bytes'] / 1024:9.1f} KB")
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the process-wide shared client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+def configure(**options):
+    """Replace the shared client with one built from the given options"""
+    global _client
+    with _client_lock:
+        _client = HttpClient(**options)
+        return _client
+
+def add_arguments(parser):
+    """Register the shared network/cache command-line flags on a parser"""
+    parser.add_argument('--timeout', type=float, default=10,
+                        help="Per-request timeout in seconds (default: 10)")
+    parser.add_argument('--retries', type=int, default=3,
+                        help="Retries for 429/5xx and connection errors (default: 3)")
+    parser.add_argument('--offline', action='store_true',
+                        help="Serve metadata only from the response cache; never touch the network")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Bypass the on-disk response cache")
+
+def configure_from_args(args, **options):
+    """Configure the shared client from parsed add_arguments() flags"""
+    cache = None if args.no_cache else ResponseCache()
+    return configure(timeout=args.timeout, max_retries=args.retries,
+                     cache=cache, offline=args.offline, **options)
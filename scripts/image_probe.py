@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Read image dimensions from the first bytes of a file or download
+PIL's Image.open only parses the header, so no pixel data is decoded
+"""
+
+import io
+
+from PIL import Image
+
+# Give up probing once this much of the header has been seen
+MAX_HEADER_BYTES = 256 * 1024
+
+# Bytes to collect before the first parse attempt
+FIRST_PARSE_BYTES = 1024
+
+class ImageProbe:
+    """
+    Incremental header reader: feed() chunks until size is known
+    The buffer is re-parsed only each time it has doubled, so probing costs
+    time linear in the bytes fed rather than quadratic
+    """
+
+    def __init__(self, max_header_bytes=MAX_HEADER_BYTES):
+        self.max_header_bytes = max_header_bytes
+        self.size = None
+        self.format = None
+        self.failed = False
+        self._buffer = bytearray()
+        self._next_parse = FIRST_PARSE_BYTES
+
+    @property
+    def done(self):
+        return self.size is not None or self.failed
+
+    def feed(self, chunk):
+        """Add bytes; returns True once the size is known or probing gave up"""
+        if self.done:
+            return True
+        self._buffer.extend(chunk)
+        at_limit = len(self._buffer) >= self.max_header_bytes
+        if len(self._buffer) >= self._next_parse or at_limit:
+            self._next_parse = 2 * len(self._buffer)
+            try:
+                with Image.open(io.BytesIO(self._buffer)) as img:
+                    self.size = img.size
+                    self.format = img.format
+            except Exception:
+                if at_limit:
+                    self.failed = True
+                    self._buffer = bytearray()
+        return self.done
+
+    def finish(self):
+        """Parse whatever was fed (a body shorter than the next parse point); returns the size or None"""
+        if not self.done and self._buffer:
+            self._next_parse = 0
+            self.feed(b'')
+        return self.size
+
+def probe_image_size(data):
+    """(width, height) from leading image bytes, or None if not recognised"""
+    probe = ImageProbe()
+    probe.feed(data)
+    return probe.finish()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Merge a StoryGraph or Goodreads CSV export into books.json
+Reads the export one row at a time (memory stays flat however long it is),
+matches each finished book to an existing entry by id, ISBN or normalized
+title/author, and applies only the fields whose values changed. Empty export
+cells never erase existing data, and tags are merged so hand-added ones such
+as 'favorites' survive. Unmatched rows become new books in the year their
+first read started. books.json is written atomically, and only when something
+changed.
+
+New books and books whose ISBN, title or author changed are picked up by the
+next enrich.py run through its manifest; --enrich runs it straight away for
+just those books.
+
+    python3 import_export.py ~/Downloads/storygraph_export.csv
+"""
+
+import argparse
+import copy
+import csv
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import enrich
+from catalogue import BOOKS_FILE, COVERS_DIR, Catalogue, canonical_isbn, normalize_text
+from enrich import DATES_READ_PATTERN
+from manifest import Manifest
+
+# Every field a books.json entry carries, with the value a new book starts from
+NEW_BOOK_DEFAULTS = {
+    'title': '', 'author': '', 'isbn': '', 'coverImage': '', 'format': None, 'rating': None,
+    'readCount': 1, 'tags': [], 'moods': [], 'pace': None, 'characterOrPlot': None, 'review': None,
+    'fictionType': None, 'genres': [], 'pageCount': None, 'datesRead': None,
+}
+
+# Changing these can change which cover and metadata belong to the book
+IDENTITY_FIELDS = ('isbn', 'title', 'author')
+
+# Goodreads shelves that are reading states rather than tags
+GOODREADS_STATUS_SHELVES = {'read', 'to-read', 'currently-reading'}
+
+DATE_PATTERN = re.compile(r'^(\d{4})[/-](\d{2})[/-](\d{2})$')
+SERIES_SUFFIX = re.compile(r'\s*\([^()]*#[^()]*\)\s*$')
+
+def clean(value):
+    """Strip a CSV cell, including Goodreads' ="..." quoting"""
+    value = (value or '').strip()
+    if value.startswith('="') and value.endswith('"'):
+        value = value[2:-1].strip()
+    return value
+
+def split_list(value):
+    return [item.strip() for item in clean(value).split(',') if item.strip()]
+
+def parse_date(value):
+    """'YYYY/MM/DD' or 'YYYY-MM-DD' -> 'YYYY/MM/DD', or None"""
+    match = DATE_PATTERN.match(clean(value))
+    return '/'.join(match.groups()) if match else None
+
+def parse_isbn(value):
+    """Digits-only ISBN-10/13, or '' for StoryGraph UIDs and blanks"""
+    digits = re.sub(r'[^0-9Xx]', '', clean(value)).upper()
+    return digits if len(digits) in (10, 13) else ''
+
+def parse_number(value, kind=float):
+    try:
+        number = kind(clean(value))
+    except ValueError:
+        return None
+    return number if number > 0 else None
+
+def storygraph_fields(row):
+    """(status, fields) for a StoryGraph export row"""
+    fields = {
+        'title': clean(row.get('Title')),
+        'author': clean(row.get('Authors')),
+        'isbn': parse_isbn(row.get('ISBN/UID')),
+        'format': clean(row.get('Format')).lower() or None,
+        'readCount': parse_number(row.get('Read Count'), int),
+        'moods': split_list(row.get('Moods')),
+        'pace': clean(row.get('Pace')) or None,
+        'characterOrPlot': clean(row.get('Character- or Plot-Driven?')) or None,
+        'rating': parse_number(row.get('Star Rating')),
+        'review': clean(row.get('Review')) or None,
+        'tags': split_list(row.get('Tags')),
+    }
+    dates_read = clean(row.get('Dates Read'))
+    if not DATES_READ_PATTERN.match(dates_read):
+        last = parse_date(row.get('Last Date Read'))
+        dates_read = f"{last}-{last}" if last else None
+    fields['datesRead'] = dates_read
+    return clean(row.get('Read Status')).lower(), fields
+
+def goodreads_fields(row):
+    """(status, fields) for a Goodreads export row"""
+    # Goodreads only records when a book was finished, so its single date is
+    # used for new books but never replaces an existing range
+    finished = parse_date(row.get('Date Read'))
+    fields = {
+        'title': clean(row.get('Title')),
+        'author': clean(row.get('Author')),
+        'isbn': parse_isbn(row.get('ISBN13')) or parse_isbn(row.get('ISBN')),
+        'format': clean(row.get('Binding')).lower() or None,
+        'readCount': parse_number(row.get('Read Count'), int),
+        'rating': parse_number(row.get('My Rating')),
+        'review': clean(row.get('My Review')) or None,
+        'pageCount': parse_number(row.get('Number of Pages'), int),
+        'tags': [shelf for shelf in split_list(row.get('Bookshelves'))
+                 if shelf not in GOODREADS_STATUS_SHELVES],
+        'datesRead': f"{finished}-{finished}" if finished else None,
+    }
+    return clean(row.get('Exclusive Shelf')).lower(), fields
+
+# name -> (header that identifies it, row parser, fields only set on new books)
+FORMATS = {
+    'storygraph': ('Read Status', storygraph_fields, ()),
+    'goodreads': ('Exclusive Shelf', goodreads_fields, ('datesRead',)),
+}
+
+def detect_format(fieldnames):
+    for name, (marker, _, _) in FORMATS.items():
+        if marker in (fieldnames or ()):
+            return name
+    return None
+
+def match_book(catalogue, fields, row_id=None):
+    """Existing reading for an export row, or None"""
+    if row_id:
+        book = catalogue.get(row_id)
+        if book is not None:
+            return book
+    matches = catalogue.find_isbn(fields['isbn']) if fields['isbn'] else []
+    if not matches:
+        matches = catalogue.find_title_author(fields['title'], fields['author'])
+    if not matches and SERIES_SUFFIX.search(fields['title']):
+        matches = catalogue.find_title_author(SERIES_SUFFIX.sub('', fields['title']), fields['author'])
+    if len(matches) > 1 and fields.get('datesRead'):
+        # A reread listed twice: prefer the reading with the same dates
+        matches = [book for book in matches if book.get('datesRead') == fields['datesRead']] or matches
+    return matches[0] if matches else None
+
+def same_identity(field, value, current):
+    """Whether an ISBN, title or author only differs in formatting"""
+    if field == 'isbn':
+        return canonical_isbn(value) == canonical_isbn(current)
+    if field == 'title':
+        value = SERIES_SUFFIX.sub('', value)
+    return normalize_text(value) == normalize_text(current)
+
+def apply_fields(book, fields, skip=()):
+    """Copy changed, non-empty fields onto book; returns the names that changed"""
+    changed = []
+    for field, value in fields.items():
+        if field in skip or value in (None, '', []):
+            continue
+        if field == 'tags':
+            value = list(book.get('tags') or []) + [tag for tag in value if tag not in (book.get('tags') or [])]
+        elif field in IDENTITY_FIELDS and book.get(field) and same_identity(field, value, book[field]):
+            continue
+        if book.get(field) != value:
+            book[field] = value
+            changed.append(field)
+    return changed
+
+def reading_year(fields):
+    """Year a new book is filed under: when its first read started, else this year"""
+    match = re.match(r'(\d{4})/', fields.get('datesRead') or '')
+    return match.group(1) if match else str(date.today().year)
+
+def next_id(catalogue, year, counters):
+    """Unused 'book-{year}-{n}' id"""
+    if year not in counters:
+        pattern = re.compile(rf'^book-{year}-(\d+)$')
+        counters[year] = max((int(match.group(1)) for match in
+                              (pattern.match(book.get('id') or '') for _, _, book in catalogue) if match),
+                             default=0)
+    while True:
+        counters[year] += 1
+        book_id = f"book-{year}-{counters[year]}"
+        if catalogue.get(book_id) is None:
+            return book_id
+
+def import_rows(catalogue, rows, parser, new_only=(), dry_run=False, echo=print):
+    """
+    Merge parsed export rows into the catalogue in place
+    A dry run merges into a scratch copy instead, so a book listed twice is
+    added once and then matched, exactly as in a real run
+    Returns (stats, ids of new books and of books whose identity changed)
+    """
+    if dry_run:
+        catalogue = Catalogue(copy.deepcopy(catalogue.data), path=None, covers_dir=catalogue.covers_dir)
+    stats = {'rows': 0, 'unchanged': 0, 'updated': 0, 'added': 0, 'skipped': 0}
+    touched = set()
+    counters = {}
+    for row in rows:
+        stats['rows'] += 1
+        status, fields = parser(row)
+        if status != 'read' or not fields['title']:
+            stats['skipped'] += 1
+            continue
+        book = match_book(catalogue, fields, clean(row.get('id')))
+        if book is None:
+            year = reading_year(fields)
+            book = {'id': next_id(catalogue, year, counters), **NEW_BOOK_DEFAULTS}
+            apply_fields(book, fields)
+            catalogue.add(year, book)
+            touched.add(book['id'])
+            stats['added'] += 1
+            echo(f"   ➕ {book['title']} by {book['author']} ({year}, {book['id']})")
+            continue
+        indexed = {field: book.get(field) for field in ('id', *IDENTITY_FIELDS)}
+        changed = apply_fields(book, fields, skip=new_only)
+        if not changed:
+            stats['unchanged'] += 1
+            continue
+        stats['updated'] += 1
+        echo(f"   ✏️  {book['title']}: {', '.join(changed)}")
+        if set(changed) & set(IDENTITY_FIELDS):
+            touched.add(book['id'])
+            catalogue.reindex_book(book, indexed)
+    return stats, touched
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge a StoryGraph or Goodreads CSV export into books.json")
+    parser.add_argument('export', type=Path, help="CSV export file")
+    parser.add_argument('--format', choices=sorted(FORMATS),
+                        help="Export format (default: detected from the header)")
+    parser.add_argument('--books', type=Path, default=BOOKS_FILE)
+    parser.add_argument('--covers-dir', type=Path, default=COVERS_DIR)
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Report what would change without writing books.json")
+    parser.add_argument('--enrich', action='store_true',
+                        help="Enrich new and re-identified books (covers, page counts, ...) before saving")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Books enriched concurrently with --enrich (default: 4)")
+    enrich.add_run_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    catalogue = Catalogue.load(args.books, args.covers_dir)
+
+    with open(args.export, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        export_format = args.format or detect_format(reader.fieldnames)
+        if export_format is None:
+            sys.exit(f"❌ {args.export} doesn't look like a StoryGraph or Goodreads export; pass --format")
+        marker, parser, new_only = FORMATS[export_format]
+        print(f"📥 Importing {args.export} ({export_format}) into {args.books}...\n")
+        stats, touched = import_rows(catalogue, reader, parser, new_only, dry_run=args.dry_run)
+
+    enriched = None
+    if args.enrich and touched and not args.dry_run:
+        stage_names = list(enrich.STAGES)
+        with enrich.enrichment_run(args, stage_names):
+            manifest = Manifest()
+            stages = [enrich.STAGES[name]() for name in stage_names]
+            print(f"\n✨ Enriching {len(touched)} new or changed book(s)...\n")
+            enriched, problems = enrich.run_pipeline(catalogue, stages, workers=args.workers,
+                                                     manifest=manifest, only=touched)
+            manifest.save()
+            enrich.print_summary(enriched, problems, stage_names)
+
+    changed = stats['added'] or stats['updated']
+    if changed and not args.dry_run:
+        catalogue.save()
+
+    print("\n" + "=" * 70)
+    print("📊 IMPORT SUMMARY")
+    print("=" * 70)
+    print(f"Rows read:               {stats['rows']}")
+    print(f"⏭️  Not finished/skipped:  {stats['skipped']}")
+    print(f"✓  Unchanged:            {stats['unchanged']}")
+    print(f"✏️  Updated:              {stats['updated']}")
+    print(f"➕ Added:                {stats['added']}")
+    if args.dry_run:
+        print(f"\n📄 Dry run: {args.books} not written")
+    elif changed:
+        print(f"\n📄 Updated: {args.books.absolute()}")
+        if touched and enriched is None:
+            print(f"💡 {len(touched)} new or re-identified book(s); run enrich.py (or --enrich) for covers and page counts")
+    else:
+        print(f"\nℹ️  Nothing to do: books.json already matches the export")
+
+if __name__ == '__main__':
+    main()
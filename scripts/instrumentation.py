@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Lightweight timing and metrics for the enrichment scripts
+span() times a block (a book, a stage, a provider, a download) and, when
+an events file is configured, appends one JSON line per finished span.
+observe() and increment() feed latency histograms and counters, which are
+dumped in Prometheus textfile format at the end of a run. With nothing
+configured, spans only update the in-memory histograms.
+
+    python3 enrich.py --events run.jsonl --metrics run.prom
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    'span_seconds': "Duration of instrumented blocks",
+    'http_request_seconds': "Latency of single HTTP attempts by provider",
+    'http_requests_total': "HTTP attempts by provider and status",
+    'http_retries_total': "Retried HTTP attempts by provider",
+    'http_bytes_total': "Response bytes received by provider",
+}
+
+_lock = threading.Lock()
+_local = threading.local()
+_events = None
+_metrics_path = None
+_histograms = {}   # (name, labels) -> [bucket counts..., +Inf count, sum]
+_counters = {}     # (name, labels) -> value
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+def configure(events_path=None, metrics_path=None):
+    """Start a JSON-lines event log and/or choose where finish() writes metrics"""
+    global _events, _metrics_path
+    with _lock:
+        if _events is not None:
+            _events.close()
+        _events = open(events_path, 'a', encoding='utf-8') if events_path else None
+        _metrics_path = Path(metrics_path) if metrics_path else None
+        _histograms.clear()
+        _counters.clear()
+
+def observe(name, seconds, **labels):
+    """Add one observation to a histogram"""
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+                break
+        else:
+            histogram[len(BUCKETS)] += 1
+        histogram[-1] += seconds
+
+def increment(name, amount=1, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def event(name, **fields):
+    """Append a free-form event to the log (no-op without an events file)"""
+    if _events is None:
+        return
+    record = {'ts': round(time.time(), 6), 'event': name, 'thread': threading.current_thread().name}
+    book = getattr(_local, 'book', None)
+    if book is not None:
+        record['book'] = book
+    record.update(fields)
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        if _events is not None:
+            _events.write(line + '\n')
+
+@contextmanager
+def book_context(book_id):
+    """Tag every span and event on this thread with a book id"""
+    previous = getattr(_local, 'book', None)
+    _local.book = book_id
+    try:
+        yield
+    finally:
+        _local.book = previous
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block; yields a dict whose entries are added to the span's event
+    Exceptions are recorded and re-raised
+    """
+    started = time.perf_counter()
+    fields = dict(attrs)
+    error = None
+    try:
+        yield fields
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        observe('span_seconds', elapsed, span=name, provider=attrs.get('provider'), stage=attrs.get('stage'))
+        if _events is not None:
+            if error:
+                fields['error'] = error
+            event(name, duration_ms=round(elapsed * 1000, 3), **fields)
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+def metrics_text():
+    """Current metrics in Prometheus text exposition format"""
+    with _lock:
+        histograms = {key: list(value) for key, value in _histograms.items()}
+        counters = dict(_counters)
+    lines = []
+    for metric in sorted({name for name, _ in histograms}):
+        full = f"books_{metric}"
+        lines.append(f"# HELP {full} {METRIC_HELP.get(metric, metric)}")
+        lines.append(f"# TYPE {full} histogram")
+        for (name, labels), values in sorted(histograms.items()):
+            if name != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS, values):
+                cumulative += count
+                lines.append(f"{full}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            cumulative += values[len(BUCKETS)]
+            lines.append(f"{full}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{full}_sum{_format_labels(labels)} {values[-1]:.6f}")
+            lines.append(f"{full}_count{_format_labels(labels)} {cumulative}")
+    for metric in sorted({name for name, _ in counters}):
+        full = f"books_{metric}"
+        lines.append(f"# HELP {full} {METRIC_HELP.get(metric, metric)}")
+        lines.append(f"# TYPE {full} counter")
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f"{full}{_format_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+def write_metrics(path):
+    """Write metrics_text() atomically, as node_exporter's textfile collector expects"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(metrics_text())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def print_summary(limit=6):
+    """Print the spans that took the most total time"""
+    with _lock:
+        rows = [(dict(labels), values[-1], sum(values[:-1]))
+                for (name, labels), values in _histograms.items() if name == 'span_seconds']
+    if not rows:
+        return
+    rows.sort(key=lambda row: -row[1])
+    print("\n⏱️  Time by span:")
+    for labels, total, count in rows[:limit]:
+        label = labels.pop('span')
+        if labels:
+            label += f" ({', '.join(labels.values())})"
+        print(f"   {label:40} {total:8.2f}s total  {count:5}×  {total / count * 1000:8.1f} ms avg")
+
+def finish():
+    """Write the metrics file and close the event log"""
+    global _events
+    if _metrics_path is not None:
+        write_metrics(_metrics_path)
+    with _lock:
+        if _events is not None:
+            _events.close()
+            _events = None
+
+def add_arguments(parser):
+    """Register --events/--metrics on a parser"""
+    parser.add_argument('--events', type=Path, metavar='FILE',
+                        help="Append a JSON-lines log of timed spans to FILE")
+    parser.add_argument('--metrics', type=Path, metavar='FILE',
+                        help="Write Prometheus textfile metrics to FILE at the end of the run")
+
+def configure_from_args(args):
+    configure(events_path=args.events, metrics_path=args.metrics)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Append-only checkpoint journal for long-running scripts
+Each finished book is appended as one JSON line (the fields it changed and
+its outcome) and the file is flushed and fsynced every few books, so a
+Ctrl-C, network drop or crash loses at most one checkpoint's worth of work.
+With --resume the journal is replayed onto the freshly loaded books and the
+script skips everything already recorded. The journal is removed once the
+final JSON has been written.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from manifest import file_sha256
+
+CACHE_DIR = Path(__file__).resolve().parent / '.cache'
+
+DEFAULT_CHECKPOINT_EVERY = 10
+
+def journal_path(name):
+    return CACHE_DIR / f"{name}.journal"
+
+def read_entries(path):
+    """
+    (header, {book id: entry}, valid bytes) from a journal; later entries win
+    Reading stops at a torn final line left by a crash mid-write
+    """
+    header, entries, valid = None, {}, 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            valid += len(line)
+            if 'run' in record:
+                header = record
+            elif record.get('id'):
+                entries[record['id']] = record
+    return header, entries, valid
+
+class Journal:
+    """
+    JSON-lines journal of per-book results, safe to share between threads
+    """
+
+    def __init__(self, path, source=None, checkpoint_every=DEFAULT_CHECKPOINT_EVERY, resume=False):
+        self.path = Path(path)
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        source_hash = file_sha256(source) if source and Path(source).exists() else None
+        if resume and self.path.exists():
+            header, self.entries, valid = read_entries(self.path)
+            if header and source_hash and header.get('source_sha256') != source_hash:
+                print(f"⚠️  {source} changed since the journaled run; replaying by book id anyway")
+            # Drop a torn tail so new entries start on a line of their own
+            os.truncate(self.path, valid)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._write({'run': self.path.stem, 'started': round(time.time(), 3),
+                         'source': str(source) if source else None, 'source_sha256': source_hash})
+            self.checkpoint()
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def __contains__(self, book_id):
+        return book_id in self.entries
+
+    def get(self, book_id):
+        return self.entries.get(book_id)
+
+    def record(self, book_id, fields, outcome):
+        """Journal one book's changed fields and outcome"""
+        entry = {'id': book_id, 'fields': fields, 'outcome': outcome, 'at': round(time.time(), 3)}
+        with self._lock:
+            self.entries[book_id] = entry
+            self._write(entry)
+            self._pending += 1
+            if self._pending >= self.checkpoint_every:
+                self._checkpoint()
+
+    def _checkpoint(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def checkpoint(self):
+        """Flush and fsync everything recorded so far"""
+        with self._lock:
+            self._checkpoint()
+
+    def replay(self, catalogue):
+        """Apply journaled fields to the catalogue's books; returns how many were replayed"""
+        replayed = 0
+        for book_id, entry in self.entries.items():
+            book = catalogue.get(book_id)
+            if book is not None:
+                book.update(entry.get('fields') or {})
+                replayed += 1
+        return replayed
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._checkpoint()
+                self._file.close()
+
+    def finish(self):
+        """Close and delete the journal once its results are safely in the output"""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+def add_arguments(parser):
+    """Register --resume/--checkpoint-every on a parser"""
+    parser.add_argument('--resume', action='store_true',
+                        help="Replay the journal of an interrupted run and skip the books it finished")
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY, metavar='N',
+                        help=f"Flush the journal to disk every N books (default: {DEFAULT_CHECKPOINT_EVERY})")
+
+def open_from_args(args, name, source):
+    journal = Journal(journal_path(name), source=source,
+                      checkpoint_every=args.checkpoint_every, resume=args.resume)
+    if args.resume:
+        if journal.entries:
+            print(f"↩️  Resuming from {journal.path.name}: {len(journal.entries)} book(s) already done\n")
+        else:
+            print(f"ℹ️  No journal to resume from; starting a fresh run\n")
+    return journal
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+JSON file helpers shared by the scripts
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+def write_json_atomic(path, data, indent=2):
+    """Write JSON to a temp file beside path, then rename it into place"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        # mkstemp creates 0600 files; keep the target's mode (or the umask default)
+        try:
+            mode = path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Per-book enrichment manifest
+Records, for each book id, the inputs used (ISBN or title/author), the
+providers tried with their results and timestamps, the cover file's hash and
+dimensions and where metadata came from. Enrichment uses it to skip books
+whose inputs are unchanged and whose retry window has not yet passed.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from jsonio import write_json_atomic
+
+DEFAULT_PATH = Path(__file__).resolve().parent / '.cache' / 'enrich_manifest.json'
+
+VERSION = 1
+DAY = 24 * 60 * 60
+RETRY_BASE = 1 * DAY
+RETRY_MAX = 30 * DAY
+
+# Book fields whose change means the book must be enriched again
+INPUT_FIELDS = ('isbn', 'title', 'author', 'coverImage', 'pageCount')
+
+# Stage outcomes that mean the book is still missing data
+INCOMPLETE_OUTCOMES = {'failed', 'not_found', 'missing', 'invalid'}
+
+# Stage outcomes that mean the providers were never asked (--offline): the
+# book is due again on the next run and the attempt is not counted as a failure
+DEFERRED_OUTCOMES = {'offline'}
+
+def inputs_fingerprint(book):
+    """Stable hash of the fields a book's enrichment depends on"""
+    inputs = {field: book.get(field) for field in INPUT_FIELDS}
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cover_record(path, previous=None):
+    """
+    Hash, dimensions, size and mtime of a cover file, or None if absent
+    The hash is reused from previous when size and mtime are unchanged
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    if previous and previous.get('size') == st.st_size and previous.get('mtime') == st.st_mtime:
+        return previous
+    record = {'file': path.name, 'size': st.st_size, 'mtime': st.st_mtime,
+              'sha256': file_sha256(path), 'width': None, 'height': None}
+    try:
+        with Image.open(path) as img:
+            record['width'], record['height'] = img.size
+    except Exception:
+        pass
+    return record
+
+class Manifest:
+    """
+    JSON manifest keyed by book id
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == VERSION:
+                self.entries = data.get('books', {})
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(self.path, {'version': VERSION, 'books': self.entries}, indent=None)
+
+    def needs_work(self, book, cover_path, now=None):
+        """
+        Decide whether a book must go through the stages again
+        Returns a short reason string, or None to skip it
+        """
+        entry = self.entries.get(book.get('id'))
+        if entry is None:
+            return 'new'
+        if entry.get('fingerprint') != inputs_fingerprint(book):
+            return 'inputs changed'
+        cover = entry.get('cover')
+        try:
+            st = cover_path.stat()
+        except OSError:
+            st = None
+        if (st is None) != (cover is None):
+            return 'cover file changed'
+        if st is not None and (cover.get('size') != st.st_size or cover.get('mtime') != st.st_mtime):
+            return 'cover file changed'
+        if entry.get('incomplete'):
+            now = time.time() if now is None else now
+            if now >= entry.get('retry_after', 0):
+                return 'retry due'
+        return None
+
+    def record(self, book, cover_path, outcomes, attempts=(), metadata_source=None, now=None):
+        """Store the result of enriching one book"""
+        now = time.time() if now is None else now
+        book_id = book.get('id')
+        previous = self.entries.get(book_id, {})
+        deferred = any(outcome in DEFERRED_OUTCOMES for outcome in outcomes.values())
+        incomplete = deferred or any(outcome in INCOMPLETE_OUTCOMES for outcome in outcomes.values())
+        if deferred:
+            failures = previous.get('failures', 0)
+        else:
+            failures = previous.get('failures', 0) + 1 if incomplete else 0
+
+        providers = dict(previous.get('providers', {}))
+        for attempt in attempts:
+            providers[attempt['provider']] = {'result': attempt['result'], 'at': attempt['at']}
+
+        entry = {
+            'inputs': {'isbn': book.get('isbn', ''), 'title': book.get('title', ''),
+                       'author': book.get('author', '')},
+            'fingerprint': inputs_fingerprint(book),
+            'providers': providers,
+            'cover': cover_record(cover_path, previous.get('cover')),
+            'metadata_source': metadata_source or previous.get('metadata_source'),
+            'stages': {name: {'outcome': outcome, 'at': now} for name, outcome in outcomes.items()},
+            'incomplete': incomplete,
+            'failures': failures,
+            'updated_at': now,
+        }
+        if deferred:
+            # Keep any backoff from an earlier online failure, else retry straight away
+            entry['retry_after'] = previous.get('retry_after', now)
+        elif incomplete:
+            entry['retry_after'] = now + min(RETRY_MAX, RETRY_BASE * 2 ** (failures - 1))
+        self.entries[book_id] = entry
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Bulk Open Library metadata lookups shared by the page-count and cover scripts
+The /api/books endpoint resolves dozens of ISBNs per request, so callers
+resolve every ISBN they will need up front with resolve_isbns() and read
+cover IDs and page counts from the results. ISBNs it does not know fall back
+to the per-book /isbn/{isbn}.json lookups.
+"""
+
+import re
+import threading
+
+import google_books
+import http_client
+
+BOOKS_API_URL = "https://openlibrary.org/api/books"
+COVER_URL = "https://covers.openlibrary.org/b/id/{cover_id}-{size}.jpg"
+
+BULK_CHUNK_SIZE = 50  # ISBNs per request; keeps the URL well under 2 KB
+
+COVER_ID_PATTERN = re.compile(r'/b/id/(\d+)-')
+
+# Clean ISBN -> {'cover_id', 'page_count'}, or None for ISBNs Open Library doesn't know
+_resolved = {}
+_resolved_lock = threading.Lock()
+
+def cover_url(cover_id, size='L'):
+    return COVER_URL.format(cover_id=cover_id, size=size)
+
+def _parse_record(record):
+    """cover_id and page_count from one jscmd=data record"""
+    cover_id = None
+    for size in ('large', 'medium', 'small'):
+        match = COVER_ID_PATTERN.search((record.get('cover') or {}).get(size, ''))
+        if match:
+            cover_id = int(match.group(1))
+            break
+    page_count = record.get('number_of_pages')
+    if not (isinstance(page_count, int) and page_count > 0):
+        page_count = None
+    return {'cover_id': cover_id, 'page_count': page_count}
+
+def _fetch_chunk(isbns):
+    bibkeys = ','.join(f"ISBN:{isbn}" for isbn in isbns)
+    api_url = f"{BOOKS_API_URL}?bibkeys={bibkeys}&format=json&jscmd=data"
+    response = http_client.get_client().get_json(api_url)
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    return {isbn: _parse_record(data[f"ISBN:{isbn}"]) if f"ISBN:{isbn}" in data else None
+            for isbn in isbns}
+
+def resolve_isbns(isbns, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Resolve many ISBNs in batched requests and remember the results
+    Already-resolved ISBNs are not requested again. A failed chunk is left
+    unresolved so its books use the per-book lookups. Returns the number of
+    ISBNs Open Library knew.
+    """
+    with _resolved_lock:
+        pending = list(dict.fromkeys(isbn for isbn in map(google_books.clean_isbn, isbns)
+                                     if isbn and isbn not in _resolved))
+    found = uncached = 0
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        try:
+            results = _fetch_chunk(chunk)
+        except http_client.OfflineError:
+            uncached += len(chunk)
+            continue
+        except Exception as e:
+            # The exception text repeats the whole bulk URL, so only name the error
+            print(f"   ⚠️  Open Library bulk lookup of {len(chunk)} ISBN(s) failed: {type(e).__name__}")
+            continue
+        if results is None:
+            continue
+        with _resolved_lock:
+            _resolved.update(results)
+        found += sum(1 for record in results.values() if record)
+    if uncached:
+        print(f"   ⚠️  Open Library bulk lookup: {uncached} ISBN(s) not cached (offline); using per-book lookups")
+    return found
+
+def clear():
+    """Forget every resolved ISBN"""
+    with _resolved_lock:
+        _resolved.clear()
+
+def lookup(isbn):
+    """Bulk-resolved record for an ISBN, or None if unknown or not resolved"""
+    with _resolved_lock:
+        return _resolved.get(google_books.clean_isbn(isbn))
+
+def cover_id_for_isbn(isbn):
+    record = lookup(isbn)
+    return record['cover_id'] if record else None
+
+def page_count_for_isbn(isbn):
+    record = lookup(isbn)
+    return record['page_count'] if record else None
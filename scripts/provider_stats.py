@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Learned hit rates and latencies for the cover providers
+Every waterfall attempt is recorded against the book's ISBN registration
+group (978-0, 978-84, 978-953, ...), since whether Open Library or Google has
+a cover depends heavily on where an edition was published. plan() orders the
+providers by expected seconds per success (latency / hit rate), which
+minimizes the expected time to the first good cover, and skips providers
+that have almost never succeeded for the group. Sparse groups borrow from
+the provider's overall record. Stats persist in .cache/provider_stats.json.
+"""
+
+import json
+import random
+import threading
+from pathlib import Path
+
+from catalogue import canonical_isbn
+from jsonio import write_json_atomic
+
+STATS_FILE = Path(__file__).resolve().parent / '.cache' / 'provider_stats.json'
+VERSION = 1
+
+# The waterfall's hard-coded order, kept as the baseline and the tie-break
+FIXED_ORDER = ('openlibrary', 'google', 'internet_archive')
+
+PRIOR_WEIGHT = 4           # Pseudo-attempts of the overall record mixed into each group
+DEFAULT_SECONDS = 1.0      # Latency assumed for a provider with no history
+SKIP_RATE = 0.02           # Hit rate below which a provider is skipped for a group...
+SKIP_MIN_ATTEMPTS = 20     # ...once it has had this many attempts there
+EXPLORE_RATE = 0.1         # Share of plans that still try skipped providers, so stats can recover
+
+def isbn_bucket(isbn):
+    """ISBN registration group ('978-0', '978-84', '978-953', '979-8', ...) or 'no-isbn'"""
+    digits = canonical_isbn(isbn)
+    if len(digits) != 13:
+        return 'no-isbn'
+    prefix, rest = digits[:3], digits[3:]
+    if prefix == '979':
+        return f"979-{rest[:1] if rest[0] == '8' else rest[:2]}"
+    if rest[0] in '0123457':
+        length = 1
+    elif rest[0] == '6':
+        length = 2 if rest[1] == '5' else 3
+    elif rest[0] == '8' or rest[:2] in ('90', '91', '92', '93', '94'):
+        length = 2
+    elif rest[:2] in ('95', '96', '97', '98'):
+        length = 3
+    else:
+        length = 5 if rest[:3] == '999' else 4
+    return f"{prefix}-{rest[:length]}"
+
+def expected_seconds(estimates, order):
+    """Expected time spent before the first success (or exhaustion) in this order"""
+    total, reach = 0.0, 1.0
+    for provider in order:
+        rate, seconds = estimates[provider]
+        total += reach * seconds
+        reach *= 1 - rate
+    return total
+
+class ProviderStats:
+    """
+    Per-group attempt counts, successes and time, persisted as JSON
+    Safe to share between threads
+    """
+
+    def __init__(self, path=STATS_FILE):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.buckets = {}
+        if self.path is not None and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == VERSION:
+                self.buckets = data.get('buckets', {})
+        self.run = {'books': 0, 'reordered': 0, 'skipped': 0,
+                    'expected_fixed': 0.0, 'expected_planned': 0.0, 'actual': 0.0}
+
+    def _overall(self, provider):
+        attempts = successes = seconds = 0
+        for providers in self.buckets.values():
+            counts = providers.get(provider)
+            if counts:
+                attempts += counts['attempts']
+                successes += counts['successes']
+                seconds += counts['seconds']
+        return attempts, successes, seconds
+
+    def estimate(self, bucket, provider):
+        """(hit rate, mean seconds per attempt), smoothed toward the provider's overall record"""
+        with self._lock:
+            overall_attempts, overall_successes, overall_seconds = self._overall(provider)
+            counts = self.buckets.get(bucket, {}).get(provider, {'attempts': 0, 'successes': 0, 'seconds': 0.0})
+        overall_rate = (overall_successes + 1) / (overall_attempts + 2)
+        overall_mean = overall_seconds / overall_attempts if overall_attempts else DEFAULT_SECONDS
+        rate = (counts['successes'] + PRIOR_WEIGHT * overall_rate) / (counts['attempts'] + PRIOR_WEIGHT)
+        mean = (counts['seconds'] + PRIOR_WEIGHT * overall_mean) / (counts['attempts'] + PRIOR_WEIGHT)
+        return rate, mean
+
+    def attempts(self, bucket, provider):
+        with self._lock:
+            return self.buckets.get(bucket, {}).get(provider, {}).get('attempts', 0)
+
+    def plan(self, isbn, available):
+        """
+        Providers to try for a book, best first
+        available is the fixed-order subset that applies to the book
+        Returns (order, estimates) where estimates maps provider -> (rate, seconds)
+        """
+        bucket = isbn_bucket(isbn)
+        estimates = {provider: self.estimate(bucket, provider) for provider in available}
+        order = sorted(available, key=lambda provider: (
+            estimates[provider][1] / max(estimates[provider][0], 1e-6), FIXED_ORDER.index(provider)))
+        if random.random() >= EXPLORE_RATE:
+            kept = [provider for provider in order
+                    if not (estimates[provider][0] < SKIP_RATE
+                            and self.attempts(bucket, provider) >= SKIP_MIN_ATTEMPTS)]
+            order = kept or order
+        with self._lock:
+            self.run['books'] += 1
+            self.run['reordered'] += order != [p for p in available if p in order]
+            self.run['skipped'] += len(available) - len(order)
+            self.run['expected_fixed'] += expected_seconds(estimates, available)
+            self.run['expected_planned'] += expected_seconds(estimates, order)
+        return order, estimates
+
+    def record(self, isbn, provider, success, seconds):
+        """Add one attempt's outcome to the book's group"""
+        bucket = isbn_bucket(isbn)
+        with self._lock:
+            counts = self.buckets.setdefault(bucket, {}).setdefault(
+                provider, {'attempts': 0, 'successes': 0, 'seconds': 0.0})
+            counts['attempts'] += 1
+            counts['successes'] += 1 if success else 0
+            counts['seconds'] = round(counts['seconds'] + seconds, 3)
+            self.run['actual'] += seconds
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or self.path is None:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.path, {'version': VERSION, 'buckets': self.buckets}, indent=None)
+            self._dirty = False
+
+    def print_summary(self):
+        run = self.run
+        if not run['books']:
+            return
+        expected_saving = run['expected_fixed'] - run['expected_planned']
+        actual_saving = run['expected_fixed'] - run['actual']
+        print(f"\n🧭 Adaptive provider order: {run['books']} book(s), {run['reordered']} reordered, "
+              f"{run['skipped']} provider attempt(s) skipped")
+        print(f"   Expected time to cover: {run['expected_fixed']:.1f}s fixed order, "
+              f"{run['expected_planned']:.1f}s adaptive (saves {expected_saving:.1f}s)")
+        print(f"   Actual time in providers: {run['actual']:.1f}s "
+              f"({actual_saving:+.1f}s against the fixed-order estimate)")
+
+_stats = None
+_stats_guard = threading.Lock()
+_adaptive = True
+
+def configure(adaptive=True):
+    """adaptive=False keeps the fixed waterfall order (attempts are still recorded)"""
+    global _adaptive
+    _adaptive = adaptive
+
+def get_stats():
+    """Process-wide stats shared by every fetch"""
+    global _stats
+    with _stats_guard:
+        if _stats is None:
+            _stats = ProviderStats()
+        return _stats
+
+def clear():
+    """Start over from empty stats that are never saved (benchmarks use this)"""
+    global _stats
+    with _stats_guard:
+        _stats = ProviderStats(path=None)
+
+def plan(isbn, available):
+    """Provider order for a book: learned when adaptive, else the fixed order"""
+    if not _adaptive:
+        return list(available)
+    order, estimates = get_stats().plan(isbn, available)
+    return order
+
+def save_all():
+    if _stats is not None:
+        _stats.save()
+
+def print_summary():
+    if _stats is not None:
+        _stats.print_summary()
+
+def print_table():
+    """Hit rate and latency per group, for the command line"""
+    stats = get_stats()
+    print(f"{'group':10} " + ' '.join(f"{provider:>24}" for provider in FIXED_ORDER))
+    for bucket in sorted(stats.buckets):
+        cells = []
+        for provider in FIXED_ORDER:
+            attempts = stats.attempts(bucket, provider)
+            rate, seconds = stats.estimate(bucket, provider)
+            cells.append(f"{rate * 100:5.1f}% {seconds:5.2f}s n={attempts:<5}".rjust(24))
+        print(f"{bucket:10} " + ' '.join(cells))
+
+if __name__ == '__main__':
+    print_table()
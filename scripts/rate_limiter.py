@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Per-provider token-bucket rate limiting for the cover and metadata scripts
+Each provider gets its own bucket so one slow API never throttles the others
+"""
+
+import threading
+import time
+import urllib.parse
+
+# Sustained requests per second and burst size for each provider
+PROVIDER_LIMITS = {
+    'openlibrary': {'rate': 2.0, 'burst': 4},
+    'google': {'rate': 2.0, 'burst': 4},
+    'internet_archive': {'rate': 1.0, 'burst': 2},
+}
+
+# Host suffix -> provider name
+PROVIDER_HOSTS = {
+    'openlibrary.org': 'openlibrary',
+    'googleapis.com': 'google',
+    'books.google.com': 'google',
+    'googleusercontent.com': 'google',
+    'archive.org': 'internet_archive',
+}
+
+class TokenBucket:
+    """
+    Classic token bucket: tokens refill at `rate` per second up to `burst`
+    acquire() blocks until a token is available
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self, cancelled=None):
+        """
+        Block until a token is available, then consume it
+        Returns False without a token if the cancelled event is set while waiting
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if cancelled is None:
+                time.sleep(wait)
+            elif cancelled.wait(wait):
+                return False
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+_enabled = True
+
+def configure(enabled=True, limits=None):
+    """
+    Enable/disable throttling or override PROVIDER_LIMITS entries
+    Existing buckets are dropped so the new limits apply immediately
+    """
+    global _enabled
+    with _buckets_lock:
+        _enabled = enabled
+        if limits:
+            for provider, limit in limits.items():
+                PROVIDER_LIMITS[provider] = dict(limit)
+        _buckets.clear()
+
+def provider_for_url(url):
+    """Map a URL to its provider name, or None for unknown hosts"""
+    host = (urllib.parse.urlsplit(url).hostname or '').lower()
+    for suffix, provider in PROVIDER_HOSTS.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return provider
+    return None
+
+def get_limiter(provider):
+    """Return the shared bucket for a provider (created on first use)"""
+    with _buckets_lock:
+        bucket = _buckets.get(provider)
+        if bucket is None:
+            limits = PROVIDER_LIMITS.get(provider, {'rate': 1.0, 'burst': 1})
+            bucket = TokenBucket(limits['rate'], limits['burst'])
+            _buckets[provider] = bucket
+        return bucket
+
+def throttle(url, cancelled=None):
+    """
+    Wait for the rate limit of whichever provider serves this URL
+    Returns False if the cancelled event was set before a token was granted
+    """
+    if not _enabled:
+        return True
+    provider = provider_for_url(url)
+    if provider:
+        return get_limiter(provider).acquire(cancelled)
+    return True
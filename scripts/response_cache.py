@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for metadata API responses
+Responses are stored in SQLite keyed by a hash of the normalized URL, with a
+TTL per entry. 404s and empty search results are cached too (negative
+caching) so misses are not re-queried on every run.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+DEFAULT_PATH = Path(__file__).resolve().parent / '.cache' / 'responses.sqlite3'
+
+DAY = 24 * 60 * 60
+POSITIVE_TTL = 30 * DAY
+NEGATIVE_TTL = 7 * DAY
+
+def normalize_url(url):
+    """Canonical form of a URL: lowercase scheme/host, sorted query, no fragment"""
+    parts = urllib.parse.urlsplit(url)
+    query = sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+    return urllib.parse.urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path or '/',
+        urllib.parse.urlencode(query, quote_via=urllib.parse.quote),
+        '',
+    ))
+
+def cache_key(url):
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+def is_empty_result(data):
+    """True for search responses that matched nothing (Google Books / archive.org)"""
+    if not isinstance(data, dict):
+        return False
+    if 'totalItems' in data:
+        return not data.get('items')
+    if isinstance(data.get('response'), dict) and 'docs' in data['response']:
+        return not data['response']['docs']
+    return False
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response backed by a cache row"""
+
+    def __init__(self, url, status_code, body, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = body or b''
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+class ResponseCache:
+    """
+    SQLite-backed response cache shared by every script
+    Use put() to pre-seed entries (e.g. for offline runs or tests)
+    """
+
+    def __init__(self, path=DEFAULT_PATH, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.path = Path(path)
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if str(path) != ':memory:':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' url TEXT NOT NULL,'
+            ' status INTEGER NOT NULL,'
+            ' body BLOB,'
+            ' fetched_at REAL NOT NULL,'
+            ' expires_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get(self, url, allow_stale=False):
+        """Return a CachedResponse for url, or None if absent or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, body, expires_at FROM responses WHERE key = ?', (cache_key(url),)
+            ).fetchone()
+            if row is None or (not allow_stale and row[2] < time.time()):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return CachedResponse(url, row[0], row[1], from_cache=True)
+
+    def put(self, url, status, body, ttl=None):
+        """Store a response; TTL defaults to the positive or negative TTL"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        elif not isinstance(body, (bytes, type(None))):
+            body = json.dumps(body).encode('utf-8')
+        if ttl is None:
+            ttl = self.positive_ttl if self._is_positive(status, body) else self.negative_ttl
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, url, status, body, fetched_at, expires_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (cache_key(url), normalize_url(url), status, body, now, now + ttl),
+            )
+            self._conn.commit()
+
+    def _is_positive(self, status, body):
+        if status != 200:
+            return False
+        try:
+            return not is_empty_result(json.loads(body or b'null'))
+        except ValueError:
+            return True
+
+    def purge_expired(self):
+        """Delete expired entries; returns the number removed"""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM responses WHERE expires_at < ?', (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Single-flight call coalescing
+do(key, fn) runs fn once per key: callers arriving while it runs wait for
+that call instead of starting their own, and later callers get the stored
+result. Exceptions reach every waiting caller but are not stored, so the
+next call for the key tries again.
+"""
+
+import threading
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Per-key once-only calls, safe to share between threads
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'calls': 0, 'shared': 0}
+
+    def do(self, key, fn):
+        """
+        Result of fn() for key, computed at most once while it succeeds
+        Returns (value, shared); shared is True when another caller ran fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['calls'] += 1
+            else:
+                self.stats['shared'] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._calls.pop(key, None)
+            raise
+        finally:
+            call.done.set()
+        return call.value, False
+
+    def forget(self, key):
+        """Drop a stored result so the next call runs fn again"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set():
+                del self._calls[key]
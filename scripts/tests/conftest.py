@@ -0,0 +1,9 @@
+"""
+The scripts import each other as top-level modules, so the tests run with
+the scripts directory on sys.path
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
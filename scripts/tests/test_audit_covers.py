@@ -0,0 +1,36 @@
+"""
+The cover audit relinks readings to a cover saved for another reading of the same work
+"""
+
+from audit_covers import reference_problems
+from catalogue import Catalogue
+
+def test_rereads_relink_to_the_works_cover(tmp_path):
+    (tmp_path / '9780441013593.jpg').write_bytes(b'cover')
+    (tmp_path / 'custom.jpg').write_bytes(b'cover')
+    cat = Catalogue({
+        '2025': {'books': [
+            # No ISBN: only the title/author grouping links it to the 2024 reading
+            {'id': 'book-2025-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '', 'coverImage': ''},
+            {'id': 'book-2025-2', 'title': 'Hyperion', 'author': 'Dan Simmons', 'isbn': '',
+             'coverImage': '/covers/gone.jpg'},
+            {'id': 'book-2025-3', 'title': 'Solaris', 'author': 'Stanislaw Lem', 'isbn': '', 'coverImage': ''},
+        ]},
+        '2024': {'books': [
+            {'id': 'book-2024-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '9780441013593',
+             'coverImage': ''},
+            {'id': 'book-2024-2', 'title': 'Hyperion', 'author': 'Dan Simmons', 'isbn': '9780553283686',
+             'coverImage': '/covers/custom.jpg'},
+        ]},
+    }, path=None, covers_dir=tmp_path)
+
+    missing, uncovered, relinkable, orphans = reference_problems(cat)
+
+    assert [(year, book['id'], name) for year, book, name in relinkable] == [
+        ('2025', 'book-2025-1', '9780441013593.jpg'),
+        ('2025', 'book-2025-2', 'custom.jpg'),
+        ('2024', 'book-2024-1', '9780441013593.jpg'),
+    ]
+    assert missing == []
+    assert [book['id'] for year, book in uncovered] == ['book-2025-3']
+    assert orphans == []
@@ -0,0 +1,62 @@
+"""
+The cover pipeline against ReplayServer: a repeatable, offline regression check
+"""
+
+import pytest
+
+import bench_covers
+import http_client
+import provider_stats
+import rate_limiter
+
+BOOKS = {
+    '2024': {'books': [
+        {'id': f"book-2024-{n}", 'title': f"Replay Title {n}", 'author': f"Author {n}",
+         'isbn': f"978000000{n:04d}", 'coverImage': ''}
+        for n in range(1, 13)
+    ]},
+}
+
+@pytest.fixture
+def replay(monkeypatch):
+    monkeypatch.setattr(http_client, '_client', None)
+    rate_limiter.configure(enabled=False)
+    provider_stats.configure(adaptive=False)
+    provider_stats.clear()
+    fixture = bench_covers.synthesize_fixture(BOOKS, seed=0)
+    with bench_covers.ReplayServer(fixture, latency_scale=0) as server:
+        yield server
+    rate_limiter.configure(enabled=True)
+    provider_stats.configure(adaptive=True)
+    provider_stats.clear()
+
+def run(server, retries=3):
+    client = http_client.configure(max_retries=retries, backoff=0.01, url_rewriter=server.rewrite)
+    return bench_covers.run_once(BOOKS, client, workers=4)
+
+def test_every_book_is_accounted_for(replay):
+    metrics = run(replay)
+    stats = metrics['stats']
+    found = stats['openlibrary_success'] + stats['google_success'] + stats['internet_archive_success']
+    assert stats['total'] == 12
+    assert found + stats['failed'] == stats['total']
+    assert found > 0
+    assert metrics['requests'] == replay.requests
+    assert replay.unknown_urls == 0
+
+def test_runs_are_repeatable(replay):
+    first = run(replay)
+    second = run(replay)
+    assert first['stats'] == second['stats']
+    assert first['requests'] == second['requests']
+    # A regression here means the pipeline started making extra provider calls
+    assert first['requests_per_book'] <= 3
+
+def test_injected_errors_are_retried(replay):
+    baseline = run(replay)
+    replay.error_rate = 0.2
+    # Enough retries that no request plausibly fails every attempt
+    flaky = run(replay, retries=8)
+    assert replay.injected_errors > 0
+    assert flaky['retries'] > 0
+    assert flaky['stats'] == baseline['stats']
@@ -0,0 +1,90 @@
+"""
+Date parsing, lane packing and fingerprints in build_analytics
+"""
+
+from datetime import datetime
+
+import pytest
+
+from build_analytics import (assign_lanes, fingerprint, parse_dates_read, parse_single_range,
+                             reading_range, timeline_bar, year_analytics)
+
+def strings(parsed):
+    return parsed[2:] if parsed else None
+
+@pytest.mark.parametrize('text, expected', [
+    ('2025/07/29-2025/08/07', ('2025/07/29', '2025/08/07')),
+    ('2025/03/16', ('2025/03/16', '2025/03/16')),
+    (' 2025/03/16 ', ('2025/03/16', '2025/03/16')),
+    ('2025/03', None),
+    ('2025', None),
+    ('2025/13/01-2025/14/01', None),
+    ('2025/03/16-', None),
+    ('', None),
+    (None, None),
+])
+def test_parse_single_range(text, expected):
+    assert strings(parse_single_range(text)) == expected
+
+def test_multi_range_picks_the_range_starting_in_the_year():
+    dates_read = '2023/05/01-2023/05/09, 2024/02/01-2024/02/10'
+    assert strings(parse_dates_read(dates_read, '2024')) == ('2024/02/01', '2024/02/10')
+    assert strings(parse_dates_read(dates_read, '2023')) == ('2023/05/01', '2023/05/09')
+
+def test_range_spanning_new_year_belongs_to_both_years():
+    dates_read = '2023/12/20-2024/01/10'
+    assert strings(parse_dates_read(dates_read, '2023')) == ('2023/12/20', '2024/01/10')
+    assert strings(parse_dates_read(dates_read, '2024')) == ('2023/12/20', '2024/01/10')
+
+def test_range_outside_the_year_is_ignored():
+    assert parse_dates_read('2022/01/01-2022/01/05', '2024') is None
+
+def test_start_and_finish_dates_are_used_without_dates_read():
+    parsed = reading_range({'startDate': '2024-03-01', 'finishDate': '2024-03-04'}, '2024')
+    assert parsed[:2] == (datetime(2024, 3, 1), datetime(2024, 3, 4))
+    assert reading_range({'startDate': '2024-03-01', 'finishDate': '2024-03-04'}, '2023') is None
+
+def test_timeline_bar_is_clamped_to_the_year():
+    bar = timeline_bar({'id': 'b', 'datesRead': '2023/12/20-2024/01/10'}, '2024')
+    assert bar['leftPercent'] == 0.0
+    assert bar['days'] == 21
+    assert not bar['isLongRead']
+    assert timeline_bar({'id': 'b', 'datesRead': '2024/01/01-2024/02/15'}, '2024')['isLongRead']
+
+def test_lanes_never_overlap():
+    bars = [{'leftPercent': left, 'widthPercent': width}
+            for left, width in [(0, 10), (5, 10), (8, 1), (20, 5), (12, 10)]]
+    total = assign_lanes(bars)
+    assert total == 3
+    for lane in range(total):
+        spans = sorted((bar['leftPercent'], bar['leftPercent'] + bar['widthPercent'])
+                       for bar in bars if bar['lane'] == lane)
+        assert all(end <= next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+
+def test_year_totals():
+    books = [
+        {'id': 'a', 'pageCount': 300, 'fictionType': 'Fiction', 'datesRead': '2024/01/02-2024/01/05'},
+        {'id': 'b', 'pageCount': 120, 'fictionType': 'nonfiction'},
+        {'id': 'c', 'fictionType': 'Poetry', 'datesRead': '2024/03'},
+    ]
+    analytics = year_analytics('2024', books)
+    assert analytics['totalBooks'] == 3
+    assert analytics['totalPages'] == 420
+    assert (analytics['fictionCount'], analytics['nonFictionCount'], analytics['poetryCount']) == (1, 1, 1)
+    assert [bar['id'] for bar in analytics['timeline']['bars']] == ['a']
+
+def test_fingerprint_changes_with_any_analytics_input():
+    books = [{'id': 'a', 'pageCount': 300, 'datesRead': '2024/01/02-2024/01/05', 'fictionType': 'Fiction'}]
+    base = fingerprint(books)
+    assert fingerprint([dict(books[0], title='Renamed')]) == base
+    assert fingerprint([dict(books[0], review=None)]) == base
+    for field, value in [('pageCount', 301), ('datesRead', '2024/01/02-2024/01/06'),
+                         ('fictionType', 'Poetry'), ('startDate', '2024-01-01')]:
+        assert fingerprint([dict(books[0], **{field: value})]) != base
+
+def test_fingerprint_matches_the_front_end():
+    # Same value as analyticsFingerprint() in YearAnalytics.jsx for these books
+    books = [{'id': 'a', 'datesRead': '2024/01/02-2024/01/05', 'pageCount': 300.0,
+              'fictionType': 'Non-fiction é ✓ 𝄞'}]
+    assert fingerprint(books) == 'cbaa7472'
+    assert fingerprint([]) == '811c9dc5'
@@ -0,0 +1,57 @@
+"""
+Catalogue work keys and adding readings without breaking catalogue order
+"""
+
+from catalogue import Catalogue, work_keys
+
+def book(book_id, title, author='Frank Herbert', isbn=''):
+    return {'id': book_id, 'title': title, 'author': author, 'isbn': isbn}
+
+def catalogue(tmp_path):
+    return Catalogue({
+        '2025': {'books': [book('book-2025-1', 'Dune')]},
+        '2023': {'books': [book('book-2023-1', 'Children of Dune'), book('book-2023-2', 'Hyperion', 'Dan Simmons')]},
+    }, path=None, covers_dir=tmp_path)
+
+def in_data_order(cat):
+    return [(year, position, entry['id']) for year, books in cat.years()
+            for position, entry in enumerate(books, 1)]
+
+def test_title_key_needs_both_title_and_author():
+    assert work_keys(book('a', 'Dune', isbn='0441013597')) == ['isbn:9780441013593', 'title:dune|frank herbert']
+    assert work_keys(book('a', 'Dune', author='')) == []
+    assert work_keys(book('a', '', isbn='0441013597')) == ['isbn:9780441013593']
+
+def test_untitled_author_less_readings_are_not_one_work(tmp_path):
+    cat = Catalogue({'2025': {'books': [book('a', 'Notes', author=''), book('b', 'Letters', author='')]},
+                     '2024': {'books': [book('c', 'Notes', author='')]}},
+                    path=None, covers_dir=tmp_path)
+
+    assert len(cat.works()) == 3
+
+def test_add_to_a_new_year_keeps_catalogue_order(tmp_path):
+    cat = catalogue(tmp_path)
+    cat.add('2024', book('book-2024-1', 'Dune Messiah'))
+
+    assert list(cat.data) == ['2025', '2024', '2023']
+    assert [(year, position, entry['id']) for year, position, entry in cat] == in_data_order(cat)
+
+def test_add_to_an_earlier_listed_year_lands_at_the_end_of_that_year(tmp_path):
+    cat = catalogue(tmp_path)
+    reread = book('book-2025-2', 'Children of Dune')
+    cat.add('2025', reread)
+
+    assert [(year, position, entry['id']) for year, position, entry in cat] == in_data_order(cat)
+    # Lookups and work grouping follow catalogue order too
+    assert [entry['id'] for entry in cat.find_title_author('Children of Dune', 'Frank Herbert')] == [
+        'book-2025-2', 'book-2023-1']
+    assert [entry['id'] for entry in cat.readings(reread)] == ['book-2025-2', 'book-2023-1']
+
+def test_add_to_the_last_year_joins_its_work(tmp_path):
+    cat = catalogue(tmp_path)
+    reread = book('book-2023-3', 'Dune', isbn='9780441013593')
+    cat.add('2023', reread)
+
+    assert [(year, position, entry['id']) for year, position, entry in cat] == in_data_order(cat)
+    assert [entry['id'] for entry in cat.readings(reread)] == ['book-2025-1', 'book-2023-3']
+    assert cat.work_lead(cat.get('book-2025-1')) is reread
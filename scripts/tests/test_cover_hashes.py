@@ -0,0 +1,137 @@
+"""
+Perceptual-hash checks on downloads: placeholders are rejected before any
+write, identical covers are hard-linked, and colliding hashes are not
+"""
+
+import io
+import json
+import os
+
+import pytest
+from PIL import Image, ImageDraw
+
+import cover_hashes
+import download_covers_enhanced as covers
+import http_client
+
+URL = 'https://covers.example.test/cover.jpg'
+
+def cover_bytes(width=600, height=900, fmt='JPEG', **options):
+    """A cover with some structure, so its hashes are not all zero"""
+    img = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+    for n in range(0, width, 40):
+        draw.rectangle([n, n // 2, n + 20, height - n // 2], fill=(n % 256, 80, 160))
+    noise = Image.frombytes('RGB', (width, height), os.urandom(width * height * 3))
+    img = Image.blend(img, noise, 0.1)
+    buffer = io.BytesIO()
+    img.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+class StubResponse:
+    def __init__(self, body):
+        self.body = body
+        self.content = body
+        self.status_code = 200
+        self.headers = {'Content-Type': 'image/jpeg', 'Content-Length': str(len(body))}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class StubClient:
+    def __init__(self, body):
+        self.body = body
+        self.offline = False
+        self.urls = []
+
+    def get(self, url, stream=False, timeout=None):
+        self.urls.append(url)
+        return StubResponse(self.body)
+
+    def iter_content(self, response, chunk_size=16 * 1024):
+        for start in range(0, len(response.body), chunk_size):
+            yield response.body[start:start + chunk_size]
+
+@pytest.fixture
+def covers_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'covers'
+    path.mkdir()
+    monkeypatch.setattr(cover_hashes, '_indexes', {})
+    return path
+
+def shared_index(covers_dir, placeholders=()):
+    index = cover_hashes.CoverHashIndex(covers_dir, index_path=covers_dir.parent / 'index.json',
+                                        placeholders=list(placeholders))
+    cover_hashes._indexes[covers_dir.resolve()] = index
+    return index
+
+def test_placeholder_match_needs_both_hashes_close():
+    index = cover_hashes.CoverHashIndex('/nonexistent', placeholders=[
+        {'dhash': 'f0f0f0f0f0f0f0f0', 'ahash': '00000000ffffffff', 'note': 'no cover'}])
+
+    assert index.placeholder_match('f0f0f0f0f0f0f0f1', '00000000ffffffff')['note'] == 'no cover'
+    assert index.placeholder_match('f0f0f0f0f0f0f0f1') is not None
+    assert index.placeholder_match('f0f0f0f0f0f0f0f1', 'ffffffff00000000') is None
+    assert index.placeholder_match('0f0f0f0f0f0f0f0f', '00000000ffffffff') is None
+
+def test_placeholder_download_is_never_written(covers_dir, monkeypatch):
+    body = cover_bytes()
+    dhash, ahash = cover_hashes.bytes_hashes(body)
+    shared_index(covers_dir, [{'dhash': dhash, 'ahash': ahash, 'note': 'no cover'}])
+    monkeypatch.setattr(http_client, '_client', StubClient(body))
+    writes = []
+    monkeypatch.setattr(covers.tempfile, 'mkstemp', lambda *args, **kwargs: writes.append(kwargs))
+
+    assert not covers.download_from_url(URL, covers_dir / '9780000000001.jpg')
+    assert writes == []
+    assert os.listdir(covers_dir) == []
+
+def test_identical_cover_is_hard_linked(covers_dir, monkeypatch):
+    body = cover_bytes()
+    (covers_dir / '9780000000001.jpg').write_bytes(body)
+    shared_index(covers_dir)
+    monkeypatch.setattr(http_client, '_client', StubClient(body))
+
+    assert covers.download_from_url(URL, covers_dir / '9780000000002.jpg')
+    first, second = (covers_dir / '9780000000001.jpg').stat(), (covers_dir / '9780000000002.jpg').stat()
+    assert first.st_ino == second.st_ino
+    assert sorted(os.listdir(covers_dir)) == ['9780000000001.jpg', '9780000000002.jpg']
+
+def test_colliding_hashes_with_different_bytes_are_kept_apart(covers_dir, monkeypatch):
+    body = cover_bytes()
+    (covers_dir / '9780000000001.jpg').write_bytes(cover_bytes())
+    index = shared_index(covers_dir)
+    # Pretend the stored cover hashes the same as the download
+    dhash, ahash = cover_hashes.bytes_hashes(body)
+    index._entries['9780000000001.jpg'].update(dhash=dhash, ahash=ahash)
+    monkeypatch.setattr(http_client, '_client', StubClient(body))
+
+    assert covers.download_from_url(URL, covers_dir / '9780000000002.jpg')
+    second = covers_dir / '9780000000002.jpg'
+    assert second.read_bytes() == body
+    assert second.stat().st_ino != (covers_dir / '9780000000001.jpg').stat().st_ino
+
+def test_seeding_writes_only_the_cache_file(tmp_path, covers_dir, monkeypatch):
+    shipped = tmp_path / 'placeholder_hashes.json'
+    shipped.write_text(json.dumps({'placeholders': [
+        {'dhash': '0000000000000000', 'ahash': '0000000000000000', 'note': 'blank'}]}))
+    before = shipped.read_bytes()
+    seeded = tmp_path / '.cache' / 'placeholder_hashes.json'
+    client = StubClient(cover_bytes(120, 180, 'PNG'))
+    monkeypatch.setattr(http_client, '_client', client)
+    index = shared_index(covers_dir)
+
+    assert cover_hashes.seed_known_placeholders(shipped, seeded) == len(cover_hashes.KNOWN_PLACEHOLDER_URLS)
+    assert shipped.read_bytes() == before
+    sources = [entry['source'] for entry in json.loads(seeded.read_text())['placeholders']]
+    assert sources == list(cover_hashes.KNOWN_PLACEHOLDER_URLS.values())
+    assert len(index.placeholders) == 1 + len(sources)
+
+    # Already recorded: nothing is fetched again
+    client.urls.clear()
+    assert cover_hashes.seed_known_placeholders(shipped, seeded) == 0
+    assert client.urls == []
+    assert len(cover_hashes.known_placeholders(shipped, seeded)) == 1 + len(sources)
@@ -0,0 +1,152 @@
+"""
+Streaming cover downloads: early aborts, the size cap, header probing, and
+never touching an existing cover when an attempt fails
+"""
+
+import io
+import os
+
+import pytest
+from PIL import Image
+
+import download_covers_enhanced as covers
+import http_client
+from image_probe import ImageProbe
+
+URL = 'https://covers.example.test/cover.jpg'
+CHUNK = 16 * 1024
+
+def jpeg(width, height, quality=85, **options):
+    """Noisy JPEG bytes, so the file is as large as a real cover of that size"""
+    img = Image.frombytes('RGB', (width, height), os.urandom(width * height * 3))
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=quality, **options)
+    return buffer.getvalue()
+
+class StubResponse:
+    def __init__(self, body, status_code=200, headers=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'image/jpeg', 'Content-Length': str(len(body))}
+        self.headers.update(headers or {})
+        self.chunks_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class StubClient:
+    """Serves one response and counts the body chunks the caller actually pulled"""
+
+    def __init__(self, response):
+        self.response = response
+        self.offline = False
+
+    def get(self, url, stream=False, timeout=None):
+        return self.response
+
+    def iter_content(self, response, chunk_size=CHUNK):
+        for start in range(0, len(response.body), CHUNK):
+            response.chunks_read += 1
+            yield response.body[start:start + CHUNK]
+
+@pytest.fixture
+def serve(monkeypatch):
+    def serve(body, **options):
+        response = StubResponse(body, **options)
+        monkeypatch.setattr(http_client, '_client', StubClient(response))
+        return response
+    return serve
+
+@pytest.fixture
+def output(tmp_path):
+    """An existing cover the failed attempts must leave alone"""
+    path = tmp_path / 'covers' / '9780000000001.jpg'
+    path.parent.mkdir()
+    path.write_bytes(b'existing cover')
+    os.utime(path, (1_600_000_000, 1_600_000_000))
+    return path
+
+def untouched(path):
+    leftovers = [name for name in os.listdir(path.parent) if name != path.name]
+    return path.read_bytes() == b'existing cover' and path.stat().st_mtime == 1_600_000_000 and not leftovers
+
+def test_good_cover_replaces_the_file(serve, output):
+    body = jpeg(600, 900)
+    serve(body)
+
+    assert covers.download_from_url(URL, output)
+    assert output.read_bytes() == body
+    assert os.listdir(output.parent) == [output.name]
+
+def test_non_image_content_type_aborts_before_the_body(serve, output):
+    response = serve(jpeg(600, 900), headers={'Content-Type': 'text/html; charset=utf-8'})
+
+    assert not covers.download_from_url(URL, output)
+    assert response.chunks_read == 0
+    assert untouched(output)
+
+def test_oversized_content_length_aborts_before_the_body(serve, output):
+    response = serve(jpeg(600, 900))
+
+    assert not covers.download_from_url(URL, output, max_bytes=10_000)
+    assert response.chunks_read == 0
+    assert untouched(output)
+
+def test_body_over_the_cap_is_cut_off(serve, output):
+    # No Content-Length, so only the running total can stop it
+    body = jpeg(600, 900)
+    response = serve(body, headers={'Content-Length': ''})
+
+    assert not covers.download_from_url(URL, output, max_bytes=3 * CHUNK)
+    assert response.chunks_read == 4 < len(body) / CHUNK
+    assert untouched(output)
+
+def test_small_dimensions_abort_once_the_header_is_read(serve, output):
+    body = jpeg(200, 300, quality=100)
+    assert len(body) > 4 * CHUNK
+    response = serve(body)
+
+    assert not covers.download_from_url(URL, output)
+    assert response.chunks_read == 1
+    assert untouched(output)
+
+def test_non_image_body_is_rejected(serve, output):
+    serve(b'<html>' + b'x' * 50_000 + b'</html>')
+
+    assert not covers.download_from_url(URL, output, validate_quality=False)
+    assert untouched(output)
+
+def test_error_status_leaves_the_file_alone(serve, output):
+    response = serve(jpeg(600, 900), status_code=503)
+
+    assert not covers.download_from_url(URL, output)
+    assert response.chunks_read == 0
+    assert untouched(output)
+
+@pytest.mark.parametrize('validate_quality', [True, False])
+def test_header_larger_than_the_probe_limit_is_still_accepted(serve, output, validate_quality):
+    body = jpeg(800, 1200, icc_profile=b'\0' * 300_000)
+    probe = ImageProbe()
+    for start in range(0, len(body), CHUNK):
+        probe.feed(body[start:start + CHUNK])
+    assert probe.size is None and probe.done
+    serve(body)
+
+    assert covers.download_from_url(URL, output, validate_quality=validate_quality)
+    assert output.read_bytes() == body
+
+def test_probe_parses_only_when_the_buffer_doubles(monkeypatch):
+    body = jpeg(800, 1200, icc_profile=b'\0' * 200_000)
+    parses = []
+    real_open = Image.open
+    monkeypatch.setattr(Image, 'open', lambda fp, *args: parses.append(1) or real_open(fp, *args))
+    probe = ImageProbe()
+    for start in range(0, len(body), 1024):
+        if probe.feed(body[start:start + 1024]):
+            break
+
+    assert probe.size == (800, 1200)
+    assert len(parses) <= 10
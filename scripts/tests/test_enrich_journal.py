@@ -0,0 +1,70 @@
+"""
+enrich.py journals each finished book, and a resumed run replays instead of redoing it
+"""
+
+import copy
+import time
+
+import pytest
+
+import enrich
+from catalogue import Catalogue
+from journal import Journal
+
+BOOKS = {'2025': {'books': [
+    {'id': f"book-2025-{n}", 'title': f"Book {n}", 'author': 'Someone', 'isbn': '', 'pageCount': None}
+    for n in range(1, 21)
+]}}
+
+class PagesStage:
+    """
+    Stands in for the network stages: sets pageCount, or interrupts at one book
+    Books after the interrupt are slow, like real lookups, so cancelling them is observable
+    """
+    name = 'pages'
+
+    def __init__(self, interrupt_at=None):
+        self.interrupt_at = interrupt_at
+        self.interrupted = False
+        self.seen = []
+
+    def run(self, ctx):
+        if ctx.book['id'] == self.interrupt_at:
+            self.interrupted = True
+            raise KeyboardInterrupt
+        if self.interrupted:
+            time.sleep(0.05)
+        self.seen.append(ctx.book['id'])
+        ctx.book['pageCount'] = 100 + ctx.position
+        return 'found'
+
+def catalogue(tmp_path):
+    return Catalogue(copy.deepcopy(BOOKS), path=None, covers_dir=tmp_path / 'covers')
+
+def test_interrupted_run_resumes_from_the_journal(tmp_path):
+    path = tmp_path / 'enrich.journal'
+    journal = Journal(path)
+    stage = PagesStage(interrupt_at='book-2025-4')
+    with pytest.raises(KeyboardInterrupt):
+        enrich.run_pipeline(catalogue(tmp_path), [stage], workers=1, journal=journal)
+    journal.close()
+    # The queued books were cancelled; at most the one already picked up still ran
+    assert stage.seen[:3] == ['book-2025-1', 'book-2025-2', 'book-2025-3']
+    assert len(stage.seen) <= 4
+    done = set(stage.seen)
+
+    journal = Journal(path, resume=True)
+    assert set(journal.entries) == done
+    assert journal.get('book-2025-2')['fields'] == {'pageCount': 102}
+    assert journal.get('book-2025-2')['outcome']['stages'] == {'pages': 'found'}
+
+    resumed = catalogue(tmp_path)
+    assert journal.replay(resumed) == len(done)
+    stage = PagesStage()
+    stats, problems = enrich.run_pipeline(resumed, [stage], workers=2, journal=journal)
+    journal.finish()
+
+    assert sorted(stage.seen) == sorted(book['id'] for book in BOOKS['2025']['books'] if book['id'] not in done)
+    assert stats['journal.resumed'] == len(done) and stats['pages.found'] == 20 - len(done)
+    assert [book['pageCount'] for _, _, book in resumed] == [100 + n for n in range(1, 21)]
+    assert not path.exists()
@@ -0,0 +1,94 @@
+"""
+The hedged search stops slow providers at the deadline and feeds the adaptive provider order
+"""
+
+import threading
+import time
+
+import pytest
+
+import download_covers_enhanced as covers
+import http_client
+import provider_stats
+
+ISBN = '9780441013593'
+GOOD_URL = 'https://covers.openlibrary.org/b/id/1-L.jpg'
+
+class SlowSession:
+    """Every request takes a while, like a provider that is down"""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None, stream=False):
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.05)
+        raise http_client.requests.ConnectionError('timed out')
+
+@pytest.fixture
+def hedged(monkeypatch, tmp_path):
+    session = SlowSession()
+    client = http_client.HttpClient(max_retries=50, backoff=0.01, max_backoff=0.01)
+    client._sessions['slow.example.test'] = session
+    monkeypatch.setattr(http_client, '_client', client)
+
+    def slow_urls(title, author, volume_info=None, cancelled=None):
+        client.get('https://slow.example.test/search', cancelled=cancelled)
+        return []
+
+    monkeypatch.setattr(covers, 'openlibrary_cover_urls', lambda isbn, cancelled=None: [GOOD_URL])
+    monkeypatch.setattr(covers, 'google_cover_urls', slow_urls)
+    monkeypatch.setattr(covers, 'internet_archive_cover_urls', lambda title, author, isbn, cancelled=None: [])
+    monkeypatch.setattr(covers, 'probe_cover', lambda url, cancelled=None: {
+        'url': url, 'width': 800, 'height': 1200, 'bytes': 200_000})
+    monkeypatch.setattr(covers, 'download_from_url', lambda url, path, validate_quality=True: url == GOOD_URL)
+    provider_stats.clear()
+    yield session
+    provider_stats.clear()
+
+def test_slow_provider_is_cancelled_at_the_deadline(hedged, tmp_path):
+    book = {'id': 'book-2025-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': ISBN}
+    attempts = []
+
+    outcome = covers.fetch_cover_hedged(book, tmp_path / f"{ISBN}.jpg", attempts=attempts, deadline=0.3)
+
+    assert outcome == 'openlibrary_success'
+    time.sleep(0.1)
+    calls = hedged.calls
+    time.sleep(0.3)
+    # Without cancellation the 50 retries would keep going for seconds
+    assert hedged.calls == calls < 50
+    assert {attempt['provider']: attempt['result'] for attempt in attempts} == {
+        'openlibrary': 'success', 'google': 'timeout', 'internet_archive': 'miss'}
+
+    stats = provider_stats.get_stats()
+    bucket = provider_stats.isbn_bucket(ISBN)
+    assert stats.buckets[bucket]['openlibrary']['successes'] == 1
+    assert stats.buckets[bucket]['google'] == {'attempts': 1, 'successes': 0,
+                                              'seconds': pytest.approx(0.3, abs=0.1)}
+
+def test_searches_share_one_bounded_pool(hedged, tmp_path, monkeypatch):
+    created = []
+    real_executor = covers.ThreadPoolExecutor
+    monkeypatch.setattr(covers, '_hedge_executor', None)
+    monkeypatch.setattr(covers, 'ThreadPoolExecutor', lambda *args, **kwargs: created.append(kwargs) or
+                        real_executor(*args, **kwargs))
+    for n in range(3):
+        book = {'id': f"book-2025-{n}", 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': ISBN}
+        covers.fetch_cover_hedged(book, tmp_path / f"{n}.jpg", deadline=0.05)
+
+    assert created == [{'max_workers': covers.HEDGE_WORKERS, 'thread_name_prefix': 'hedge'}]
+
+def test_provider_that_was_never_reached_is_not_recorded(hedged, tmp_path):
+    http_client.get_client().max_retries = 0
+    book = {'id': 'book-2025-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': ISBN}
+    attempts = []
+
+    covers.fetch_cover_hedged(book, tmp_path / f"{ISBN}.jpg", attempts=attempts, deadline=0.3)
+
+    assert {attempt['provider']: attempt['result'] for attempt in attempts} == {
+        'openlibrary': 'success', 'google': 'error', 'internet_archive': 'miss'}
+    assert set(provider_stats.get_stats().buckets[provider_stats.isbn_bucket(ISBN)]) == {
+        'openlibrary', 'internet_archive'}
@@ -0,0 +1,114 @@
+"""
+Retries, backoff and Retry-After handling in the shared HTTP client
+"""
+
+import email.utils
+
+import pytest
+import requests
+
+import http_client
+
+URL = 'https://example.test/volume'
+
+class StubResponse:
+    def __init__(self, status_code, headers=None, content=b'{}'):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class StubSession:
+    """Answers each get() with the next scripted response, raising exceptions as they come"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    def get(self, url, timeout=None, stream=False):
+        self.calls += 1
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        return step
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(http_client.time, 'sleep', delays.append)
+    return delays
+
+def client_with(script, **options):
+    client = http_client.HttpClient(backoff=0.5, max_backoff=30.0, **options)
+    session = StubSession(script)
+    client._sessions['example.test'] = session
+    return client, session
+
+def test_retry_after_seconds_is_honoured(sleeps):
+    client, session = client_with([StubResponse(429, {'Retry-After': '2'}), StubResponse(200)])
+
+    response = client.get(URL)
+
+    assert response.status_code == 200
+    assert session.calls == 2
+    assert sleeps == [2.0]
+    assert client.stats()['example.test']['retries'] == 1
+
+def test_retry_after_http_date_is_honoured(sleeps, monkeypatch):
+    now = 1_700_000_000.0
+    monkeypatch.setattr(http_client.time, 'time', lambda: now)
+    retry_at = email.utils.formatdate(now + 5, usegmt=True)
+    client, session = client_with([StubResponse(503, {'Retry-After': retry_at}), StubResponse(200)])
+
+    assert client.get(URL).status_code == 200
+    assert sleeps == [pytest.approx(5.0)]
+
+def test_retry_after_is_capped_at_max_backoff(sleeps):
+    client, session = client_with([StubResponse(429, {'Retry-After': '3600'}), StubResponse(200)])
+
+    client.get(URL)
+
+    assert sleeps == [30.0]
+
+@pytest.mark.parametrize('value', ['soon', 'Mon, 99 Foo 2024 25:61:00 GMT', '', '-'])
+def test_malformed_retry_after_falls_back_to_backoff(sleeps, value):
+    client, session = client_with([StubResponse(429, {'Retry-After': value}), StubResponse(200)])
+
+    assert client.get(URL).status_code == 200
+    # First attempt: backoff * 2**0 plus up to one backoff of jitter
+    assert len(sleeps) == 1 and 0.5 <= sleeps[0] <= 1.0
+
+def test_backoff_grows_exponentially_and_returns_the_last_response(sleeps):
+    client, session = client_with([StubResponse(500)] * 4, max_retries=3)
+
+    response = client.get(URL)
+
+    assert response.status_code == 500
+    assert session.calls == 4
+    for attempt, delay in enumerate(sleeps):
+        assert 0.5 * 2 ** attempt <= delay <= 0.5 * 2 ** attempt + 0.5
+
+def test_connection_errors_are_retried(sleeps):
+    client, session = client_with([requests.ConnectionError('reset'), requests.Timeout('slow'),
+                                   StubResponse(200)])
+
+    assert client.get(URL).status_code == 200
+    counters = client.stats()['example.test']
+    assert counters['errors'] == 2 and counters['retries'] == 2
+    assert len(sleeps) == 2
+
+def test_connection_error_is_raised_once_retries_run_out(sleeps):
+    client, session = client_with([requests.ConnectionError('down')] * 3, max_retries=2)
+
+    with pytest.raises(requests.ConnectionError):
+        client.get(URL)
+    assert session.calls == 3
+
+def test_client_errors_are_not_retried(sleeps):
+    client, session = client_with([StubResponse(404)])
+
+    assert client.get(URL).status_code == 404
+    assert session.calls == 1 and sleeps == []
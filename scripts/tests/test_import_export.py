@@ -0,0 +1,131 @@
+"""
+Merging exports: identity edits re-list just that book, dry runs count like
+real ones, and --enrich runs the pipeline the way enrich.py does
+"""
+
+import copy
+import json
+import sys
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+import cover_hashes
+import cover_placeholders
+import enrich
+import http_client
+import import_export
+import instrumentation
+import provider_stats
+from catalogue import Catalogue
+from import_export import NEW_BOOK_DEFAULTS, goodreads_fields, import_rows, storygraph_fields
+
+BOOKS = {
+    '2025': {'books': [
+        {'id': 'book-2025-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '9780441013593'},
+        {'id': 'book-2025-2', 'title': 'Emma', 'author': 'Jane Austen', 'isbn': ''},
+    ]},
+    '2024': {'books': [
+        {'id': 'book-2024-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '0441013597'},
+        {'id': 'book-2024-2', 'title': 'Persuasion', 'author': 'Jane Austen', 'isbn': '9780141439686'},
+    ]},
+}
+
+def row(**cells):
+    return {'Read Status': 'read', **cells}
+
+def indexes(catalogue):
+    """Every lookup a later row can hit, as ids"""
+    ids = lambda books: [book['id'] for book in books]
+    return {
+        'isbn': {key: ids(books) for key, books in catalogue._by_isbn.items() if books},
+        'title': {key: ids(books) for key, books in catalogue._by_title_author.items() if books},
+        'file': {key: ids(books) for key, books in catalogue._by_filename.items() if books},
+        'works': {work: ids(books) for work, books in catalogue.works().items()},
+    }
+
+@pytest.fixture
+def catalogue():
+    return Catalogue(copy.deepcopy(BOOKS), path=None)
+
+def test_identity_edits_match_a_full_reindex(catalogue, monkeypatch):
+    rows = [
+        row(id='book-2025-2', Title='Emma', Authors='Jane Austen', **{'ISBN/UID': '9780141439587'}),
+        row(id='book-2024-2', Title='Persuasion (Annotated)', Authors='Jane Austen'),
+        # Matched through the ISBN the first row just gave the book
+        row(Title='Emma', Authors='J. Austen', **{'ISBN/UID': '9780141439587'}),
+    ]
+    monkeypatch.setattr(Catalogue, 'reindex', lambda self: pytest.fail("full reindex per row"))
+    stats, touched = import_rows(catalogue, rows, storygraph_fields, echo=lambda line: None)
+    monkeypatch.undo()
+
+    assert stats['updated'] == 3 and stats['added'] == 0
+    assert touched == {'book-2025-2', 'book-2024-2'}
+    assert catalogue.find_isbn('9780141439587')[0]['author'] == 'J. Austen'
+    assert catalogue.find_title_author('Emma', 'Jane Austen') == []
+
+    incremental = indexes(catalogue)
+    catalogue.reindex()
+    assert incremental == indexes(catalogue)
+
+def test_lookups_keep_catalogue_order(catalogue):
+    dune = catalogue.get('book-2024-1')
+    old = dict(dune)
+    dune['isbn'] = '9780441013593'
+    catalogue.reindex_book(dune, old)
+    assert [book['id'] for book in catalogue.find_isbn('9780441013593')] == ['book-2025-1', 'book-2024-1']
+    assert catalogue.readings(dune)[0]['id'] == 'book-2025-1'
+
+def test_dry_run_counts_match_a_real_run(catalogue):
+    rows = [
+        row(Title='Middlemarch', Authors='George Eliot', **{'Dates Read': '2023/03/01-2023/03/20'}),
+        # The same new book again: a real run matches the reading the first row added
+        row(Title='Middlemarch', Authors='George Eliot', **{'Dates Read': '2023/03/01-2023/03/20'}),
+        row(id='book-2025-2', Title='Emma', Authors='Jane Austen', **{'ISBN/UID': '9780141439587'}),
+    ]
+    before = copy.deepcopy(catalogue.data)
+    dry_stats, dry_touched = import_rows(catalogue, rows, storygraph_fields, dry_run=True, echo=lambda line: None)
+    assert catalogue.data == before
+
+    stats, touched = import_rows(catalogue, rows, storygraph_fields, echo=lambda line: None)
+    assert dry_stats == stats
+    assert stats['added'] == 1 and stats['unchanged'] == 1 and stats['updated'] == 1
+    assert dry_touched == touched
+
+def test_goodreads_rows_only_set_catalogue_fields():
+    status, fields = goodreads_fields({
+        'Title': 'Dune', 'Author': 'Frank Herbert', 'ISBN13': '="9780441013593"', 'Exclusive Shelf': 'read',
+        'Average Rating': '4.27', 'Publisher': 'Ace', 'Year Published': '2005', 'Date Read': '2024/01/05',
+        'Bookshelves': 'favorites, to-read', 'My Rating': '5', 'Number of Pages': '688',
+    })
+    assert status == 'read'
+    assert set(fields) <= set(NEW_BOOK_DEFAULTS)
+    assert fields['tags'] == ['favorites']
+
+def test_enrich_flag_sets_up_and_tears_down_like_enrich(tmp_path, monkeypatch):
+    books = tmp_path / 'books.json'
+    books.write_text(json.dumps(BOOKS))
+    export = tmp_path / 'export.csv'
+    export.write_text("Title,Authors,ISBN/UID,Read Status,Dates Read\n"
+                      "Middlemarch,George Eliot,,read,2023/03/01-2023/03/20\n")
+    calls = []
+    # main() configures the shared client; restore it for the other tests afterwards
+    monkeypatch.setattr(http_client, '_client', http_client._client)
+    monkeypatch.setattr(sys, 'argv', ['import_export.py', str(export), '--books', str(books),
+                                      '--covers-dir', str(tmp_path / 'covers'), '--enrich',
+                                      '--offline', '--no-cache', '--fixed-order'])
+    monkeypatch.setattr(import_export, 'Manifest', lambda: SimpleNamespace(save=lambda: calls.append('manifest')))
+    monkeypatch.setattr(enrich, 'run_pipeline', lambda catalogue, stages, **options:
+                        calls.append(('pipeline', sorted(options['only']))) or (Counter(), []))
+    monkeypatch.setattr(cover_hashes, 'seed_known_placeholders', lambda: calls.append('seed') or 0)
+    monkeypatch.setattr(provider_stats, 'configure', lambda adaptive: calls.append(('adaptive', adaptive)))
+    monkeypatch.setattr(instrumentation, 'configure_from_args', lambda args: calls.append('instrumentation'))
+    for module in (cover_hashes, cover_placeholders, provider_stats):
+        monkeypatch.setattr(module, 'save_all', lambda module=module: calls.append(module.__name__))
+
+    import_export.main()
+
+    assert calls == ['instrumentation', ('adaptive', False), 'seed', ('pipeline', ['book-2023-1']), 'manifest',
+                     'cover_hashes', 'cover_placeholders', 'provider_stats']
+    assert json.loads(books.read_text())['2023']['books'][0]['title'] == 'Middlemarch'
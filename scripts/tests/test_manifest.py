@@ -0,0 +1,108 @@
+"""
+Skip decisions and retry backoff in the enrichment manifest
+"""
+
+import os
+
+import pytest
+
+from manifest import DAY, RETRY_MAX, Manifest
+
+NOW = 1_700_000_000.0
+
+@pytest.fixture
+def manifest(tmp_path):
+    return Manifest(tmp_path / 'manifest.json')
+
+@pytest.fixture
+def book():
+    return {'id': 'book-2025-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '9780441013593',
+            'coverImage': '/covers/9780441013593.jpg', 'pageCount': 412, 'rating': 4}
+
+@pytest.fixture
+def cover(tmp_path):
+    path = tmp_path / '9780441013593.jpg'
+    path.write_bytes(b'cover bytes')
+    return path
+
+DONE = {'pages': 'already_has', 'covers': 'already_exists'}
+MISSING = {'pages': 'not_found', 'covers': 'already_exists'}
+
+def test_new_book_needs_work(manifest, book, cover):
+    assert manifest.needs_work(book, cover, now=NOW) == 'new'
+
+def test_unchanged_book_is_skipped(manifest, book, cover):
+    manifest.record(book, cover, DONE, now=NOW)
+    assert manifest.needs_work(book, cover, now=NOW + 365 * DAY) is None
+
+def test_fields_outside_the_inputs_do_not_count(manifest, book, cover):
+    manifest.record(book, cover, DONE, now=NOW)
+    book['rating'] = 5
+    assert manifest.needs_work(book, cover, now=NOW) is None
+
+@pytest.mark.parametrize('field, value', [('isbn', '0441013597'), ('title', 'Dune Messiah'),
+                                          ('author', 'Brian Herbert'), ('coverImage', ''),
+                                          ('pageCount', 896)])
+def test_changed_inputs_need_work(manifest, book, cover, field, value):
+    manifest.record(book, cover, DONE, now=NOW)
+    book[field] = value
+    assert manifest.needs_work(book, cover, now=NOW) == 'inputs changed'
+
+def test_changed_cover_file_needs_work(manifest, book, cover):
+    manifest.record(book, cover, DONE, now=NOW)
+    cover.write_bytes(b'a different cover')
+    assert manifest.needs_work(book, cover, now=NOW) == 'cover file changed'
+
+def test_touched_cover_file_needs_work(manifest, book, cover):
+    manifest.record(book, cover, DONE, now=NOW)
+    st = cover.stat()
+    os.utime(cover, (st.st_atime, st.st_mtime + 10))
+    assert manifest.needs_work(book, cover, now=NOW) == 'cover file changed'
+
+def test_removed_cover_file_needs_work(manifest, book, cover):
+    manifest.record(book, cover, DONE, now=NOW)
+    cover.unlink()
+    assert manifest.needs_work(book, cover, now=NOW) == 'cover file changed'
+
+def test_incomplete_book_waits_out_its_retry_window(manifest, book, cover):
+    manifest.record(book, cover, MISSING, now=NOW)
+    entry = manifest.entries[book['id']]
+    assert entry['incomplete'] and entry['failures'] == 1
+    assert entry['retry_after'] == NOW + DAY
+    assert manifest.needs_work(book, cover, now=NOW + DAY - 1) is None
+    assert manifest.needs_work(book, cover, now=NOW + DAY) == 'retry due'
+
+def test_backoff_doubles_up_to_the_cap(manifest, book, cover):
+    now = NOW
+    windows = []
+    for _ in range(8):
+        manifest.record(book, cover, MISSING, now=now)
+        windows.append((manifest.entries[book['id']]['retry_after'] - now) / DAY)
+        now = manifest.entries[book['id']]['retry_after']
+    assert windows == [1, 2, 4, 8, 16, 30, 30, 30]
+    assert RETRY_MAX == 30 * DAY
+
+def test_success_resets_the_failures(manifest, book, cover):
+    manifest.record(book, cover, MISSING, now=NOW)
+    manifest.record(book, cover, MISSING, now=NOW + DAY)
+    manifest.record(book, cover, DONE, now=NOW + 3 * DAY)
+    entry = manifest.entries[book['id']]
+    assert entry['failures'] == 0 and not entry['incomplete'] and 'retry_after' not in entry
+
+def test_offline_outcome_keeps_the_earlier_backoff(manifest, book, cover):
+    manifest.record(book, cover, MISSING, now=NOW)
+    manifest.record(book, cover, {'pages': 'offline'}, now=NOW + 1)
+    entry = manifest.entries[book['id']]
+    assert entry['failures'] == 1 and entry['retry_after'] == NOW + DAY
+
+def test_record_survives_a_save(manifest, book, cover, tmp_path):
+    attempts = [{'provider': 'openlibrary', 'result': 'success', 'at': NOW}]
+    manifest.record(book, cover, DONE, attempts=attempts, metadata_source='openlibrary:bulk', now=NOW)
+    manifest.save()
+
+    reloaded = Manifest(tmp_path / 'manifest.json')
+    entry = reloaded.entries[book['id']]
+    assert entry['providers'] == {'openlibrary': {'result': 'success', 'at': NOW}}
+    assert entry['metadata_source'] == 'openlibrary:bulk'
+    assert entry['cover']['file'] == cover.name and entry['cover']['size'] == len(b'cover bytes')
+    assert reloaded.needs_work(book, cover, now=NOW) is None
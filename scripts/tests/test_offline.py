@@ -0,0 +1,77 @@
+"""
+--offline serves metadata from a pre-seeded response cache without touching the network
+"""
+
+import pytest
+import requests
+
+import enrich
+import google_books
+import http_client
+import open_library
+from catalogue import Catalogue
+from manifest import Manifest
+from response_cache import ResponseCache
+
+ISBN = '9780143127741'
+
+@pytest.fixture
+def offline_client(tmp_path, monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError(f"network access in offline mode: {args[1:]}")
+
+    monkeypatch.setattr(requests.Session, 'get', no_network)
+    monkeypatch.setattr(http_client, '_client', None)
+    cache = ResponseCache(tmp_path / 'responses.sqlite3')
+    client = http_client.configure(cache=cache, offline=True)
+    yield client
+    cache.close()
+    open_library.clear()
+
+def test_cached_volume_is_served_offline(offline_client):
+    url = f"{google_books.VOLUMES_URL}?q=isbn:{ISBN}&maxResults=1"
+    offline_client.cache.put(url, 200, {'totalItems': 1, 'items': [{'volumeInfo': {'pageCount': 352}}]})
+
+    volume = google_books.volume_by_isbn(ISBN)
+
+    assert google_books.page_count_from_volume(volume) == 352
+    assert offline_client.cache.hits == 1
+    assert offline_client.stats() == {}
+
+def test_expired_entries_are_still_served_offline(offline_client):
+    url = f"{google_books.VOLUMES_URL}?q=isbn:{ISBN}&maxResults=1"
+    offline_client.cache.put(url, 200, {'totalItems': 0}, ttl=-1)
+
+    assert offline_client.cache.get(url) is None
+    assert google_books.volume_by_isbn(ISBN) is None
+    assert offline_client.stats() == {}
+
+def test_cached_bulk_lookup_is_served_offline(offline_client):
+    url = f"{open_library.BOOKS_API_URL}?bibkeys=ISBN:{ISBN}&format=json&jscmd=data"
+    record = {'number_of_pages': 352, 'cover': {'large': 'https://covers.openlibrary.org/b/id/123-L.jpg'}}
+    offline_client.cache.put(url, 200, {f"ISBN:{ISBN}": record})
+
+    assert open_library.resolve_isbns([ISBN]) == 1
+    assert open_library.cover_id_for_isbn(ISBN) == 123
+    assert open_library.page_count_for_isbn(ISBN) == 352
+
+def test_uncached_lookup_fails_without_network(offline_client):
+    with pytest.raises(http_client.OfflineError):
+        google_books.volume_by_isbn(ISBN)
+    assert offline_client.stats() == {}
+
+def test_offline_misses_are_deferred_not_backed_off(offline_client, tmp_path):
+    book = {'id': 'book-2025-1', 'title': 'Uncached', 'author': 'Someone', 'isbn': ISBN,
+            'coverImage': '', 'pageCount': None}
+    catalogue = Catalogue({'2025': {'books': [book]}}, path=None, covers_dir=tmp_path / 'covers')
+    manifest = Manifest(tmp_path / 'manifest.json')
+    stages = [enrich.PageCountStage(), enrich.CoverStage()]
+
+    stats, problems = enrich.run_pipeline(catalogue, stages, workers=1, manifest=manifest)
+
+    assert stats['pages.offline'] == 1 and stats['covers.offline'] == 1
+    entry = manifest.entries['book-2025-1']
+    assert entry['failures'] == 0
+    assert entry['retry_after'] == entry['updated_at']
+    # The next (online) run picks the book up again instead of waiting out a backoff
+    assert manifest.needs_work(book, tmp_path / 'covers' / f"{ISBN}.jpg", now=entry['updated_at']) == 'retry due'
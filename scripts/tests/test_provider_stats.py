@@ -0,0 +1,128 @@
+"""
+Adaptive provider order: ISBN groups, planning, persistence, and which attempts count
+"""
+
+import json
+
+import pytest
+
+import download_covers_enhanced as covers
+import http_client
+import provider_stats
+from provider_stats import ProviderStats, isbn_bucket
+
+ISBN = '9780441013593'
+
+@pytest.mark.parametrize('isbn, bucket', [
+    ('9780441013593', '978-0'),
+    ('0-441-01359-7', '978-0'),
+    ('9788420412146', '978-84'),
+    ('9789531234567', '978-953'),
+    ('9786551234567', '978-65'),
+    ('9786001234567', '978-600'),
+    ('9789993712345', '978-99937'),
+    ('9798123456789', '979-8'),
+    ('9791032712345', '979-10'),
+    ('', 'no-isbn'),
+    ('12345', 'no-isbn'),
+])
+def test_isbn_bucket(isbn, bucket):
+    assert isbn_bucket(isbn) == bucket
+
+def record(stats, provider, attempts, successes, seconds):
+    for n in range(attempts):
+        stats.record(ISBN, provider, n < successes, seconds)
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = ProviderStats(path=None)
+    record(stats, 'openlibrary', 20, 8, 3.0)
+    record(stats, 'google', 20, 16, 0.5)
+    record(stats, 'internet_archive', 20, 0, 1.0)
+    return stats
+
+def test_plan_puts_the_fastest_expected_hit_first_and_skips_dead_providers(stats, monkeypatch):
+    monkeypatch.setattr(provider_stats.random, 'random', lambda: 0.5)
+    order, estimates = stats.plan(ISBN, list(provider_stats.FIXED_ORDER))
+
+    assert order == ['google', 'openlibrary']
+    assert estimates['internet_archive'][0] < provider_stats.SKIP_RATE
+    assert stats.run['reordered'] == 1 and stats.run['skipped'] == 1
+
+def test_plan_still_explores_skipped_providers(stats, monkeypatch):
+    monkeypatch.setattr(provider_stats.random, 'random', lambda: provider_stats.EXPLORE_RATE / 2)
+    order, _ = stats.plan(ISBN, list(provider_stats.FIXED_ORDER))
+
+    assert order == ['google', 'openlibrary', 'internet_archive']
+
+def test_plan_without_history_keeps_the_fixed_order(monkeypatch):
+    monkeypatch.setattr(provider_stats.random, 'random', lambda: 0.5)
+    order, _ = ProviderStats(path=None).plan(ISBN, list(provider_stats.FIXED_ORDER))
+
+    assert order == list(provider_stats.FIXED_ORDER)
+
+def test_record_and_save_round_trip(tmp_path):
+    path = tmp_path / 'provider_stats.json'
+    stats = ProviderStats(path)
+    stats.record(ISBN, 'google', True, 0.25)
+    stats.record(ISBN, 'google', False, 0.5)
+    stats.save()
+
+    assert ProviderStats(path).buckets == {'978-0': {'google': {'attempts': 2, 'successes': 1, 'seconds': 0.75}}}
+    # Nothing new: not rewritten
+    path.write_text(json.dumps({'version': provider_stats.VERSION, 'buckets': {}}))
+    stats.save()
+    assert ProviderStats(path).buckets == {}
+
+def test_stats_from_another_version_are_ignored(tmp_path):
+    path = tmp_path / 'provider_stats.json'
+    path.write_text(json.dumps({'version': provider_stats.VERSION + 1, 'buckets': {'978-0': {}}}))
+
+    assert ProviderStats(path).buckets == {}
+
+class DownSession:
+    def get(self, url, timeout=None, stream=False):
+        raise http_client.requests.ConnectionError('connection refused')
+
+@pytest.fixture
+def waterfall(monkeypatch):
+    """fetch_cover with one unreachable provider, one miss and one hit"""
+    client = http_client.HttpClient(max_retries=0)
+    client._sessions['covers.openlibrary.org'] = DownSession()
+    monkeypatch.setattr(http_client, '_client', client)
+
+    def unreachable(isbn, output_path):
+        try:
+            client.get(f"https://covers.openlibrary.org/b/isbn/{isbn}-L.jpg")
+        except Exception:
+            pass
+        return False
+
+    monkeypatch.setattr(covers, 'get_cover_from_openlibrary_isbn', unreachable)
+    monkeypatch.setattr(covers, 'get_cover_from_google_books', lambda title, author, path, volume_info: False)
+    monkeypatch.setattr(covers, 'get_cover_from_internet_archive', lambda title, author, isbn, path: True)
+    monkeypatch.setattr(provider_stats, '_adaptive', False)
+    provider_stats.clear()
+    yield client
+    provider_stats.clear()
+
+def test_unreached_providers_are_not_recorded_as_misses(waterfall, tmp_path):
+    book = {'id': 'book-2025-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': ISBN}
+    attempts = []
+
+    assert covers.fetch_cover(book, tmp_path / f"{ISBN}.jpg", attempts=attempts) == 'internet_archive_success'
+    assert [(attempt['provider'], attempt['result']) for attempt in attempts] == [
+        ('openlibrary', 'error'), ('google', 'miss'), ('internet_archive', 'success')]
+    bucket = provider_stats.get_stats().buckets['978-0']
+    assert set(bucket) == {'google', 'internet_archive'}
+    assert (bucket['google']['successes'], bucket['internet_archive']['successes']) == (0, 1)
+
+def test_offline_attempts_are_not_recorded(waterfall, tmp_path, monkeypatch):
+    monkeypatch.setattr(covers, 'get_cover_from_internet_archive', lambda title, author, isbn, path: False)
+    waterfall.offline = True
+    book = {'id': 'book-2025-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': ISBN}
+    attempts = []
+
+    assert covers.fetch_cover(book, tmp_path / f"{ISBN}.jpg", attempts=attempts) == 'failed'
+    assert {attempt['result'] for attempt in attempts} == {'error'}
+    assert provider_stats.get_stats().buckets == {}
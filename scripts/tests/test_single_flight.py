@@ -0,0 +1,65 @@
+"""
+SingleFlight runs each key once, shares the result with concurrent and later callers, and never stores errors
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from single_flight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return 'volume'
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flights.do, 'isbn:9780441013593', slow)
+        started.wait(5)
+        followers = [executor.submit(flights.do, 'isbn:9780441013593', slow) for _ in range(3)]
+        release.set()
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert runs == [1]
+    assert results == [('volume', False)] + [('volume', True)] * 3
+    assert flights.stats == {'calls': 1, 'shared': 3}
+
+def test_later_callers_get_the_stored_result_until_forgotten():
+    flights = SingleFlight()
+    values = iter(['first', 'second'])
+
+    assert flights.do('key', lambda: next(values)) == ('first', False)
+    assert flights.do('key', lambda: next(values)) == ('first', True)
+    assert flights.do('other', lambda: 'other') == ('other', False)
+    flights.forget('key')
+    assert flights.do('key', lambda: next(values)) == ('second', False)
+
+def test_errors_reach_waiters_but_are_not_stored():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ConnectionError('provider down')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flights.do, 'key', failing)
+        started.wait(5)
+        follower = executor.submit(flights.do, 'key', failing)
+        # Give the follower time to start waiting on the leader's call
+        threading.Event().wait(0.05)
+        release.set()
+        with pytest.raises(ConnectionError):
+            leader.result()
+        with pytest.raises(ConnectionError):
+            follower.result()
+
+    assert flights.do('key', lambda: 'recovered') == ('recovered', False)
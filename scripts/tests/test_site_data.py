@@ -0,0 +1,46 @@
+"""
+The committed front-end data (year shards, books index, search index) must
+match books.json; npm run build regenerates them, and these tests catch a
+books.json change committed without them
+"""
+
+from pathlib import Path
+
+import pytest
+
+import build_search_index
+from build_book_shards import build_shards, load_sidecar, stale_outputs
+from catalogue import Catalogue
+
+ROOT = Path(__file__).resolve().parents[2]
+DATA = ROOT / 'src' / 'data'
+
+@pytest.fixture
+def catalogue():
+    return Catalogue.load(DATA / 'books.json', ROOT / 'public' / 'covers')
+
+def shards_for(catalogue):
+    return build_shards(catalogue, load_sidecar(DATA / 'cover_derivatives.json'),
+                        load_sidecar(DATA / 'cover_colors.json'))
+
+def test_shards_match_books_json(catalogue):
+    index, shards = shards_for(catalogue)
+    assert stale_outputs(index, shards, DATA / 'books_index.json', ROOT / 'public' / 'data' / 'books') == []
+
+def test_search_index_matches_books_json(catalogue):
+    current = load_sidecar(DATA / 'search_index.json')
+    assert current['fingerprint'] == build_search_index.fingerprint(catalogue)
+
+def test_an_edited_book_makes_the_shards_stale(catalogue):
+    year, position, book = next(iter(catalogue))
+    book['pageCount'] = (book.get('pageCount') or 0) + 1
+    index, shards = shards_for(catalogue)
+    assert str(DATA / 'books_index.json') in stale_outputs(
+        index, shards, DATA / 'books_index.json', ROOT / 'public' / 'data' / 'books')
+
+def test_favourites_carry_only_card_fields(catalogue):
+    index, shards = shards_for(catalogue)
+    assert index['favorites']
+    for card in index['favorites']:
+        assert set(card) <= {'id', 'title', 'author', 'coverImage', 'coverVariants', 'favorite', 'yearRead'}
+        assert card['favorite'] is True
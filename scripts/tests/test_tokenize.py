@@ -0,0 +1,53 @@
+"""
+The search box (src/utils/tokenize.js) folds text exactly like the index builder
+Both tokenizers are checked against the same fixture; the JavaScript side
+needs node and is skipped without it
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import unicodedata
+from pathlib import Path
+
+import pytest
+
+from build_search_index import tokenize
+
+FIXTURE = Path(__file__).resolve().parent / 'fixtures' / 'tokenize.json'
+TOKENIZE_JS = Path(__file__).resolve().parents[2] / 'src' / 'utils' / 'tokenize.js'
+
+# Reads a JSON list of strings on stdin, writes the JSON list of their tokens
+NODE_SCRIPT = f"""
+import {{ tokenize }} from {json.dumps(TOKENIZE_JS.as_uri())};
+let input = '';
+process.stdin.on('data', (chunk) => input += chunk);
+process.stdin.on('end', () => process.stdout.write(JSON.stringify(JSON.parse(input).map(tokenize))));
+"""
+
+with open(FIXTURE, 'r', encoding='utf-8') as f:
+    CASES = json.load(f)
+
+def js_tokenize(texts):
+    node = shutil.which('node')
+    if not node:
+        pytest.skip("node is not installed")
+    result = subprocess.run([node, '--input-type=module', '-e', NODE_SCRIPT], input=json.dumps(texts),
+                            capture_output=True, text=True, encoding='utf-8', check=True)
+    return json.loads(result.stdout)
+
+@pytest.mark.parametrize('case', CASES, ids=[case['text'] or '(empty)' for case in CASES])
+def test_python_tokenizer_matches_the_fixture(case):
+    assert tokenize(case['text']) == case['tokens']
+
+def test_javascript_tokenizer_matches_the_fixture():
+    assert js_tokenize([case['text'] for case in CASES]) == [case['tokens'] for case in CASES]
+
+def test_tokenizers_agree_on_every_character():
+    # Characters newer than Python's Unicode database are left out: the two runtimes can't agree on them
+    texts = [f"a{chr(point)}b {chr(point)}" for point in range(sys.maxunicode + 1)
+             if unicodedata.category(chr(point)) not in ('Cn', 'Co', 'Cs')]
+    mismatches = [(text, tokenize(text), tokens) for text, tokens in zip(texts, js_tokenize(texts))
+                  if tokenize(text) != tokens]
+    assert mismatches[:5] == []
@@ -0,0 +1,66 @@
+"""
+Readings of one work share one cover lookup and one cover file, whichever tool fetches it
+"""
+
+import copy
+import os
+
+import pytest
+
+import download_covers_enhanced as covers
+import enrich
+import google_books
+import open_library
+from catalogue import Catalogue
+
+ISBN = '9780441013593'
+
+# Two readings of one work; only the later-listed one carries the ISBN
+BOOKS = {
+    '2025': {'books': [{'id': 'book-2025-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '',
+                        'coverImage': ''}]},
+    '2024': {'books': [{'id': 'book-2024-1', 'title': 'Dune', 'author': 'Frank Herbert', 'isbn': ISBN,
+                        'coverImage': ''}]},
+}
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Replace the provider waterfall with one that writes a file and logs each call"""
+    calls = []
+
+    def fake_fetch(book, output_path, volume_info=None, attempts=None, **kwargs):
+        calls.append((book['id'], output_path.name))
+        output_path.write_bytes(b'cover')
+        return 'openlibrary_success'
+
+    monkeypatch.setattr(covers, 'fetch_cover', fake_fetch)
+    monkeypatch.setattr(open_library, 'resolve_isbns', lambda isbns: 0)
+    monkeypatch.setattr(google_books, 'volume_by_isbn', lambda isbn: None)
+    monkeypatch.setattr(google_books, 'volume_by_title_author', lambda title, author: None)
+    return calls
+
+def catalogue(tmp_path):
+    covers_dir = tmp_path / 'covers'
+    covers_dir.mkdir(exist_ok=True)
+    return Catalogue(copy.deepcopy(BOOKS), path=None, covers_dir=covers_dir)
+
+def test_both_tools_name_the_cover_after_the_work_lead(tmp_path, fetches):
+    covers.download_covers(catalogue(tmp_path), tmp_path / 'covers', workers=2, quiet=True)
+    downloaded = list(fetches)
+    for path in (tmp_path / 'covers').iterdir():
+        path.unlink()
+    fetches.clear()
+
+    enrich.run_pipeline(catalogue(tmp_path), [enrich.CoverStage()], workers=2)
+
+    assert downloaded == fetches == [('book-2024-1', f"{ISBN}.jpg")]
+
+def test_readings_of_one_work_share_one_fetch(tmp_path, fetches):
+    cat = catalogue(tmp_path)
+    stats = covers.download_covers(cat, tmp_path / 'covers', workers=4, quiet=True)
+
+    assert fetches == [('book-2024-1', f"{ISBN}.jpg")]
+    # The reading without an ISBN gets the cover fetched for the other one
+    assert [book['coverImage'] for year, position, book in cat] == [f"/covers/{ISBN}.jpg"] * 2
+    assert os.listdir(tmp_path / 'covers') == [f"{ISBN}.jpg"]
+    assert (stats['total'], stats['openlibrary_success'], stats['already_exists']) == (2, 1, 1)
@@ -1,6 +1,12 @@
 import React, { useState, useRef } from 'react';
 import { useIsMobile } from '../utils/mobileDetection';
 
+// Rendered card widths per breakpoint, matching the grid column counts
+const COVER_SIZES = '(max-width: 640px) 50vw, (max-width: 1024px) 25vw, 200px';
+
+// Build a srcset string from a derivative list ([{ src, width }])
+const toSrcSet = (variants) => variants.map(({ src, width }) => `${src} ${width}w`).join(', ');
+
 const BookCard = ({ book }) => {
   const [isFlipped, setIsFlipped] = useState(false);
   const isMobile = useIsMobile();
@@ -11,6 +17,9 @@ const BookCard = ({ book }) => {
   const isFavorite = book.favorite === true || 
                     (Array.isArray(book.tags) && book.tags.includes('favorites'));
 
+  // Resized WebP/AVIF versions built by scripts/build_cover_derivatives.py, attached to shard books
+  const derivatives = book.coverVariants;
+
   // Handle touch (mobile only)
   const handleTouchStart = (e) => {
     e.preventDefault();
@@ -76,22 +85,40 @@ const BookCard = ({ book }) => {
           )}
           {book.coverImage ? (
             <>
-              <img 
-                src={book.coverImage} 
-                alt={`Cover of ${book.title}`}
-                className="w-full h-full object-cover"
-                style={{ 
-                  objectFit: 'cover',
-                  width: '100%',
-                  height: '100%',
-                  display: 'block'
-                }}
-                loading="lazy"
-                onError={(e) => {
-                  e.target.style.display = 'none';
-                  e.target.nextSibling.style.display = 'flex';
-                }}
-              />
+              {/* Inline preview from scripts/cover_placeholders.py paints before the cover loads */}
+              <picture
+                className="block w-full h-full"
+                style={book.coverPlaceholder ? {
+                  backgroundImage: `url(${book.coverPlaceholder})`,
+                  backgroundSize: 'cover',
+                  backgroundPosition: 'center'
+                } : undefined}
+              >
+                {derivatives?.avif && (
+                  <source type="image/avif" srcSet={toSrcSet(derivatives.avif)} sizes={COVER_SIZES} />
+                )}
+                {derivatives?.webp && (
+                  <source type="image/webp" srcSet={toSrcSet(derivatives.webp)} sizes={COVER_SIZES} />
+                )}
+                <img 
+                  src={book.coverImage} 
+                  alt={`Cover of ${book.title}`}
+                  className="w-full h-full object-cover"
+                  style={{ 
+                    objectFit: 'cover',
+                    width: '100%',
+                    height: '100%',
+                    display: 'block'
+                  }}
+                  loading="lazy"
+                  decoding="async"
+                  onError={(e) => {
+                    const picture = e.target.parentElement;
+                    picture.style.display = 'none';
+                    picture.nextSibling.style.display = 'flex';
+                  }}
+                />
+              </picture>
               <div className="w-full h-full bg-accent-purple/20 hidden items-center justify-center flex-col text-center p-3 sm:p-4">
                 <div className="text-3xl sm:text-4xl mb-2">📚</div>
                 <div className="text-text-primary text-xs font-normal">{book.title}</div>
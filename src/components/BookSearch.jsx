@@ -0,0 +1,62 @@
+import React, { useState } from 'react';
+import { useBookSearch } from '../utils/search';
+
+const MAX_RESULTS = 12;
+
+const BookSearch = ({ onSelectYear }) => {
+  const [query, setQuery] = useState('');
+  const results = useBookSearch(query);
+
+  const handleSelect = (year) => {
+    onSelectYear(year);
+    setQuery('');
+  };
+
+  return (
+    <div className="relative w-full sm:w-80">
+      <label htmlFor="book-search" className="block text-xs sm:text-sm font-light text-text-secondary mb-2 text-center">
+        Search Books
+      </label>
+      <input
+        id="book-search"
+        type="search"
+        value={query}
+        onChange={(e) => setQuery(e.target.value)}
+        placeholder="Title, author, genre..."
+        autoComplete="off"
+        className="w-full bg-background/80 backdrop-blur-sm border border-accent-purple/40 text-text-primary
+                 px-4 py-2.5 sm:py-3 rounded-md placeholder:text-text-secondary/60
+                 focus:outline-none focus:border-accent-purple-hover focus:ring-1 focus:ring-accent-purple/30
+                 shadow-soft hover:shadow-soft-lg transition-all duration-300 text-sm sm:text-base"
+      />
+      {query.trim() && (
+        <ul className="absolute z-20 left-0 right-0 mt-1 max-h-80 overflow-y-auto bg-background border border-accent-purple/40 rounded-md shadow-soft-lg">
+          {results.length === 0 && (
+            <li className="px-4 py-2 text-sm text-text-secondary">No matches</li>
+          )}
+          {results.slice(0, MAX_RESULTS).map((book) => (
+            <li key={`${book.year}-${book.id}`}>
+              <button
+                type="button"
+                onClick={() => handleSelect(book.year)}
+                className="w-full text-left px-4 py-2 hover:bg-accent-purple/10 transition-colors duration-200"
+              >
+                <span className="block text-sm text-text-primary truncate">{book.title}</span>
+                <span className="block text-xs text-text-secondary truncate">
+                  {book.author} · {book.year}
+                </span>
+              </button>
+            </li>
+          ))}
+          {results.length > MAX_RESULTS && (
+            <li className="px-4 py-2 text-xs text-text-secondary">
+              {results.length - MAX_RESULTS} more, keep typing to narrow down
+            </li>
+          )}
+        </ul>
+      )}
+    </div>
+  );
+};
+
+export default BookSearch;
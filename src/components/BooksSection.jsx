@@ -1,9 +1,10 @@
 import React, { useState, useEffect } from 'react';
-import booksData from '../data/books.json';
 import YearSection from './YearSection';
+import BookSearch from './BookSearch';
+import { getYears, useYearBooks } from '../utils/bookShards';
 
 const BooksSection = ({ onNavigateToFavorites }) => {
-  const years = Object.keys(booksData).sort((a, b) => b - a); // Sort descending (most recent first)
+  const years = getYears(); // Sorted descending (most recent first)
   const [selectedYear, setSelectedYear] = useState(years[0]); // Default to most recent year
   const [selectedFilter, setSelectedFilter] = useState(null); // null means "All Books"
 
@@ -12,23 +13,10 @@ const BooksSection = ({ onNavigateToFavorites }) => {
     setSelectedFilter(null);
   }, [selectedYear]);
 
-  // Get year data - handle both old and new structure for backward compatibility
-  const getYearData = (year) => {
-    const yearData = booksData[year];
-    // Check if it's the new structure (object with books and filters)
-    if (yearData && typeof yearData === 'object' && !Array.isArray(yearData) && yearData.books) {
-      return yearData;
-    }
-    // Old structure (array) - convert to new structure
-    return {
-      books: Array.isArray(yearData) ? yearData : [],
-      filters: {}
-    };
-  };
-
-  const yearData = getYearData(selectedYear);
-  const allBooks = yearData.books || [];
-  const filters = yearData.filters || {};
+  // Year shards are fetched on demand; the previous year stays on screen until the next arrives
+  const yearData = useYearBooks(selectedYear);
+  const allBooks = yearData.books;
+  const filters = yearData.filters;
 
   // Filter books based on selected filter
   const getFilteredBooks = () => {
@@ -73,8 +61,8 @@ const BooksSection = ({ onNavigateToFavorites }) => {
         </div>
       )}
 
-      {/* Year Selector Dropdown */}
-      <div className="flex justify-center mb-8 sm:mb-12 px-4 w-full">
+      {/* Year Selector Dropdown and Search */}
+      <div className="flex flex-col sm:flex-row sm:items-start justify-center gap-4 sm:gap-6 mb-8 sm:mb-12 px-4 w-full">
         <div className="relative inline-block w-full sm:w-auto">
           <label htmlFor="year-select" className="block text-xs sm:text-sm font-light text-text-secondary mb-2 text-center">
             Select Year
@@ -102,17 +90,21 @@ const BooksSection = ({ onNavigateToFavorites }) => {
             </svg>
           </div>
         </div>
+        <BookSearch onSelectYear={setSelectedYear} />
       </div>
 
       {/* Display selected year's books with filters */}
-      <YearSection 
-        year={selectedYear} 
-        books={filteredBooks}
-        allBooks={allBooks}
-        filters={filters}
-        selectedFilter={selectedFilter}
-        onFilterChange={setSelectedFilter}
-      />
+      {yearData.year && (
+        <YearSection 
+          year={yearData.year} 
+          books={filteredBooks}
+          allBooks={allBooks}
+          analytics={yearData.analytics}
+          filters={filters}
+          selectedFilter={selectedFilter}
+          onFilterChange={setSelectedFilter}
+        />
+      )}
     </div>
   );
 };
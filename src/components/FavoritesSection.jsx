@@ -1,36 +1,11 @@
 import React from 'react';
-import booksData from '../data/books.json';
 import BookCard from './BookCard';
+import { getFavorites as getIndexedFavorites } from '../utils/bookShards';
 
 const FavoritesSection = ({ onNavigateBack }) => {
-  // Aggregate all favorite books from all years
+  // Favorites from every year come precomputed in the books index
   const getFavorites = () => {
-    const favorites = [];
-    
-    Object.keys(booksData).forEach((year) => {
-      const yearData = booksData[year];
-      
-      // Handle both old and new structure
-      let books = [];
-      if (yearData && typeof yearData === 'object' && !Array.isArray(yearData) && yearData.books) {
-        books = yearData.books || [];
-      } else if (Array.isArray(yearData)) {
-        books = yearData;
-      }
-      
-      // Find books marked as favorite
-      // Support both old format (favorite: true) and new format (tags: ["favorites"])
-      books.forEach((book) => {
-        const isFavorite = book.favorite === true || 
-                          (Array.isArray(book.tags) && book.tags.includes('favorites'));
-        if (isFavorite) {
-          favorites.push({
-            ...book,
-            yearRead: year
-          });
-        }
-      });
-    });
+    const favorites = [...getIndexedFavorites()];
     
     // Sort by year (most recent first), then by original order
     return favorites.sort((a, b) => {
@@ -2,6 +2,23 @@ import React, { useState, useEffect, useRef } from 'react';
 import { createPortal } from 'react-dom';
 import { useIsMobile } from '../utils/mobileDetection';
 
+// Book fields the precomputed analytics are built from (FINGERPRINT_FIELDS in scripts/build_analytics.py)
+const FINGERPRINT_FIELDS = ['id', 'datesRead', 'startDate', 'finishDate', 'pageCount', 'fictionType'];
+
+// 32-bit FNV-1a over those fields, matching fingerprint() in scripts/build_analytics.py
+const analyticsFingerprint = (books) => {
+  const text = books
+    .map((book) => FINGERPRINT_FIELDS
+      .map((field) => (book[field] === undefined || book[field] === null ? '' : String(book[field])))
+      .join('\u001f'))
+    .join('\u001e');
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < text.length; i++) {
+    hash = Math.imul(hash ^ text.charCodeAt(i), 0x01000193);
+  }
+  return (hash >>> 0).toString(16).padStart(8, '0');
+};
+
 // Calculate complementary color (180° rotation on color wheel)
 const calculateComplementaryColor = (color) => {
   let r, g, b;
@@ -338,7 +355,12 @@ const TimelineBar = ({ book, leftPercent, widthPercent, startStr, finishStr, for
   const tooltipDimensionsRef = useRef({ width: 0, height: 0 });
 
   useEffect(() => {
-    if (book.coverImage) {
+    // Colours precomputed by scripts/build_cover_colors.py (on shard books); sample the image only as a fallback
+    const precomputed = book.coverColors;
+    if (precomputed && precomputed.dominant) {
+      setDominantColor(precomputed.dominant);
+      setComplementaryColor(precomputed.complementary);
+    } else if (book.coverImage) {
       extractColors(book.coverImage, (dominant, complementary) => {
         setDominantColor(dominant);
         setComplementaryColor(complementary);
@@ -649,7 +671,7 @@ const TimelineBar = ({ book, leftPercent, widthPercent, startStr, finishStr, for
   );
 };
 
-const YearAnalytics = ({ year, books }) => {
+const YearAnalytics = ({ year, books, analytics }) => {
   // Focus state: track which book is currently hovered
   const [hoveredBookId, setHoveredBookId] = useState(null);
   // Mobile detection
@@ -699,11 +721,16 @@ const YearAnalytics = ({ year, books }) => {
     );
   }
   
+  // Stats and timeline lanes precomputed by scripts/build_analytics.py and shipped in the year's shard.
+  // Everything below is only recomputed when they are missing or stale for this year.
+  const precomputed = analytics;
+  const usePrecomputed = Boolean(precomputed) && precomputed.fingerprint === analyticsFingerprint(books);
+
   // Calculate stats
   const totalBooks = books.length;
   
   // Calculate total pages read
-  const totalPages = books.reduce((sum, book) => {
+  const totalPages = usePrecomputed ? precomputed.totalPages : books.reduce((sum, book) => {
     const pageCount = book.pageCount || 0;
     return sum + (typeof pageCount === 'number' ? pageCount : 0);
   }, 0);
@@ -713,7 +740,9 @@ const YearAnalytics = ({ year, books }) => {
   let nonFictionCount = 0;
   let poetryCount = 0;
   
-  books.forEach((book) => {
+  if (usePrecomputed) {
+    ({ fictionCount, nonFictionCount, poetryCount } = precomputed);
+  } else books.forEach((book) => {
     if (!book) return;
     const fictionType = book.fictionType;
     
@@ -816,8 +845,16 @@ const YearAnalytics = ({ year, books }) => {
     }
   };
 
+  // Attach precomputed timeline bars to their books
+  const hydrateTimeline = (bars) => {
+    const bookById = new Map(books.map((book) => [book.id, book]));
+    return bars
+      .filter((bar) => bookById.has(bar.id))
+      .map((bar) => ({ ...bookById.get(bar.id), ...bar }));
+  };
+
   // Process timeline data
-  const timelineData = books
+  const timelineData = usePrecomputed ? hydrateTimeline(precomputed.timeline.bars) : books
     .filter((book) => {
       // Support both old format (startDate/finishDate) and new format (datesRead)
       return (book.startDate && book.finishDate) || book.datesRead;
@@ -960,7 +997,15 @@ const YearAnalytics = ({ year, books }) => {
     };
   };
 
-  const laneData = assignLanes(timelineData);
+  const precomputedLanes = usePrecomputed ? new Map(timelineData.map((book) => [book.id, book.lane])) : null;
+  const laneData = usePrecomputed
+    ? {
+        getLane: (bookId) => precomputedLanes.get(bookId) || 0,
+        totalLanes: precomputed.timeline.totalLanes,
+        barHeight: precomputed.timeline.barHeight,
+        laneSpacing: precomputed.timeline.laneSpacing,
+      }
+    : assignLanes(timelineData);
   
   // Persist timeline zoom to localStorage (mobile only)
   useEffect(() => {
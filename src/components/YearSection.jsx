@@ -13,7 +13,7 @@ const shuffleArray = (array) => {
   return shuffled;
 };
 
-const YearSection = ({ year, books, allBooks, filters = {}, selectedFilter, onFilterChange }) => {
+const YearSection = ({ year, books, allBooks, analytics, filters = {}, selectedFilter, onFilterChange }) => {
   const isMobile = useIsMobile();
   
   // Initialize viewMode from localStorage, default to 'collection'
@@ -248,7 +248,7 @@ const YearSection = ({ year, books, allBooks, filters = {}, selectedFilter, onFi
 
       {/* Analytics View */}
       {viewMode === 'analytics' && (
-        <YearAnalytics year={year} books={booksForAnalytics} />
+        <YearAnalytics year={year} books={booksForAnalytics} analytics={analytics} />
       )}
 
       {/* Collection View */}
@@ -0,0 +1,74 @@
+import { useState, useEffect } from 'react';
+import booksIndex from '../data/books_index.json';
+
+// Shard requests by year, shared so each year is fetched at most once
+const shardRequests = {};
+
+const shardUrl = (year) => booksIndex.years.find((entry) => entry.year === year)?.shard;
+
+/**
+ * Years in the catalogue, most recent first
+ * @returns {string[]}
+ */
+export const getYears = () => booksIndex.years.map((entry) => entry.year).sort((a, b) => b - a);
+
+/**
+ * Favourite books from every year, each with a yearRead field
+ * @returns {object[]}
+ */
+export const getFavorites = () => booksIndex.favorites;
+
+/**
+ * Fetch one year's shard ({ books, filters, analytics })
+ * Falls back to the full books.json (as a separate lazy chunk) if the shard can't be loaded
+ * @param {string} year
+ * @returns {Promise<{books: object[], filters: object, analytics: object|null}>}
+ */
+export const loadYear = (year) => {
+  if (!shardRequests[year]) {
+    const url = shardUrl(year);
+    shardRequests[year] = (url ? fetch(url) : Promise.reject(new Error(`No shard for ${year}`)))
+      .then((response) => {
+        if (!response.ok) throw new Error(`${url}: ${response.status}`);
+        return response.json();
+      })
+      .catch(() => import('../data/books.json').then((module) => module.default[year] || { books: [] }))
+      .then((yearData) => ({
+        books: yearData.books || [],
+        filters: yearData.filters || {},
+        analytics: yearData.analytics || null,
+      }));
+  }
+  return shardRequests[year];
+};
+
+/**
+ * Custom hook returning a year's books once its shard has loaded
+ * Keeps returning the previously loaded year while the next one loads
+ * @param {string} year
+ * @returns {{year: string|null, books: object[], filters: object, analytics: object|null}}
+ */
+export const useYearBooks = (year) => {
+  const [loaded, setLoaded] = useState({ year: null, books: [], filters: {}, analytics: null });
+
+  useEffect(() => {
+    let cancelled = false;
+    loadYear(year).then((yearData) => {
+      if (!cancelled) setLoaded({ year, ...yearData });
+    });
+
+    // Warm the neighbouring years while the browser is idle
+    const years = getYears();
+    const index = years.indexOf(year);
+    const prefetch = () => [years[index - 1], years[index + 1]].filter(Boolean).forEach(loadYear);
+    const idle = window.requestIdleCallback ? window.requestIdleCallback(prefetch) : setTimeout(prefetch, 1000);
+
+    return () => {
+      cancelled = true;
+      if (window.cancelIdleCallback) window.cancelIdleCallback(idle);
+      else clearTimeout(idle);
+    };
+  }, [year]);
+
+  return loaded;
+};
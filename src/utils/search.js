@@ -0,0 +1,85 @@
+import { useState, useEffect } from 'react';
+import { tokenize } from './tokenize';
+
+// The index is a separate chunk, only fetched the first time someone searches
+let indexRequest = null;
+
+const loadIndex = () => {
+  if (!indexRequest) {
+    indexRequest = import('../data/search_index.json').then((module) => module.default);
+  }
+  return indexRequest;
+};
+
+// First term >= token in the sorted term list
+const lowerBound = (terms, token) => {
+  let lo = 0;
+  let hi = terms.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (terms[mid] < token) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+};
+
+// Documents containing any term that starts with token
+const prefixMatches = (index, token) => {
+  const matches = new Set();
+  for (let i = lowerBound(index.terms, token); i < index.terms.length && index.terms[i].startsWith(token); i++) {
+    let docId = 0;
+    for (const delta of index.postings[i]) {
+      docId += delta;
+      matches.add(docId);
+    }
+  }
+  return matches;
+};
+
+/**
+ * Books matching every word of the query (each word as a prefix)
+ * @param {object} index - Parsed search_index.json
+ * @param {string} query
+ * @returns {{id: string, year: string, title: string, author: string}[]}
+ */
+export const searchIndex = (index, query) => {
+  let result = null;
+  for (const token of tokenize(query)) {
+    const matches = prefixMatches(index, token);
+    result = result === null ? matches : new Set([...result].filter((docId) => matches.has(docId)));
+    if (result.size === 0) return [];
+  }
+  if (result === null) return [];
+  return [...result]
+    .sort((a, b) => a - b)
+    .map((docId) => {
+      const [id, year, title, author] = index.docs[docId];
+      return { id, year, title, author };
+    });
+};
+
+/**
+ * Custom hook returning the books matching a query
+ * Loads the index on the first non-empty query
+ * @param {string} query
+ * @returns {object[]}
+ */
+export const useBookSearch = (query) => {
+  const [results, setResults] = useState([]);
+
+  useEffect(() => {
+    if (tokenize(query).length === 0) {
+      setResults([]);
+      return undefined;
+    }
+    let cancelled = false;
+    loadIndex().then((index) => {
+      if (!cancelled) setResults(searchIndex(index, query));
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, [query]);
+
+  return results;
+};
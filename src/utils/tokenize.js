@@ -0,0 +1,29 @@
+// Where Python's str.casefold() differs from toLowerCase() once text is NFKD-normalized without marks
+const CASEFOLD = {
+  'ß': 'ss', 'ς': 'σ',
+  'ᲀ': 'в', 'ᲁ': 'д', 'ᲂ': 'о', 'ᲃ': 'с', 'ᲄ': 'т', 'ᲅ': 'т', 'ᲆ': 'ъ', 'ᲇ': 'ѣ', 'ᲈ': 'ꙋ',
+};
+
+// Python folds Cherokee to its uppercase letters
+const CHEROKEE_LOWER = /[ᏸ-ᏽꭰ-ꮿ]/g;
+
+// str.isspace(), which Python's split() and \s use
+const WHITESPACE = '\\t\\n\\v\\f\\r\\x1c-\\x20\\x85\\xa0\\u1680\\u2000-\\u200a\\u2028\\u2029\\u202f\\u205f\\u3000';
+
+/**
+ * Split text into index tokens, folded the same way as catalogue.normalize_text:
+ * NFKD, combining marks dropped, casefolded, anything but letters, digits and _ as a separator
+ * scripts/tests/test_tokenize.py checks both against scripts/tests/fixtures/tokenize.json
+ * @param {string} text
+ * @returns {string[]}
+ */
+export const tokenize = (text) =>
+  (text || '')
+    .normalize('NFKD')
+    .replace(/\p{M}/gu, '')
+    .toLowerCase()
+    .replace(/[ßςᲀ-ᲈ]/g, (c) => CASEFOLD[c])
+    .replace(CHEROKEE_LOWER, (c) => c.toUpperCase())
+    .replace(new RegExp(`[^\\p{L}\\p{N}_${WHITESPACE}]`, 'gu'), ' ')
+    .split(new RegExp(`[${WHITESPACE}]+`, 'u'))
+    .filter(Boolean);